@@ -18,6 +18,10 @@ API_HASH = os.getenv("API_HASH", "")
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 SESSION_STRING = os.getenv("SESSION_STRING") or os.getenv("STRING_SESSION", "")
 SESSION_STRING = SESSION_STRING.strip().strip("\"'") if SESSION_STRING else ""
+# Comma-separated session strings for additional assistants (voice chat sharding)
+EXTRA_SESSION_STRINGS: list[str] = [
+    s.strip().strip("\"'") for s in os.getenv("EXTRA_SESSION_STRINGS", "").split(",") if s.strip()
+]
 
 # ── MongoDB ──────────────────────────────────
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017").strip().strip("\"'")
@@ -43,6 +47,106 @@ MAX_DURATION = 3600  # 1 hour
 IDLE_TIMEOUT = 600   # 10 minutes auto-leave
 ENABLE_PREMIUM_EFFECTS = os.getenv("ENABLE_PREMIUM_EFFECTS", "False").lower() == "true"
 
+# ── Voice Chat Calls ─────────────────────────
+MAX_GROUP_CALLS = int(os.getenv("MAX_GROUP_CALLS", "200"))                # live GroupCall objects, all states
+CALL_ADMISSION_TIMEOUT = float(os.getenv("CALL_ADMISSION_TIMEOUT", "20"))  # seconds a play waits for a slot
+CALL_IDLE_EVICT = int(os.getenv("CALL_IDLE_EVICT", "300"))                # drop unjoined calls after this
+JOIN_READY_TIMEOUT = float(os.getenv("JOIN_READY_TIMEOUT", "8"))   # seconds to wait for connected state
+JOIN_MAX_RETRIES = int(os.getenv("JOIN_MAX_RETRIES", "4"))         # retries on transient errors only
+JOIN_BACKOFF_BASE = float(os.getenv("JOIN_BACKOFF_BASE", "0.25"))  # first retry delay, doubles per attempt
+
+# ── Stream Buffering ─────────────────────────
+STREAM_RING_SECONDS = int(os.getenv("STREAM_RING_SECONDS", "20"))     # PCM ring size per chat
+STREAM_HEAD_START_MS = int(os.getenv("STREAM_HEAD_START_MS", "500"))  # audio buffered before playback
+
+# ── Transitions ──────────────────────────────
+GAPLESS_ENABLED = os.getenv("GAPLESS_ENABLED", "False").lower() == "true"  # raw PCM playout for audio
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", "0"))  # 0 = gapless cut
+TRANSITION_PRELOAD_SECONDS = float(os.getenv("TRANSITION_PRELOAD_SECONDS", "10"))  # pre-decode lead time
+
+# ── FFmpeg Supervisor ────────────────────────
+FFMPEG_MAX_DECODERS = int(os.getenv("FFMPEG_MAX_DECODERS", "50"))    # global concurrent decoders
+FFMPEG_STALL_TIMEOUT = int(os.getenv("FFMPEG_STALL_TIMEOUT", "15"))  # seconds without progress
+FFMPEG_MAX_RESTARTS = int(os.getenv("FFMPEG_MAX_RESTARTS", "5"))
+FFMPEG_NICE = int(os.getenv("FFMPEG_NICE", "10"))                   # 0 disables renicing
+FFMPEG_THREADS = int(os.getenv("FFMPEG_THREADS", "1"))
+
+# ── Loudness Normalization ───────────────────
+LOUDNESS_ENABLED = os.getenv("LOUDNESS_ENABLED", "True").lower() == "true"
+LOUDNESS_TARGET = float(os.getenv("LOUDNESS_TARGET", "-14"))                 # integrated LUFS
+LOUDNESS_MAX_GAIN = float(os.getenv("LOUDNESS_MAX_GAIN", "12"))              # dB, either direction
+LOUDNESS_ANALYZE_SECONDS = int(os.getenv("LOUDNESS_ANALYZE_SECONDS", "300"))  # measured per track
+LOUDNESS_LOOKAHEAD = int(os.getenv("LOUDNESS_LOOKAHEAD", "3"))               # queued tracks analysed ahead
+LOUDNESS_MAX_CPU = float(os.getenv("LOUDNESS_MAX_CPU", "75"))                # skip analysis above this CPU %
+
+# ── Quality Governor ─────────────────────────
+QUALITY_GOVERNOR_ENABLED = os.getenv("QUALITY_GOVERNOR_ENABLED", "True").lower() == "true"
+QUALITY_CPU_HIGH = float(os.getenv("QUALITY_CPU_HIGH", "80"))             # CPU % that counts as full load
+QUALITY_RAM_HIGH = float(os.getenv("QUALITY_RAM_HIGH", "85"))             # RAM % that counts as full load
+QUALITY_STREAM_BUDGET = float(os.getenv("QUALITY_STREAM_BUDGET", "150"))  # cost units (audio 1, video 6)
+QUALITY_RECOVER = float(os.getenv("QUALITY_RECOVER", "0.7"))              # step up below this load ratio
+QUALITY_HOLD = int(os.getenv("QUALITY_HOLD", "60"))                       # seconds of low load before stepping up
+
+# ── Media Metadata Cache ─────────────────────
+META_CACHE_MAX_ENTRIES = int(os.getenv("META_CACHE_MAX_ENTRIES", "2000"))
+META_CACHE_MAX_BYTES = int(os.getenv("META_CACHE_MAX_MB", "8")) * 1024 * 1024
+
+# ── Search Result Cache ──────────────────────
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "600"))      # seconds a result set is shared
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "500"))    # result sets kept (LRU)
+SEARCH_FETCH_LIMIT = int(os.getenv("SEARCH_FETCH_LIMIT", "15"))   # results per extraction (3 pages of 5)
+
+# ── Extraction Service ───────────────────────
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "3"))
+EXTRACT_MAX_PENDING = int(os.getenv("EXTRACT_MAX_PENDING", "64"))
+EXTRACT_TIMEOUT = int(os.getenv("EXTRACT_TIMEOUT", "45"))  # seconds, queue wait included
+EXTRACT_USE_PROCESSES = os.getenv("EXTRACT_USE_PROCESSES", "True").lower() == "true"
+
+# ── Look-Ahead Prefetch ──────────────────────
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "2"))  # upcoming tracks kept resolved
+PREFETCH_TTL = int(os.getenv("PREFETCH_TTL", "1800"))  # seconds a prefetched URL is trusted
+
+# ── Playlists ────────────────────────────────
+PLAYLIST_PAGE_SIZE = int(os.getenv("PLAYLIST_PAGE_SIZE", "50"))     # entries per flat-extraction page
+PLAYLIST_IMPORT_MAX = int(os.getenv("PLAYLIST_IMPORT_MAX", "500"))  # tracks queued per import
+
+# ── Signed URL Refresh ───────────────────────
+URL_REFRESH_MARGIN = int(os.getenv("URL_REFRESH_MARGIN", "600"))  # refresh this many seconds before expiry
+URL_REFRESH_WINDOW = int(os.getenv("URL_REFRESH_WINDOW", "5"))    # queue positions refreshed proactively
+URL_REFRESH_BATCH = int(os.getenv("URL_REFRESH_BATCH", "4"))      # concurrent re-resolves per batch
+
+# ── Autoplay Recommender ─────────────────────
+RECOMMENDER_NO_REPEAT = int(os.getenv("RECOMMENDER_NO_REPEAT", "20"))       # recent plays never re-picked
+RECOMMENDER_MAX_TRACKS = int(os.getenv("RECOMMENDER_MAX_TRACKS", "50000"))  # tracks kept in the index
+RECOMMENDER_WARM_PLAYS = int(os.getenv("RECOMMENDER_WARM_PLAYS", "50000"))  # history replayed at startup
+
+# ── Local Audio Cache ────────────────────────
+AUDIO_CACHE_ENABLED = os.getenv("AUDIO_CACHE_ENABLED", "False").lower() == "true"
+AUDIO_CACHE_GB = float(os.getenv("AUDIO_CACHE_GB", "2"))
+AUDIO_CACHE_WORKERS = int(os.getenv("AUDIO_CACHE_WORKERS", "2"))  # concurrent transcodes
+
+# ── HTTP Client ──────────────────────────────
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # pooled connections, all hosts
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "8"))                  # concurrent connections per host
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))                 # seconds per request
+
+# ── Lyrics ───────────────────────────────────
+LYRICS_API_URL = os.getenv("LYRICS_API_URL", "https://some-random-api.com/lyrics")  # point at a stub in tests
+LYRICS_CACHE_TTL = int(os.getenv("LYRICS_CACHE_TTL", str(30 * 86400)))
+LYRICS_NEGATIVE_TTL = int(os.getenv("LYRICS_NEGATIVE_TTL", "86400"))  # remember "not found" this long
+LYRICS_PREFETCH = os.getenv("LYRICS_PREFETCH", "True").lower() == "true"  # look up on track start
+
+# ── Now Playing Panel ────────────────────────
+PANEL_REFRESH_INTERVAL = float(os.getenv("PANEL_REFRESH_INTERVAL", "15"))  # min seconds between edits per chat
+PANEL_EDITS_PER_SECOND = float(os.getenv("PANEL_EDITS_PER_SECOND", "20"))  # bot-wide edit budget
+PANEL_MAX_AGE = int(os.getenv("PANEL_MAX_AGE", str(3 * 3600)))             # stop refreshing older panels
+
+# ── Queue Persistence ────────────────────────
+QUEUE_JOURNAL_ENABLED = os.getenv("QUEUE_JOURNAL_ENABLED", "True").lower() == "true"
+QUEUE_JOURNAL_INTERVAL = float(os.getenv("QUEUE_JOURNAL_INTERVAL", "2"))  # seconds between flushes
+QUEUE_JOURNAL_MAX_TRACKS = int(os.getenv("QUEUE_JOURNAL_MAX_TRACKS", "100"))  # per chat snapshot
+QUEUE_RESTORE_MAX_AGE = int(os.getenv("QUEUE_RESTORE_MAX_AGE", "21600"))  # ignore older snapshots
+
 # ── Economy ──────────────────────────────────
 DAILY_AMOUNT = 1000
 ROB_COOLDOWN = 120       # seconds
@@ -5,7 +5,7 @@ Secondary Pyrogram client used as the PyTgCalls bridge for voice chats.
 
 import logging
 from pyrogram import Client
-from config import API_ID, API_HASH
+from config import API_ID, API_HASH, EXTRA_SESSION_STRINGS
 
 logger = logging.getLogger(__name__)
 
@@ -16,40 +16,70 @@ class AuralyxAssistant(Client):
 
     NOTE: This client requires a SESSION_STRING for production use.
     For now it is scaffolded — provide SESSION_STRING via env when ready.
+    Extra assistants (index >= 1) are built from EXTRA_SESSION_STRINGS.
     """
 
-    def __init__(self):
+    def __init__(self, session_string: str | None = None, index: int = 0):
         import os
         import sys
 
-        session_string = os.getenv("SESSION_STRING", "")
+        self.index = index
+        if session_string is None:
+            session_string = os.getenv("SESSION_STRING", "")
         if not session_string:
             logger.critical("SESSION_STRING is missing in .env! The Assistant cannot start without it.")
             logger.critical("Run 'python gen_session.py' to get one and add it to .env.")
             sys.exit(1)
 
         super().__init__(
-            name="AuralyxAssistant",
+            name="AuralyxAssistant" if index == 0 else f"AuralyxAssistant{index}",
             api_id=API_ID,
             api_hash=API_HASH,
             session_string=session_string,
             in_memory=True,
         )
-        logger.info("AuralyxAssistant client initialized.")
+        logger.info("AuralyxAssistant client initialized (#%d).", index)
 
     async def start(self):
         await super().start()
         me = await self.get_me()
         logger.info(
-            "Assistant started as %s (ID: %s)",
+            "Assistant #%d started as %s (ID: %s)",
+            self.index,
             me.first_name,
             me.id,
         )
 
     async def stop(self):
         await super().stop()
-        logger.info("Assistant stopped.")
+        logger.info("Assistant #%d stopped.", self.index)
 
 
-# Export a single instance
+# Export the primary instance and the pool (primary first). Extra assistants
+# are only built in start_assistants(), inside the running loop.
 assistant = AuralyxAssistant()
+assistants: list[AuralyxAssistant] = [assistant]
+
+
+async def start_assistants():
+    """Start the pool. The primary is required; extra assistants are best-effort."""
+    await assistant.start()
+    if len(assistants) == 1:
+        # Positions in the pool are the assistant indices CallManager places on.
+        assistants.extend(
+            AuralyxAssistant(session, index) for index, session in enumerate(EXTRA_SESSION_STRINGS, 1)
+        )
+    for extra in assistants[1:]:
+        try:
+            await extra.start()
+        except Exception as e:
+            logger.error("Assistant #%d failed to start, leaving it out of rotation: %s", extra.index, e)
+
+
+async def stop_assistants():
+    for client in assistants:
+        try:
+            if client.is_connected:
+                await client.stop()
+        except Exception:
+            pass
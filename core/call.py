@@ -1,19 +1,126 @@
 ﻿"""
 Auralyx Music - Voice Chat Call Manager
 Creates and manages per-chat GroupCall instances so each group
-gets its own independent voice chat stream.
+gets its own independent voice chat stream. Chats are sharded across
+the assistant pool with sticky, least-loaded placement, and the number
+of live calls is capped with an admission queue and LRU idle eviction.
 """
 
 import asyncio
 import logging
+import random
+import time
+from collections import Counter, OrderedDict, deque
 from types import MethodType
 
 from pytgcalls import GroupCallFactory
 
-from core.assistant import assistant
+from config import (
+    CALL_ADMISSION_TIMEOUT,
+    CALL_IDLE_EVICT,
+    JOIN_BACKOFF_BASE,
+    JOIN_MAX_RETRIES,
+    JOIN_READY_TIMEOUT,
+    MAX_GROUP_CALLS,
+)
+from core.assistant import assistants
+from utils.stream import set_stream_end_handler
 
 logger = logging.getLogger(__name__)
 
+# Audio and video playout can both report the end of one track.
+_END_DEBOUNCE = 3.0
+
+# GroupCall lifecycle states
+CALL_IDLE = "idle"        # allocated, not joined
+CALL_JOINING = "joining"
+CALL_PLAYING = "playing"
+CALL_PAUSED = "paused"
+CALL_LEAVING = "leaving"
+
+_BACKOFF_CAP = 4.0        # seconds, longest single retry delay
+_MAX_FLOOD_RETRY = 15     # FloodWaits longer than this are surfaced, not slept
+_READY_POLL = 0.1         # fallback poll when the backend has no network event
+_HEALTH_INTERVAL = 15     # seconds between assistant connectivity checks
+
+# Errors worth retrying: the call is still settling, not misconfigured.
+_TRANSIENT_HINTS = (
+    "timeout",
+    "timed out",
+    "not connected",
+    "not joined",
+    "connection",
+    "temporarily",
+    "try again",
+    "groupcall_join_missing",
+    "participant",
+    "internal",
+)
+_FATAL_HINTS = (
+    "forbidden",
+    "admin required",
+    "peer_id_invalid",
+    "peer id invalid",
+    "no such file",
+    "not found",
+    "invalid",
+)
+
+_join_latency: deque = deque(maxlen=500)  # seconds, join() -> media started
+_join_stats = {"joins": 0, "retries": 0, "timeouts": 0, "failures": 0}
+
+
+def _is_transient(err: Exception) -> bool:
+    """Classify a join/start error: True if retrying can help."""
+    if type(err).__name__ == "FloodWait":
+        return int(getattr(err, "value", 0) or 0) <= _MAX_FLOOD_RETRY
+    if isinstance(err, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    low = str(err).lower()
+    if any(hint in low for hint in _FATAL_HINTS):
+        return False
+    return any(hint in low for hint in _TRANSIENT_HINTS)
+
+
+def _retry_delay(err: Exception, attempt: int) -> float:
+    if type(err).__name__ == "FloodWait":
+        return float(getattr(err, "value", 1) or 1)
+    # Exponential backoff with jitter so chats retrying together spread out.
+    ceiling = min(_BACKOFF_CAP, JOIN_BACKOFF_BASE * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+async def _with_retry(op, what: str):
+    """Run `op()` and retry classified transient errors with jittered backoff."""
+    attempt = 0
+    while True:
+        try:
+            return await op()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if attempt >= JOIN_MAX_RETRIES or not _is_transient(e):
+                _join_stats["failures"] += 1
+                raise
+            delay = _retry_delay(e, attempt)
+            attempt += 1
+            _join_stats["retries"] += 1
+            logger.debug("%s failed (%s), retry %d in %.2fs", what, e, attempt, delay)
+            await asyncio.sleep(delay)
+
+
+def get_join_stats() -> dict:
+    lat = sorted(_join_latency)
+
+    def pct(p: float) -> float:
+        return lat[min(len(lat) - 1, int(len(lat) * p))] if lat else 0.0
+
+    return {
+        **_join_stats,
+        "p50_ms": pct(0.50) * 1000,
+        "p95_ms": pct(0.95) * 1000,
+    }
+
 
 def _attach_legacy_api(gc):
     """
@@ -27,51 +134,127 @@ def _attach_legacy_api(gc):
         source = getattr(stream, "source", None) or getattr(stream, "path", None) or ""
         return source, bool(is_video)
 
-    async def join_group_call(self, chat_id, stream, stream_type=None, is_video=None):
-        source, use_video = _resolve_stream(stream, is_video)
-        if not self.is_connected:
-            await self.join(chat_id)
-            await asyncio.sleep(1.2)  # allow participant state to propagate
+    def _is_pcm_source(stream):
+        # Ring buffers from utils.stream expose read(length) -> s16le PCM.
+        return not isinstance(stream, str) and callable(getattr(stream, "read", None))
+
+    async def _play_pcm(self, reader):
+        """Swap playout to a raw PCM reader on the already-joined call."""
+        if not getattr(self, "_pcm_feed", False):
+            # GroupCall's own hook reads its AudioStream; restored by _release_pcm.
+            self._native_audio_hook = self.on_audio_played_data
+        try:
+            await self.stop_video(with_mtproto=False)
+            await self.stop_audio(with_mtproto=False)
+        except Exception:
+            pass
+        self._pcm_paused = False
+        self.on_audio_played_data = lambda _gc, length: b"" if self._pcm_paused else reader.read(length)
+        self._pcm_feed = True
+        if self.is_connected:
+            # One update: video off, mute flag back to the pause state (stop_media would mute).
+            await self.edit_group_call(video_stopped=True)
+
+    def _release_pcm(self):
+        if getattr(self, "_pcm_feed", False):
+            self.on_audio_played_data = self._native_audio_hook
+            self._pcm_feed = False
 
-        last_err = None
-        for _ in range(3):
+    # Set by the backend's network-status event; polled as a fallback.
+    ready = asyncio.Event()
+
+    async def _on_network_status(_gc, is_connected, *_args):
+        if is_connected:
+            ready.set()
+        else:
+            ready.clear()
+            gc._my_volume = 100  # a rejoin starts at full volume
+
+    register = getattr(gc, "on_network_status_changed", None)
+    if callable(register):
+        try:
+            register(_on_network_status)
+        except Exception as e:
+            logger.debug("Could not bind on_network_status_changed: %s", e)
+
+    async def _wait_ready(self, timeout: float) -> bool:
+        """Wait until the call reports connected, up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while not self.is_connected:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
             try:
-                if use_video:
-                    await self.start_video(source, with_audio=True, repeat=False)
-                else:
-                    await self.start_audio(source, repeat=False)
-                return
-            except Exception as e:
-                last_err = e
-                await asyncio.sleep(1.0)
-        if last_err:
-            raise last_err
+                await asyncio.wait_for(ready.wait(), timeout=min(_READY_POLL, remaining))
+            except asyncio.TimeoutError:
+                pass
+        return True
 
-    async def change_stream(self, chat_id, stream, is_video=None):
+    async def _ensure_joined(self, chat_id) -> float:
+        """Join if needed. Returns when the join started, or 0.0 if already joined."""
+        if self.is_connected:
+            return 0.0
+        started = time.monotonic()
+        ready.clear()
+        self._my_volume = 100  # in case the disconnect event was missed
+        await _with_retry(lambda: self.join(chat_id), f"join({chat_id})")
+        if not await _wait_ready(self, JOIN_READY_TIMEOUT):
+            # start_* below retries on "not connected", so carry on.
+            _join_stats["timeouts"] += 1
+            logger.warning("Voice chat %s not ready after %.1fs", chat_id, JOIN_READY_TIMEOUT)
+        return started
+
+    async def _start_media(self, chat_id, source, use_video):
+        async def _start():
+            if use_video:
+                await self.start_video(source, with_audio=True, repeat=False)
+            else:
+                await self.start_audio(source, repeat=False)
+
+        await _with_retry(_start, f"start_media({chat_id})")
+
+    def _record_join(started: float):
+        if started:
+            _join_stats["joins"] += 1
+            _join_latency.append(time.monotonic() - started)
+
+    async def join_group_call(self, chat_id, stream, stream_type=None, is_video=None):
         source, use_video = _resolve_stream(stream, is_video)
-        if not self.is_connected:
-            await self.join(chat_id)
-            await asyncio.sleep(1.2)
+        started = await _ensure_joined(self, chat_id)
+        if _is_pcm_source(stream):
+            await _play_pcm(self, stream)
+            _record_join(started)
+            return
+        _release_pcm(self)
+        await _start_media(self, chat_id, source, use_video)
+        _record_join(started)
 
-        last_err = None
-        for _ in range(3):
-            try:
-                if use_video:
-                    await self.start_video(source, with_audio=True, repeat=False)
-                else:
-                    await self.start_audio(source, repeat=False)
-                return
-            except Exception as e:
-                last_err = e
-                await asyncio.sleep(1.0)
-        if last_err:
-            raise last_err
+    async def change_stream(self, chat_id, stream, is_video=None):
+        if _is_pcm_source(stream):
+            if not self.is_connected:
+                raise RuntimeError("Not connected to a voice chat.")
+            await _play_pcm(self, stream)
+            return
+
+        source, use_video = _resolve_stream(stream, is_video)
+        started = await _ensure_joined(self, chat_id)
+        _release_pcm(self)
+        await _start_media(self, chat_id, source, use_video)
+        _record_join(started)
 
     async def mute_stream(self, chat_id, mute=True):
         await self.set_audio_pause(bool(mute))
 
-    async def leave_current_group_call(self):
-        await self.leave()
+    async def set_volume(self, volume):
+        """Participant volume (1-200); needs Manage Voice Chats, so failures are only logged."""
+        volume = max(1, min(int(volume or 100), 200))
+        if getattr(self, "_my_volume", 100) == volume or not self.is_connected:
+            return
+        try:
+            await self.set_my_volume(volume)
+            self._my_volume = volume
+        except Exception as e:
+            logger.debug("Could not set volume %s: %s", volume, e)
 
     def _schedule(coro):
         try:
@@ -81,12 +264,16 @@ def _attach_legacy_api(gc):
             pass
 
     def stop_playout(self):
+        _release_pcm(self)
         _schedule(self.stop_media())
 
     def pause_playout(self):
+        # A PCM feed keeps being polled while muted; hold the ring so nothing is skipped.
+        self._pcm_paused = True
         _schedule(self.set_audio_pause(True))
 
     def resume_playout(self):
+        self._pcm_paused = False
         _schedule(self.set_audio_pause(False))
 
     if not hasattr(gc, "join_group_call"):
@@ -95,8 +282,8 @@ def _attach_legacy_api(gc):
         gc.change_stream = MethodType(change_stream, gc)
     if not hasattr(gc, "mute_stream"):
         gc.mute_stream = MethodType(mute_stream, gc)
-    if not hasattr(gc, "leave_current_group_call"):
-        gc.leave_current_group_call = MethodType(leave_current_group_call, gc)
+    if not hasattr(gc, "set_volume"):
+        gc.set_volume = MethodType(set_volume, gc)
     if not hasattr(gc, "stop_playout"):
         gc.stop_playout = MethodType(stop_playout, gc)
     if not hasattr(gc, "pause_playout"):
@@ -106,31 +293,330 @@ def _attach_legacy_api(gc):
 
 
 class CallManager:
-    """Manages one GroupCall per chat for independent multi-group playback."""
-
-    def __init__(self):
-        self._calls: dict[int, object] = {}  # chat_id -> GroupCall
-        self._factory = GroupCallFactory(
-            assistant,
-            mtproto_backend=GroupCallFactory.MTPROTO_CLIENT_TYPE.PYROGRAM,
-        )
-
-    def _get_or_create(self, chat_id: int):
-        """Get existing call for chat, or create a new one."""
-        if chat_id not in self._calls:
-            gc = self._factory.get_group_call()
-            _attach_legacy_api(gc)
-            self._calls[chat_id] = gc
-            logger.info("Created new GroupCall for chat %s", chat_id)
-        return self._calls[chat_id]
+    """Manages one GroupCall per chat, spread over the assistant pool."""
+
+    def __init__(self, clients=None):
+        # The shared pool grows in start_assistants(), so keep a reference, not a copy.
+        self._clients = list(clients) if clients is not None else assistants
+        self._factories: dict[int, object] = {}  # assistant index -> GroupCallFactory
+        self._calls: OrderedDict[int, object] = OrderedDict()  # chat_id -> GroupCall, LRU first
+        self._states: dict[int, str] = {}
+        self._touched: dict[int, float] = {}
+        self._admission: deque = deque()  # futures waiting for a free call slot
+        self.admitted_after_wait = 0
+        self.rejected = 0
+        self.evicted = 0
+        self._placement: dict[int, int] = {}  # chat_id -> assistant index (sticky)
+        self._load: Counter = Counter()  # assistant index -> live GroupCalls
+        self._flood_until: dict[int, float] = {}
+        self._down: set[int] = set()
+        self._floods: Counter = Counter()
+        self._moved_off: Counter = Counter()
+        self._migrate_handlers: list = []
+        self._health_task = None
+        self._end_handlers: list = []
+        self._last_end: dict[int, float] = {}
+        self.end_events = 0
+        self.end_debounced = 0
+
+    # ── Assistant placement ──
+
+    def _factory_for(self, index: int):
+        factory = self._factories.get(index)
+        if factory is None:
+            factory = GroupCallFactory(
+                self._clients[index],
+                mtproto_backend=GroupCallFactory.MTPROTO_CLIENT_TYPE.PYROGRAM,
+            )
+            self._factories[index] = factory
+        return factory
+
+    def _available(self, index: int) -> bool:
+        if index in self._down or self._flood_until.get(index, 0.0) > time.monotonic():
+            return False
+        return bool(getattr(self._clients[index], "is_connected", True))
+
+    def _place(self, chat_id: int) -> int:
+        """Sticky placement; re-place on the least-loaded healthy assistant if needed."""
+        current = self._placement.get(chat_id)
+        if current is not None and self._available(current):
+            return current
+        healthy = [i for i in range(len(self._clients)) if self._available(i)]
+        if not healthy:
+            # Nothing healthy: stay put rather than thrash.
+            index = current if current is not None else 0
+        else:
+            index = min(healthy, key=lambda i: (self._load[i], i))
+        self._placement[chat_id] = index
+        return index
+
+    def assistant_for(self, chat_id: int):
+        """The userbot that serves (or will serve) this chat's voice chat."""
+        if chat_id in self._calls:
+            return self._clients[self._placement[chat_id]]
+        return self._clients[self._place(chat_id)]
+
+    def on_migrate(self, handler):
+        """Register `async handler(chat_id)` to restart playback after a chat changes assistant."""
+        self._migrate_handlers.append(handler)
+        return handler
+
+    def _detach(self, chat_id: int) -> int | None:
+        """Forget a chat's call and placement; the old call is left in the background."""
+        gc = self._calls.get(chat_id)
+        self.remove(chat_id)
+        index = self._placement.pop(chat_id, None)
+        if gc is not None:
+            try:
+                asyncio.get_running_loop().create_task(gc.leave_current_group_call())
+            except Exception:
+                pass
+        if index is not None:
+            self._moved_off[index] += 1
+        return index
+
+    def report_error(self, chat_id: int, err: Exception) -> bool:
+        """
+        Feed a join/playback error back into placement. Returns True when the
+        chat was moved and a retry on another assistant makes sense.
+        """
+        index = self._placement.get(chat_id)
+        if index is None or len(self._clients) < 2:
+            return False
+        if type(err).__name__ == "FloodWait":
+            wait = float(getattr(err, "value", 0) or 0)
+            self._flood_until[index] = time.monotonic() + wait
+            self._floods[index] += 1
+            logger.warning("Assistant #%d hit FloodWait %.0fs; moving chat %s", index, wait, chat_id)
+        elif not getattr(self._clients[index], "is_connected", True):
+            self._down.add(index)
+            logger.warning("Assistant #%d is disconnected; moving chat %s", index, chat_id)
+        else:
+            return False
+        self._detach(chat_id)
+        return any(self._available(i) for i in range(len(self._clients)))
+
+    def _evacuate(self, index: int):
+        """Move every chat off a failed assistant and ask handlers to resume them."""
+        chats = [cid for cid in self._calls if self._placement.get(cid) == index]
+        for chat_id in chats:
+            self._detach(chat_id)
+        if not chats or not self._migrate_handlers:
+            return
+        loop = asyncio.get_running_loop()
+        for chat_id in chats:
+            for handler in self._migrate_handlers:
+                loop.create_task(handler(chat_id))
+        logger.warning("Moved %d chats off assistant #%d", len(chats), index)
+
+    async def _health_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(_HEALTH_INTERVAL)
+                self._evict_idle(max_age=CALL_IDLE_EVICT)
+                for index, client in enumerate(self._clients):
+                    connected = bool(getattr(client, "is_connected", True))
+                    if not connected and index not in self._down:
+                        self._down.add(index)
+                        logger.error("Assistant #%d lost its connection", index)
+                        self._evacuate(index)
+                    elif connected and index in self._down:
+                        self._down.discard(index)
+                        logger.info("Assistant #%d is back in rotation", index)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Assistant health check error: %s", e)
+
+    def start_health_monitor(self):
+        """Periodic assistant health checks and idle-call eviction."""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    def stop_health_monitor(self):
+        if self._health_task and not self._health_task.done():
+            self._health_task.cancel()
+        self._health_task = None
+
+    def assistant_stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "index": index,
+                "name": getattr(client, "name", f"#{index}"),
+                "load": self._load[index],
+                "placed": sum(1 for i in self._placement.values() if i == index),
+                "healthy": self._available(index),
+                "flood_wait": max(0.0, self._flood_until.get(index, 0.0) - now),
+                "floods": self._floods[index],
+                "moved_off": self._moved_off[index],
+            }
+            for index, client in enumerate(self._clients)
+        ]
+
+    def on_stream_end(self, handler):
+        """Register `async handler(chat_id, ended_at)` for tracks that play out to the end."""
+        self._end_handlers.append(handler)
+        return handler
+
+    def notify_stream_end(self, chat_id: int):
+        """Dispatch an end-of-stream event, dropping duplicates for the same track."""
+        now = time.monotonic()
+        if now - self._last_end.get(chat_id, 0.0) < _END_DEBOUNCE:
+            self.end_debounced += 1
+            return
+        self._last_end[chat_id] = now
+        self.end_events += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for handler in self._end_handlers:
+            loop.create_task(handler(chat_id, now))
+
+    def _bind_playout_events(self, gc, chat_id: int):
+        async def _ended(_gc, *_args):
+            self.notify_stream_end(chat_id)
+
+        # Event names differ between PyTgCalls GroupCall variants.
+        for name in ("on_audio_playout_ended", "on_video_playout_ended", "on_playout_ended"):
+            register = getattr(gc, name, None)
+            if not callable(register):
+                continue
+            try:
+                register(_ended)
+            except Exception as e:
+                logger.debug("Could not bind %s for chat %s: %s", name, chat_id, e)
+
+    # ── Lifecycle ──
+
+    def _create(self, chat_id: int):
+        index = self._place(chat_id)
+        gc = self._factory_for(index).get_group_call()
+        _attach_legacy_api(gc)
+        self._bind_playout_events(gc, chat_id)
+        self._calls[chat_id] = gc
+        self._states[chat_id] = CALL_IDLE
+        self._touched[chat_id] = time.monotonic()
+        self._load[index] += 1
+        logger.info("Created new GroupCall for chat %s on assistant #%d", chat_id, index)
+        return gc
+
+    def _evict_idle(self, max_age: float = 0.0, limit: int = 0) -> int:
+        """Drop least-recently-used calls that never joined. Returns how many went."""
+        cutoff = time.monotonic() - max_age
+        victims = []
+        for chat_id in self._calls:  # LRU order
+            if self._states.get(chat_id) == CALL_IDLE and self._touched.get(chat_id, 0.0) <= cutoff:
+                victims.append(chat_id)
+                if limit and len(victims) >= limit:
+                    break
+        for chat_id in victims:
+            gc = self._calls.get(chat_id)
+            self.remove(chat_id)
+            if gc is not None and getattr(gc, "is_connected", False):
+                asyncio.get_running_loop().create_task(gc.leave_current_group_call())
+        self.evicted += len(victims)
+        return len(victims)
+
+    def _wake_admission(self):
+        while self._admission:
+            waiter = self._admission.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def acquire(self, chat_id: int):
+        """
+        Get or allocate the chat's GroupCall, for play paths only. When all
+        slots are taken, evicts an idle call or waits in FIFO order for one.
+        """
+        gc = self._calls.get(chat_id)
+        if gc is not None:
+            self.touch(chat_id)
+            return gc
+
+        deadline = time.monotonic() + CALL_ADMISSION_TIMEOUT
+        waited = False
+        while len(self._calls) >= MAX_GROUP_CALLS and not self._evict_idle(limit=1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise RuntimeError("All voice chat slots are busy right now. Try again shortly.")
+            waited = True
+            waiter = asyncio.get_running_loop().create_future()
+            self._admission.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if waiter in self._admission:
+                    self._admission.remove(waiter)
+            if chat_id in self._calls:
+                # A concurrent play for the same chat got in first.
+                return self._calls[chat_id]
+        if waited:
+            self.admitted_after_wait += 1
+        return self._create(chat_id)
 
     def get(self, chat_id: int):
-        """Get the GroupCall for a specific chat."""
-        return self._get_or_create(chat_id)
+        """The chat's existing GroupCall, or None. Never allocates."""
+        return self._calls.get(chat_id)
+
+    def touch(self, chat_id: int):
+        if chat_id in self._calls:
+            self._calls.move_to_end(chat_id)
+            self._touched[chat_id] = time.monotonic()
+
+    def set_state(self, chat_id: int, state: str):
+        if chat_id in self._calls:
+            self._states[chat_id] = state
+            self.touch(chat_id)
+
+    def state(self, chat_id: int) -> str | None:
+        return self._states.get(chat_id)
+
+    def active_chats(self) -> list[int]:
+        """Chats with a stream loaded (playing or paused)."""
+        return [chat_id for chat_id, state in self._states.items() if state in (CALL_PLAYING, CALL_PAUSED)]
+
+    async def leave(self, chat_id: int):
+        """Stop playout, leave the voice chat and free the slot."""
+        gc = self._calls.get(chat_id)
+        if gc is None:
+            return
+        self._states[chat_id] = CALL_LEAVING
+        try:
+            gc.stop_playout()
+            await gc.leave_current_group_call()
+        except Exception as e:
+            logger.debug("Leave failed in %s: %s", chat_id, e)
+        finally:
+            self.remove(chat_id)
 
     def remove(self, chat_id: int):
         """Remove a chat's call instance (after leaving)."""
-        self._calls.pop(chat_id, None)
+        if self._calls.pop(chat_id, None) is not None:
+            index = self._placement.get(chat_id)
+            if index is not None and self._load[index] > 0:
+                self._load[index] -= 1
+            self._wake_admission()
+        self._states.pop(chat_id, None)
+        self._touched.pop(chat_id, None)
+        self._last_end.pop(chat_id, None)
+
+    def lifecycle_stats(self) -> dict:
+        counts = Counter(self._states.values())
+        return {
+            "live": len(self._calls),
+            "cap": MAX_GROUP_CALLS,
+            "waiting": sum(1 for w in self._admission if not w.done()),
+            **{state: counts[state] for state in (CALL_IDLE, CALL_JOINING, CALL_PLAYING, CALL_PAUSED, CALL_LEAVING)},
+            "admitted_after_wait": self.admitted_after_wait,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+        }
 
     def is_connected(self, chat_id: int) -> bool:
         """Check if we're connected to a chat's voice chat."""
@@ -140,3 +626,4 @@ class CallManager:
 
 # Global singleton
 call_manager = CallManager()
+set_stream_end_handler(call_manager.notify_stream_end)
@@ -63,6 +63,7 @@ async def root_stats(client: Client, message: Message):
     from utils.queue import active_queue_count
     from core.voice_cleanup import _activity
     from utils.resource_guard import get_resource_stats
+    from core.call import call_manager
 
     users = await get_total_users()
     groups = await get_total_groups()
@@ -70,6 +71,13 @@ async def root_stats(client: Client, message: Message):
     active_vcs = len(_activity)
     active_queues = active_queue_count()
     res = get_resource_stats()
+    pool = call_manager.assistant_stats()
+    pool_lines = "\n".join(
+        f"{'└' if i == len(pool) - 1 else '├'} #{a['index']}: `{a['load']}` VCs, `{a['placed']}` chats "
+        + ("✅" if a["healthy"] else f"⚠️ flood `{a['flood_wait']:.0f}s`" if a["flood_wait"] else "❌ down")
+        + (f" (floods `{a['floods']}`, moved off `{a['moved_off']}`)" if a["floods"] or a["moved_off"] else "")
+        for i, a in enumerate(pool)
+    )
 
     await message.reply_text(
         "📊 **Global Stats**\n"
@@ -80,6 +88,9 @@ async def root_stats(client: Client, message: Message):
         f"🎙️ Active VCs: `{active_vcs}`\n"
         f"📋 Active queues: `{active_queues}`\n"
         "━━━━━━━━━━━━━━━━━━\n"
+        f"🤖 **Assistants** (`{len(pool)}`)\n"
+        f"{pool_lines}\n"
+        "━━━━━━━━━━━━━━━━━━\n"
         f"⚡ CPU: `{res.get('cpu', 0)}%`\n"
         f"🧠 RAM: `{res.get('ram_percent', 0)}%` "
         f"({res.get('ram_used_mb', 0)} MB / {res.get('ram_total_mb', 0)} MB)",
@@ -0,0 +1,52 @@
+"""
+Auralyx Music — Shutdown
+Stops background services, leaves every voice chat and closes shared
+resources in order. Used by the main exit path and by both restart paths.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def shutdown_services():
+    """Everything except the bot client itself, which callers stop last."""
+    from core.assistant import stop_assistants
+    from core.call import call_manager
+    from core.voice_cleanup import stop_cleanup
+    from utils.audio_cache import audio_cache
+    from utils.extractor import extraction_pool
+    from utils.http import http_client
+    from utils.loudness import loudness
+    from utils.panel import panel_updater
+    from utils.queue_journal import stop_queue_journal
+    from utils.stream import cleanup_all
+    from utils.transition import transition_engine
+    from utils.url_refresh import stop_url_refresh
+
+    # Stop background tasks
+    stop_cleanup()
+    stop_url_refresh()
+    await panel_updater.stop()
+    await loudness.stop()
+    call_manager.stop_health_monitor()
+    await stop_queue_journal()  # persist queues so they resume on the next start
+
+    # Disconnect all active VCs
+    for cid in list(call_manager._calls):
+        try:
+            gc = call_manager._calls[cid]
+            gc.stop_playout()
+            await gc.leave_current_group_call()
+        except Exception:
+            pass
+        call_manager.remove(cid)
+
+    await transition_engine.shutdown()
+    await cleanup_all()
+    await extraction_pool.stop()
+    await audio_cache.shutdown()
+    await http_client.close()
+
+    await stop_assistants()
+    logger.info("Services stopped.")
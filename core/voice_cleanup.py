@@ -33,7 +33,8 @@ def remove_chat(chat_id: int):
 async def _cleanup_loop(bot_client):
     """Background loop: check for inactive VCs every CHECK_INTERVAL seconds."""
     from core.call import call_manager
-    from utils.queue import clear_queue, get_queue
+    from utils.playback import clear_clock
+    from utils.queue import clear_queue, queue_size
     from utils.stream import kill_stream
     import random
     
@@ -52,21 +53,16 @@ async def _cleanup_loop(bot_client):
             for chat_id in stale_chats:
                 try:
                     # Don't leave if there are still tracks in the queue
-                    if get_queue(chat_id):
+                    if queue_size(chat_id):
                         record_activity(chat_id)  # Refresh — music is still active
                         continue
 
                     logger.info("Auto-cleaning inactive VC in chat %s", chat_id)
-                    gc = call_manager.get(chat_id)
-                    try:
-                        gc.stop_playout()
-                        await gc.leave_current_group_call()
-                    except Exception:
-                        pass
+                    await call_manager.leave(chat_id)
                     await kill_stream(chat_id)
+                    clear_clock(chat_id)
                     clear_queue(chat_id)
                     remove_chat(chat_id)
-                    call_manager.remove(chat_id)
                 except Exception as e:
                     logger.error("Cleanup error for chat %s: %s", chat_id, e)
 
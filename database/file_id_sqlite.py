@@ -0,0 +1,76 @@
+"""SQLite-backed map of media sources (URL or file hash) to Telegram file_ids."""
+
+import asyncio
+import os
+import sqlite3
+import time
+
+_DB_PATH = os.path.join(os.path.dirname(__file__), "file_ids.db")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _init_sync():
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_ids (
+                ref_key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                updated_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_file_ids_updated ON file_ids (updated_at)")
+        conn.commit()
+
+
+async def init_db():
+    await asyncio.to_thread(_init_sync)
+
+
+def _load_sync(limit: int) -> dict[str, str]:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT ref_key, file_id FROM file_ids ORDER BY updated_at DESC LIMIT ?",
+            (int(limit),),
+        ).fetchall()
+    return {row["ref_key"]: row["file_id"] for row in rows}
+
+
+async def load_file_ids(limit: int) -> dict[str, str]:
+    """Most recently used references, newest first."""
+    return await asyncio.to_thread(_load_sync, limit)
+
+
+def _put_sync(ref_key: str, file_id: str) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO file_ids (ref_key, file_id, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(ref_key) DO UPDATE SET
+                file_id = excluded.file_id,
+                updated_at = excluded.updated_at
+            """,
+            (ref_key, file_id, int(time.time())),
+        )
+        conn.commit()
+
+
+async def put_file_id(ref_key: str, file_id: str) -> None:
+    await asyncio.to_thread(_put_sync, ref_key, file_id)
+
+
+def _delete_sync(ref_key: str) -> None:
+    with _connect() as conn:
+        conn.execute("DELETE FROM file_ids WHERE ref_key = ?", (ref_key,))
+        conn.commit()
+
+
+async def delete_file_id(ref_key: str) -> None:
+    await asyncio.to_thread(_delete_sync, ref_key)
@@ -0,0 +1,67 @@
+"""SQLite-backed cache of measured track loudness (EBU R128) by source key."""
+
+import asyncio
+import os
+import sqlite3
+import time
+
+_DB_PATH = os.path.join(os.path.dirname(__file__), "loudness.db")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _init_sync():
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS loudness (
+                source_key TEXT PRIMARY KEY,
+                integrated REAL NOT NULL,
+                true_peak REAL NOT NULL,
+                analyzed_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.commit()
+
+
+async def init_db():
+    await asyncio.to_thread(_init_sync)
+
+
+def _load_sync(limit: int) -> dict[str, tuple[float, float]]:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT source_key, integrated, true_peak FROM loudness ORDER BY analyzed_at DESC LIMIT ?",
+            (int(limit),),
+        ).fetchall()
+    return {row["source_key"]: (row["integrated"], row["true_peak"]) for row in rows}
+
+
+async def load_loudness(limit: int) -> dict[str, tuple[float, float]]:
+    """source_key -> (integrated LUFS, true peak dBTP), newest first."""
+    return await asyncio.to_thread(_load_sync, limit)
+
+
+def _put_sync(source_key: str, integrated: float, true_peak: float) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO loudness (source_key, integrated, true_peak, analyzed_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(source_key) DO UPDATE SET
+                integrated = excluded.integrated,
+                true_peak = excluded.true_peak,
+                analyzed_at = excluded.analyzed_at
+            """,
+            (source_key, float(integrated), float(true_peak), int(time.time())),
+        )
+        conn.commit()
+
+
+async def put_loudness(source_key: str, integrated: float, true_peak: float) -> None:
+    await asyncio.to_thread(_put_sync, source_key, integrated, true_peak)
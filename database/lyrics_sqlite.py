@@ -0,0 +1,78 @@
+"""SQLite-backed cache of lyrics lookups (including misses) by normalized title."""
+
+import asyncio
+import os
+import sqlite3
+import time
+from typing import Optional
+
+_DB_PATH = os.path.join(os.path.dirname(__file__), "lyrics.db")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _init_sync():
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lyrics (
+                title_key TEXT PRIMARY KEY,
+                title TEXT NOT NULL DEFAULT '',
+                author TEXT NOT NULL DEFAULT '',
+                lyrics TEXT NOT NULL DEFAULT '',
+                expires_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lyrics_expires ON lyrics (expires_at)")
+        conn.commit()
+
+
+async def init_db():
+    await asyncio.to_thread(_init_sync)
+
+
+def _get_lyrics_sync(title_key: str) -> Optional[dict]:
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT title, author, lyrics FROM lyrics WHERE title_key = ? AND expires_at > ?",
+            (title_key, int(time.time())),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+async def get_lyrics(title_key: str) -> Optional[dict]:
+    """Cached entry, or None if unknown/expired. An empty `lyrics` field is a cached miss."""
+    return await asyncio.to_thread(_get_lyrics_sync, title_key)
+
+
+def _put_lyrics_sync(title_key: str, entry: dict, ttl: int) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO lyrics (title_key, title, author, lyrics, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(title_key) DO UPDATE SET
+                title = excluded.title,
+                author = excluded.author,
+                lyrics = excluded.lyrics,
+                expires_at = excluded.expires_at
+            """,
+            (
+                title_key,
+                entry.get("title", ""),
+                entry.get("author", ""),
+                entry.get("lyrics", ""),
+                int(time.time()) + int(ttl),
+            ),
+        )
+        conn.execute("DELETE FROM lyrics WHERE expires_at <= ?", (int(time.time()),))
+        conn.commit()
+
+
+async def put_lyrics(title_key: str, entry: dict, ttl: int) -> None:
+    await asyncio.to_thread(_put_lyrics_sync, title_key, entry, ttl)
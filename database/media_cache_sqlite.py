@@ -0,0 +1,94 @@
+"""SQLite-backed persistent store for extracted media metadata."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+_DB_PATH = os.path.join(os.path.dirname(__file__), "media_cache.db")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _init_sync():
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS media_meta (
+                cache_key TEXT PRIMARY KEY,
+                fields TEXT NOT NULL DEFAULT '{}',
+                expires_at INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_media_meta_expires ON media_meta (expires_at)")
+        conn.commit()
+
+
+async def init_db():
+    await asyncio.to_thread(_init_sync)
+
+
+def _get_entry_sync(cache_key: str) -> Optional[dict]:
+    now = int(time.time())
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT fields FROM media_meta WHERE cache_key = ? AND expires_at > ?",
+            (cache_key, now),
+        ).fetchone()
+        if not row:
+            return None
+        try:
+            parsed = json.loads(row["fields"] or "{}")
+        except Exception:
+            return None
+        # Stored as {field: [value, expires_at]}.
+        return {k: (v[0], float(v[1])) for k, v in parsed.items() if isinstance(v, list) and len(v) == 2}
+
+
+async def get_entry(cache_key: str) -> Optional[dict]:
+    return await asyncio.to_thread(_get_entry_sync, cache_key)
+
+
+def _put_entry_sync(cache_key: str, fields: dict) -> None:
+    if not fields:
+        return
+    now = int(time.time())
+    expires_at = int(max(exp for _, exp in fields.values()))
+    payload = json.dumps({k: [v, exp] for k, (v, exp) in fields.items()})
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO media_meta (cache_key, fields, expires_at, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                fields = excluded.fields,
+                expires_at = excluded.expires_at,
+                updated_at = excluded.updated_at
+            """,
+            (cache_key, payload, expires_at, now),
+        )
+        conn.commit()
+
+
+async def put_entry(cache_key: str, fields: dict) -> None:
+    await asyncio.to_thread(_put_entry_sync, cache_key, dict(fields))
+
+
+def _purge_expired_sync() -> int:
+    now = int(time.time())
+    with _connect() as conn:
+        cur = conn.execute("DELETE FROM media_meta WHERE expires_at <= ?", (now,))
+        conn.commit()
+        return cur.rowcount
+
+
+async def purge_expired() -> int:
+    return await asyncio.to_thread(_purge_expired_sync)
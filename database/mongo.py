@@ -643,6 +643,15 @@ def _track_key(title: str, url: str) -> str:
     return base[:200]
 
 
+_play_listeners: list = []
+
+
+def add_play_listener(callback) -> None:
+    """Register a callback(chat_id, track_key, doc) invoked for every recorded play."""
+    if callback not in _play_listeners:
+        _play_listeners.append(callback)
+
+
 async def record_track_play(chat_id: int, track: dict):
     """Persist lightweight play history and aggregate counters."""
     title = track.get("title", "Unknown")
@@ -650,17 +659,25 @@ async def record_track_play(chat_id: int, track: dict):
     requested_by = int(track.get("requested_by", 0) or 0)
     now_ts = int(time.time())
     key = _track_key(title, url)
+    doc = {
+        "chat_id": chat_id,
+        "track_key": key,
+        "title": title[:128],
+        "url": url,
+        "webpage_url": track.get("webpage_url") or "",
+        "duration": int(track.get("duration", 0) or 0),
+        "is_video": bool(track.get("is_video", False)),
+        "requested_by": requested_by,
+        "played_at": now_ts,
+    }
 
-    await music_history_col.insert_one(
-        {
-            "chat_id": chat_id,
-            "track_key": key,
-            "title": title[:128],
-            "url": url,
-            "requested_by": requested_by,
-            "played_at": now_ts,
-        }
-    )
+    for callback in _play_listeners:
+        try:
+            callback(chat_id, key, dict(doc))  # insert_one below adds _id to doc
+        except Exception as e:
+            logger.debug("Play listener failed for chat %s: %s", chat_id, e)
+
+    await music_history_col.insert_one(doc)
 
     await stats_col.update_one(
         {"key": f"chat_track_{chat_id}_{key}"},
@@ -678,6 +695,24 @@ async def get_chat_history(chat_id: int, limit: int = 10) -> list[dict]:
     return [doc async for doc in cursor]
 
 
+async def get_recent_history(limit: int = 50000) -> list[dict]:
+    """Most recent plays across all chats, oldest first (for warming in-memory indexes)."""
+    projection = {
+        "_id": 0,
+        "chat_id": 1,
+        "track_key": 1,
+        "title": 1,
+        "webpage_url": 1,
+        "duration": 1,
+        "is_video": 1,
+        "played_at": 1,
+    }
+    cursor = music_history_col.find({}, projection).sort("_id", -1).limit(limit)
+    docs = [doc async for doc in cursor]
+    docs.reverse()
+    return docs
+
+
 async def get_chat_top_tracks(chat_id: int, limit: int = 10) -> list[dict]:
     """Get top tracks for a chat from aggregated stat documents."""
     prefix = f"chat_track_{chat_id}_"
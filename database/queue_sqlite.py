@@ -0,0 +1,79 @@
+"""SQLite-backed snapshots of per-chat playback queues."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+_DB_PATH = os.path.join(os.path.dirname(__file__), "queues.db")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _init_sync():
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS queue_snapshots (
+                chat_id INTEGER PRIMARY KEY,
+                tracks TEXT NOT NULL DEFAULT '[]',
+                updated_at INTEGER NOT NULL
+            )
+            """
+        )
+        conn.commit()
+
+
+async def init_db():
+    await asyncio.to_thread(_init_sync)
+
+
+def _write_snapshots_sync(snapshots: dict[int, list]) -> None:
+    """Upsert non-empty queues and delete empty ones, in one transaction."""
+    now = int(time.time())
+    with _connect() as conn:
+        for chat_id, tracks in snapshots.items():
+            if tracks:
+                conn.execute(
+                    """
+                    INSERT INTO queue_snapshots (chat_id, tracks, updated_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(chat_id) DO UPDATE SET
+                        tracks = excluded.tracks,
+                        updated_at = excluded.updated_at
+                    """,
+                    (int(chat_id), json.dumps(tracks, separators=(",", ":")), now),
+                )
+            else:
+                conn.execute("DELETE FROM queue_snapshots WHERE chat_id = ?", (int(chat_id),))
+        conn.commit()
+
+
+async def write_snapshots(snapshots: dict[int, list]) -> None:
+    await asyncio.to_thread(_write_snapshots_sync, snapshots)
+
+
+def _load_snapshots_sync(max_age: int) -> dict[int, list]:
+    cutoff = int(time.time()) - int(max_age)
+    out: dict[int, list] = {}
+    with _connect() as conn:
+        conn.execute("DELETE FROM queue_snapshots WHERE updated_at <= ?", (cutoff,))
+        conn.commit()
+        rows = conn.execute("SELECT chat_id, tracks FROM queue_snapshots").fetchall()
+    for row in rows:
+        try:
+            tracks = json.loads(row["tracks"] or "[]")
+        except Exception:
+            continue
+        if isinstance(tracks, list) and tracks:
+            out[int(row["chat_id"])] = tracks
+    return out
+
+
+async def load_snapshots(max_age: int) -> dict[int, list]:
+    return await asyncio.to_thread(_load_snapshots_sync, max_age)
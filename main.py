@@ -41,8 +41,13 @@ from core.bot import AuralyxBot
 from core.maintenance import load_state as load_maintenance
 from core.sudo_acl import invalidate_cache as invalidate_sudo_cache
 from core.shadowban import load_state as load_shadowbans
-from core.voice_cleanup import start_cleanup, stop_cleanup
+from core.voice_cleanup import start_cleanup
 from database.approval_sqlite import init_db as init_approval_db
+from database.media_cache_sqlite import init_db as init_media_cache_db
+from database.file_id_sqlite import init_db as init_file_id_db
+from database.loudness_sqlite import init_db as init_loudness_db
+from database.lyrics_sqlite import init_db as init_lyrics_db
+from database.queue_sqlite import init_db as init_queue_db
 from database.mongo import (
     acquire_global_instance_lock,
     ensure_indexes,
@@ -50,7 +55,10 @@ from database.mongo import (
     release_global_instance_lock,
     renew_global_instance_lock,
 )
-from utils.stream import cleanup_all as cleanup_streams
+from utils.extractor import extraction_pool
+from utils.file_ids import file_ids
+from utils.http import http_client
+from utils.loudness import loudness
 
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL, logging.INFO),
@@ -121,6 +129,7 @@ async def _periodic_cleanup():
     Background task that periodically cleans stale entries from in-memory
     data structures to prevent unbounded growth.
     """
+    from database.media_cache_sqlite import purge_expired as purge_media_cache
     from utils.cooldown import cooldown
     from utils.decorators import cleanup_rate_limits
 
@@ -130,12 +139,14 @@ async def _periodic_cleanup():
 
             cd_removed = cooldown.cleanup(max_age=3600)
             rl_removed = cleanup_rate_limits(max_age=300)
+            mc_removed = await purge_media_cache()
 
-            if cd_removed or rl_removed:
+            if cd_removed or rl_removed or mc_removed:
                 logger.debug(
-                    "Periodic cleanup: removed %d cooldowns, %d rate limits",
+                    "Periodic cleanup: removed %d cooldowns, %d rate limits, %d media cache rows",
                     cd_removed,
                     rl_removed,
+                    mc_removed,
                 )
         except asyncio.CancelledError:
             break
@@ -196,6 +207,13 @@ async def main():
             sys.exit(1)
 
         await init_approval_db()
+        await init_media_cache_db()
+        await init_queue_db()
+        await init_lyrics_db()
+        await init_file_id_db()
+        await file_ids.load()
+        await init_loudness_db()
+        await loudness.load()
         await invalidate_sudo_cache()
         await load_maintenance()
         await load_shadowbans()
@@ -205,10 +223,19 @@ async def main():
 
     bot = AuralyxBot()
 
-    from core.call import assistant, call_manager
+    # Anything that reaches core.call builds the assistant clients, so it must
+    # be imported here, inside the running loop, not at module level.
+    from core.assistant import start_assistants
+    from core.call import call_manager
+    from core.shutdown import shutdown_services
+    from plugins.music.controls import start_auto_advance
+    from utils.panel import panel_updater
+    from utils.queue_journal import restore_queues, start_queue_journal
+    from utils.recommender import recommender
+    from utils.url_refresh import start_url_refresh
 
-    logger.info("Starting assistant...")
-    await assistant.start()
+    logger.info("Starting assistants...")
+    await start_assistants()
 
     logger.info("Starting bot client...")
     await bot.start()
@@ -225,7 +252,16 @@ async def main():
                 e,
             )
 
+    await http_client.start()
     start_cleanup(bot)
+    start_auto_advance(bot)
+    panel_updater.start(bot)
+    loudness.start()
+    recommender.start()
+    call_manager.start_health_monitor()
+    extraction_pool.start()
+    start_url_refresh()
+    start_queue_journal(bot, resume_chats=await restore_queues())
     _periodic_task = asyncio.create_task(_periodic_cleanup())
     if lock_acquired:
         _lock_heartbeat_task = asyncio.create_task(_global_lock_heartbeat())
@@ -244,23 +280,7 @@ async def main():
         if _lock_heartbeat_task and not _lock_heartbeat_task.done():
             _lock_heartbeat_task.cancel()
 
-        stop_cleanup()
-
-        for cid in list(call_manager._calls):
-            try:
-                gc = call_manager._calls[cid]
-                gc.stop_playout()
-                await gc.leave_current_group_call()
-            except Exception:
-                pass
-            call_manager.remove(cid)
-
-        await cleanup_streams()
-
-        try:
-            await assistant.stop()
-        except Exception:
-            pass
+        await shutdown_services()
         try:
             await bot.stop()
         except Exception:
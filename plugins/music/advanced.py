@@ -3,20 +3,30 @@ Auralyx Music - Music Advanced Controls
 """
 
 import logging
+import time
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
+from core.call import call_manager
 from core.permissions import admin_only
 from database.mongo import get_chat_history, get_chat_top_tracks
 from utils.decorators import error_handler, rate_limit
+from utils.audio_cache import audio_cache
+from utils.loudness import loudness
+from utils.lyrics import lyrics_cache
 from utils.music_settings import fetch_settings, set_setting
+from utils.playback import format_time, get_position, is_paused, start_clock
 from utils.queue import (
+    clear_pending,
     clear_queue,
     current_track,
-    get_queue,
+    move_position,
     remove_position,
     shuffle_queue,
 )
+from utils.stream import kill_stream, start_ffmpeg_stream
+from utils.transition import transition_engine
+from utils.url_refresh import playable_source
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +84,23 @@ async def remove_command(client: Client, message: Message):
     removed = remove_position(message.chat.id, pos)
     if not removed:
         return await message.reply_text("Invalid position. You cannot remove #1 (currently playing).", quote=True)
-    await message.reply_text(f"Removed `{removed.get('title', 'Unknown')[:40]}` from queue.", quote=True)
+    await message.reply_text(f"Removed `{removed.title[:40]}` from queue.", quote=True)
+
+
+@Client.on_message(filters.command("move") & filters.group)
+@error_handler
+async def move_command(client: Client, message: Message):
+    if not await admin_only(client, message):
+        return
+
+    args = message.command[1:]
+    if len(args) < 2 or not args[0].isdigit() or not args[1].isdigit():
+        return await message.reply_text("Usage: `/move <from> <to>`", quote=True)
+
+    moved = move_position(message.chat.id, int(args[0]), int(args[1]))
+    if not moved:
+        return await message.reply_text("Invalid position. #1 (currently playing) cannot be moved.", quote=True)
+    await message.reply_text(f"Moved `{moved.title[:40]}` to #{int(args[1])}.", quote=True)
 
 
 @Client.on_message(filters.command("clear") & filters.group)
@@ -83,14 +109,9 @@ async def clear_command(client: Client, message: Message):
     if not await admin_only(client, message):
         return
 
-    q = get_queue(message.chat.id)
-    if len(q) <= 1:
+    if not clear_pending(message.chat.id):
         return await message.reply_text("No pending tracks to clear.", quote=True)
 
-    from utils.queue import _queues
-    from collections import deque
-
-    _queues[message.chat.id] = deque([q[0]])
     await message.reply_text("Cleared queued tracks. Current song continues.", quote=True)
 
 
@@ -109,8 +130,9 @@ async def replay_command(client: Client, message: Message):
     ok, err = await _start_stream(
         client,
         message.chat.id,
-        track.get("url", ""),
-        is_video=bool(track.get("is_video", False)),
+        playable_source(track),
+        is_video=track.is_video,
+        track=track,
     )
     if not ok:
         return await message.reply_text(f"Failed to replay current track: `{err or 'unknown'}`", quote=True)
@@ -216,17 +238,112 @@ async def toptracks_command(client: Client, message: Message):
     await message.reply_text("\n".join(lines), quote=True)
 
 
-@Client.on_message(filters.command("seek") & filters.group)
+_SEEK_STEP = 10  # default seconds for /forward and /rewind
+
+
+def _parse_seconds(text: str) -> int | None:
+    """Parse `90`, `1:30` or `1:02:03` into seconds."""
+    try:
+        total = 0
+        for part in text.split(":"):
+            total = total * 60 + int(part)
+        return total
+    except ValueError:
+        return None
+
+
+async def _seek_to(client: Client, chat_id: int, target: float) -> tuple[bool, str]:
+    """Restart the decode at `target` seconds and hot-swap it into the running call."""
+    from .controls import _advance_lock
+
+    # Serialized with skips and auto-advance so a seek never lands on the next track.
+    async with _advance_lock(chat_id):
+        return await _seek_locked(client, chat_id, target)
+
+
+async def _seek_locked(client: Client, chat_id: int, target: float) -> tuple[bool, str]:
+    """_seek_to for callers that already hold the chat's advance lock."""
+    from .player import _apply_volume, _resolve_stream_url
+
+    track = current_track(chat_id)
+    if not track:
+        return False, "Nothing is playing."
+    if track.is_video:
+        return False, "Seeking is only available for audio streams."
+    if not call_manager.is_connected(chat_id):
+        return False, "Not connected to a voice chat."
+
+    duration = track.duration
+    if not duration:
+        return False, "Cannot seek in a live stream."
+    target = max(0.0, min(float(target), duration - 1))
+
+    media_url = audio_cache.lookup(track) or await _resolve_stream_url(playable_source(track))
+    if not media_url:
+        return False, "Unable to resolve playable stream URL."
+
+    gc = call_manager.get(chat_id)
+    gain = await loudness.playback_gain(chat_id, track)
+    if transition_engine.active(chat_id):
+        # Swap the mixer's current decode; the call keeps its PCM feed.
+        if not await transition_engine.play(chat_id, track, media_url, gc, offset=target, gain_db=gain):
+            return False, "Decoder could not start at that position."
+        start_clock(chat_id, offset=target)
+        loudness.note_started(track)
+        return True, ""
+
+    # Input-side -ss: FFmpeg jumps to the nearest keyframe before decoding.
+    ring = await start_ffmpeg_stream(chat_id, media_url, offset=target, gain_db=gain)
+    if ring is None:
+        return False, "Decoder could not start at that position."
+
+    try:
+        await gc.change_stream(chat_id, ring)
+    except Exception as e:
+        await kill_stream(chat_id)
+        return False, str(e)
+    start_clock(chat_id, offset=target)
+    loudness.note_started(track)
+    await _apply_volume(chat_id, gc, native=False)  # in case the track had fallen back to native playout
+    return True, ""
+
+
+@Client.on_message(filters.command(["seek", "forward", "rewind"]) & filters.group)
 @error_handler
 async def seek_command(client: Client, message: Message):
     if not await admin_only(client, message):
         return
 
-    await message.reply_text(
-        "Seek is not supported with the current streaming backend. "
-        "It requires FFmpeg restart with time offset.",
-        quote=True,
-    )
+    chat_id = message.chat.id
+    cmd = message.command[0].lower()
+    arg = message.command[1] if len(message.command) > 1 else ""
+
+    if is_paused(chat_id):
+        return await message.reply_text("Resume playback before seeking.", quote=True)
+
+    position = get_position(chat_id) or 0.0
+    if cmd == "seek":
+        if not arg:
+            return await message.reply_text("Usage: `/seek [seconds | mm:ss | +N | -N]`", quote=True)
+        sign = arg[0] if arg[0] in "+-" else ""
+        seconds = _parse_seconds(arg.lstrip("+-"))
+        if seconds is None:
+            return await message.reply_text("Invalid time. Use seconds or `mm:ss`.", quote=True)
+        target = position + seconds if sign == "+" else position - seconds if sign == "-" else seconds
+    else:
+        seconds = _parse_seconds(arg) if arg else _SEEK_STEP
+        if seconds is None:
+            return await message.reply_text(f"Usage: `/{cmd} [seconds]`", quote=True)
+        target = position + seconds if cmd == "forward" else position - seconds
+
+    started = time.monotonic()
+    ok, err = await _seek_to(client, chat_id, target)
+    if not ok:
+        return await message.reply_text(f"Seek failed: `{err}`", quote=True)
+
+    elapsed_ms = (time.monotonic() - started) * 1000
+    logger.info("Seek in %s to %.1fs took %.0f ms", chat_id, target, elapsed_ms)
+    await message.reply_text(f"Seeked to `{format_time(get_position(chat_id) or 0)}`.", quote=True)
 
 
 @Client.on_message(filters.command("lyrics") & filters.group)
@@ -236,7 +353,7 @@ async def lyrics_command(client: Client, message: Message):
     if len(message.command) < 2:
         track = current_track(message.chat.id)
         if track:
-            query = track.get("title", "")
+            query = track.title
         else:
             await message.reply_text("Usage: `/lyrics <song name>`", quote=True)
             return
@@ -250,26 +367,15 @@ async def lyrics_command(client: Client, message: Message):
     msg = await message.reply_text(f"Searching lyrics for **{query}**...", quote=True)
 
     try:
-        import aiohttp
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"https://some-random-api.com/lyrics?title={query}",
-                timeout=aiohttp.ClientTimeout(total=10),
-            ) as resp:
-                if resp.status != 200:
-                    await msg.edit_text("Lyrics not found.")
-                    return
-                data = await resp.json()
-
-        title = data.get("title", query)
-        author = data.get("author", "Unknown")
-        lyrics = data.get("lyrics", "")
-
-        if not lyrics:
+        data = await lyrics_cache.get(query)
+        if not data:
             await msg.edit_text("No lyrics found for that song.")
             return
 
+        title = data.get("title") or query
+        author = data.get("author") or "Unknown"
+        lyrics = data["lyrics"]
+
         if len(lyrics) > 3500:
             lyrics = lyrics[:3500] + "\n\n... _truncated_"
 
@@ -4,67 +4,71 @@ Auralyx Music - Music Controls
 
 import asyncio
 import logging
+import time
+from collections import deque
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-from core.call import call_manager
+from core.call import CALL_PAUSED, CALL_PLAYING, call_manager
 from core.permissions import admin_only, is_admin
 from core.voice_cleanup import record_activity, remove_chat
 from database.mongo import record_track_play
 from utils.decorators import error_handler
+from utils.extractor import related_track
 from utils.music_settings import fetch_settings
+from utils.panel import panel_keyboard, panel_updater, render_panel
+from utils.playback import clear_clock, clock_age, get_position, pause_clock, resume_clock
+from utils.prefetch import prefetcher
 from utils.queue import (
     add_to_queue,
     append_track,
     clear_queue,
     current_track,
-    get_queue,
     pop_queue,
     prepend_track,
+    queue_size,
+    queue_view,
 )
+from utils.recommender import recommender
 from utils.stream import kill_stream
+from utils.track import Track
+from utils.url_refresh import playable_source
 
 logger = logging.getLogger(__name__)
 
 _vote_skips: dict[int, set[int]] = {}
 _idle_tasks: dict[int, asyncio.Task] = {}
+_advance_locks: dict[int, asyncio.Lock] = {}
+_advance_latency: deque[float] = deque(maxlen=256)
+_advance_stats = {"advanced": 0, "failed": 0, "stale": 0}
+_bot_client: Client | None = None
+
+_STALE_END_WINDOW = 2.0  # seconds
 
 
 def _reset_votes(chat_id: int):
     _vote_skips.pop(chat_id, None)
 
 
-async def _extract_autoplay_track(seed_title: str, as_video: bool = False) -> dict | None:
-    """Fetch one related track for autoplay using yt-dlp search."""
-    if not seed_title:
+async def _extract_autoplay_track(chat_id: int, seed: Track) -> Track | None:
+    """Pick the autoplay track from play history, falling back to a yt-dlp related search."""
+    pick = recommender.recommend(chat_id, is_video=seed.is_video)
+    if pick:
+        return Track(
+            title=pick.title,
+            url=pick.source,
+            webpage_url=pick.source,
+            duration=pick.duration,
+            is_video=pick.is_video,
+        )
+    if not seed.title:
         return None
     try:
-        import yt_dlp
-
-        def run_search():
-            opts = {
-                "format": "best[height<=360][vcodec!=none][acodec!=none]/best" if as_video else "bestaudio/best",
-                "quiet": True,
-                "no_warnings": True,
-                "noplaylist": True,
-                "default_search": "ytsearch",
-            }
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(f"ytsearch1:{seed_title} related", download=False)
-                if "entries" in info and info["entries"]:
-                    info = info["entries"][0]
-                return {
-                    "title": info.get("title", "Autoplay"),
-                    "url": info.get("url"),
-                    "duration": int(info.get("duration", 0) or 0),
-                    "requested_by": 0,
-                    "is_video": as_video,
-                }
-
-        return await asyncio.to_thread(run_search)
+        auto = await related_track(seed.title, is_video=seed.is_video)
     except Exception as e:
         logger.warning("Autoplay extraction failed: %s", e)
         return None
+    return Track.from_info(auto) if auto and auto.get("url") else None
 
 
 async def _auto_leave_task(client: Client, chat_id: int):
@@ -72,17 +76,12 @@ async def _auto_leave_task(client: Client, chat_id: int):
     idle_timeout = 600
     try:
         await asyncio.sleep(idle_timeout)
-        if not get_queue(chat_id):
-            gc = call_manager.get(chat_id)
-            try:
-                gc.stop_playout()
-                await gc.leave_current_group_call()
-            except Exception as e:
-                logger.debug("Auto-leave leave_current_group_call failed in %s: %s", chat_id, e)
+        if not queue_size(chat_id):
+            await call_manager.leave(chat_id)
             await kill_stream(chat_id)
+            clear_clock(chat_id)
             clear_queue(chat_id)
             _reset_votes(chat_id)
-            call_manager.remove(chat_id)
             logger.info("Auto-left idle VC in %s", chat_id)
     except asyncio.CancelledError:
         return
@@ -99,8 +98,20 @@ def cancel_idle_timer(chat_id: int):
         task.cancel()
 
 
-async def _do_skip(client: Client, chat_id: int, message: Message):
-    from .player import _safe, _start_stream
+def _advance_lock(chat_id: int) -> asyncio.Lock:
+    lock = _advance_locks.get(chat_id)
+    if lock is None:
+        lock = _advance_locks[chat_id] = asyncio.Lock()
+    return lock
+
+
+async def _advance(client: Client, chat_id: int) -> tuple[dict | None, str]:
+    """
+    Move the queue past the current track, honouring loop modes and autoplay,
+    and start whatever is next. Returns (next_track, error); (None, "") means
+    the queue ran out and the call was left.
+    """
+    from .player import _start_stream
 
     _reset_votes(chat_id)
     settings = await fetch_settings(chat_id)
@@ -114,43 +125,132 @@ async def _do_skip(client: Client, chat_id: int, message: Message):
         append_track(chat_id, current)
 
     # Track-loop replays the same track if queue became empty.
-    if current and loop_mode == "track" and not get_queue(chat_id):
+    if current and loop_mode == "track" and not queue_size(chat_id):
         prepend_track(chat_id, current)
 
     # Autoplay fallback when queue is empty.
-    if current and autoplay and not get_queue(chat_id):
-        auto = await _extract_autoplay_track(current.get("title", ""), as_video=bool(current.get("is_video", False)))
-        if auto and auto.get("url"):
+    if current and autoplay and not queue_size(chat_id):
+        auto = await _extract_autoplay_track(chat_id, current)
+        if auto:
             add_to_queue(chat_id, auto)
 
     next_track = current_track(chat_id)
     if not next_track:
-        gc = call_manager.get(chat_id)
-        try:
-            gc.stop_playout()
-            await gc.leave_current_group_call()
-        except Exception as e:
-            logger.debug("Skip cleanup leave failed in %s: %s", chat_id, e)
+        await call_manager.leave(chat_id)
         await kill_stream(chat_id)
+        clear_clock(chat_id)
         clear_queue(chat_id)
-        call_manager.remove(chat_id)
-        await message.reply_text("Skipped. Queue empty.", quote=True)
         start_idle_timer(client, chat_id)
-        return
+        return None, ""
 
+    # Prefer the URL the look-ahead already resolved; fall back to resolving now.
+    play_url = prefetcher.take(chat_id, next_track) or playable_source(next_track)
     ok, err = await _start_stream(
         client,
         chat_id,
-        next_track.get("url", ""),
-        is_video=bool(next_track.get("is_video", False)),
+        play_url,
+        is_video=next_track.is_video,
+        track=next_track,
     )
     if not ok:
-        return await message.reply_text(f"Failed to load next track: `{err or 'unknown'}`", quote=True)
+        return next_track, err or "unknown"
 
     await record_track_play(chat_id, next_track)
-    await message.reply_text(f"Skipped. Next: `{_safe(next_track.get('title', 'Unknown'))[:40]}`", quote=True)
     cancel_idle_timer(chat_id)
     record_activity(chat_id)
+    return next_track, ""
+
+
+async def _do_skip(client: Client, chat_id: int, message: Message):
+    from .player import _safe
+
+    async with _advance_lock(chat_id):
+        next_track, err = await _advance(client, chat_id)
+    if err:
+        return await message.reply_text(f"Failed to load next track: `{err}`", quote=True)
+    if not next_track:
+        return await message.reply_text("Skipped. Queue empty.", quote=True)
+    await message.reply_text(f"Skipped. Next: `{_safe(next_track.get('title', 'Unknown'))[:40]}`", quote=True)
+
+
+async def _on_stream_end(chat_id: int, ended_at: float):
+    """Auto-advance when the current track plays out, without a command message."""
+    client = _bot_client
+    if client is None:
+        return
+    # An end event right after a start/seek belongs to the stream it replaced.
+    age = clock_age(chat_id)
+    if age is not None and age < _STALE_END_WINDOW:
+        _advance_stats["stale"] += 1
+        return
+
+    async with _advance_lock(chat_id):
+        if not current_track(chat_id):
+            return
+        try:
+            next_track, err = await _advance(client, chat_id)
+        except Exception as e:
+            _advance_stats["failed"] += 1
+            logger.error("Auto-advance failed in %s: %s", chat_id, e)
+            return
+
+    if err:
+        _advance_stats["failed"] += 1
+        logger.warning("Auto-advance could not start next track in %s: %s", chat_id, err)
+        return
+    _advance_stats["advanced"] += 1
+    if next_track:
+        _advance_latency.append(time.monotonic() - ended_at)
+
+
+async def _on_migrate(chat_id: int):
+    """Resume the current track on the chat's new assistant, near where it stopped."""
+    from .advanced import _seek_locked
+    from .player import _start_stream
+
+    client = _bot_client
+    track = current_track(chat_id)
+    if client is None or not track:
+        return
+    position = get_position(chat_id) or 0.0
+
+    async with _advance_lock(chat_id):
+        ok, err = await _start_stream(
+            client,
+            chat_id,
+            playable_source(track),
+            is_video=track.is_video,
+            track=track,
+        )
+        if ok and position > _STALE_END_WINDOW and not track.is_video and track.duration:
+            await _seek_locked(client, chat_id, position)
+    if not ok:
+        logger.warning("Could not resume chat %s after assistant move: %s", chat_id, err)
+
+
+def start_auto_advance(client: Client):
+    """Hook end-of-stream and assistant-move events to playback. Call once at startup."""
+    global _bot_client
+    if _bot_client is None:
+        call_manager.on_stream_end(_on_stream_end)
+        call_manager.on_migrate(_on_migrate)
+    _bot_client = client
+    logger.info("Auto-advance on stream end enabled.")
+
+
+def get_advance_stats() -> dict:
+    lat = sorted(_advance_latency)
+
+    def pct(p: float) -> float:
+        return lat[min(len(lat) - 1, int(len(lat) * p))] if lat else 0.0
+
+    return {
+        **_advance_stats,
+        "events": call_manager.end_events,
+        "debounced": call_manager.end_debounced,
+        "p50_ms": pct(0.50) * 1000,
+        "p95_ms": pct(0.95) * 1000,
+    }
 
 
 @Client.on_message(filters.command("skip") & filters.group)
@@ -188,16 +288,10 @@ async def stop_command(client: Client, message: Message):
     _reset_votes(chat_id)
     cancel_idle_timer(chat_id)
     await kill_stream(chat_id)
+    clear_clock(chat_id)
     remove_chat(chat_id)
 
-    gc = call_manager.get(chat_id)
-    try:
-        gc.stop_playout()
-        await gc.leave_current_group_call()
-    except Exception as e:
-        logger.debug("Stop leave failed in %s: %s", chat_id, e)
-
-    call_manager.remove(chat_id)
+    await call_manager.leave(chat_id)
     await message.reply_text("Stopped and cleared.", quote=True)
 
 
@@ -208,8 +302,13 @@ async def pause_command(client: Client, message: Message):
         return
 
     gc = call_manager.get(message.chat.id)
+    if gc is None:
+        return await message.reply_text("Nothing is playing right now.", quote=True)
     try:
         gc.pause_playout()
+        pause_clock(message.chat.id)
+        call_manager.set_state(message.chat.id, CALL_PAUSED)
+        panel_updater.poke(message.chat.id)
     except Exception as e:
         logger.debug("Pause failed in %s: %s", message.chat.id, e)
     await message.reply_text("Paused.", quote=True)
@@ -222,8 +321,13 @@ async def resume_command(client: Client, message: Message):
         return
 
     gc = call_manager.get(message.chat.id)
+    if gc is None:
+        return await message.reply_text("Nothing is playing right now.", quote=True)
     try:
         gc.resume_playout()
+        resume_clock(message.chat.id)
+        call_manager.set_state(message.chat.id, CALL_PLAYING)
+        panel_updater.poke(message.chat.id)
     except Exception as e:
         logger.debug("Resume failed in %s: %s", message.chat.id, e)
     await message.reply_text("Resumed.", quote=True)
@@ -232,35 +336,26 @@ async def resume_command(client: Client, message: Message):
 @Client.on_message(filters.command(["nowplaying", "current"]) & filters.group)
 @error_handler
 async def nowplaying_command(client: Client, message: Message):
-    track = current_track(message.chat.id)
-    if not track:
+    text = render_panel(message.chat.id)
+    if not text:
         return await message.reply_text("Nothing is playing right now.", quote=True)
 
-    title = track.get("title", "Unknown")[:40]
-    duration = track.get("duration", 0)
-    dur_str = f"{duration // 60:02d}:{duration % 60:02d}" if duration else "Live"
-
-    await message.reply_text(
-        f"**NOW PLAYING**\n"
-        f"`---------------------------`\n"
-        f"Track: `{title}`\n"
-        f"Duration: `{dur_str}`\n"
-        f"`---------------------------`",
-        quote=True,
-    )
+    sent = await message.reply_text(text, quote=True, reply_markup=panel_keyboard(message.chat.id))
+    # The newest panel is the one kept live; older ones stay as sent.
+    panel_updater.register(message.chat.id, sent, text)
 
 
 @Client.on_message(filters.command("queue") & filters.group)
 @error_handler
 async def queue_command(client: Client, message: Message):
-    queue = get_queue(message.chat.id)
+    queue = queue_view(message.chat.id)
     if not queue:
         return await message.reply_text("Queue is empty.", quote=True)
 
     text = "**PLAYBACK QUEUE**\n`---------------------------`\n"
     for i, track in enumerate(queue[:10]):
         prefix = "NOW" if i == 0 else f"{i + 1}."
-        text += f"{prefix} `{track['title'][:35]}`\n"
+        text += f"{prefix} `{track.title[:35]}`\n"
     if len(queue) > 10:
         text += f"\n+{len(queue)-10} more queued"
     text += "\n`---------------------------`"
@@ -273,7 +368,7 @@ async def queue_command(client: Client, message: Message):
     await message.reply_text(text, quote=True, reply_markup=InlineKeyboardMarkup(buttons))
 
 
-@Client.on_callback_query(filters.regex("^(pause|next|stop|queue)$"))
+@Client.on_callback_query(filters.regex("^(pause|resume|next|stop|queue)$"))
 async def cb_handler(client: Client, callback: CallbackQuery):
     chat_id = callback.message.chat.id
     if not await is_admin(client, chat_id, callback.from_user.id):
@@ -283,11 +378,27 @@ async def cb_handler(client: Client, callback: CallbackQuery):
     gc = call_manager.get(chat_id)
 
     if data == "pause":
+        if gc is None:
+            return await callback.answer("Nothing is playing.")
         try:
             gc.pause_playout()
+            pause_clock(chat_id)
+            call_manager.set_state(chat_id, CALL_PAUSED)
+            panel_updater.poke(chat_id)
             await callback.answer("Paused")
         except Exception:
             await callback.answer("Error")
+    elif data == "resume":
+        if gc is None:
+            return await callback.answer("Nothing is playing.")
+        try:
+            gc.resume_playout()
+            resume_clock(chat_id)
+            call_manager.set_state(chat_id, CALL_PLAYING)
+            panel_updater.poke(chat_id)
+            await callback.answer("Resumed")
+        except Exception:
+            await callback.answer("Error")
     elif data == "next":
         await _do_skip(client, chat_id, callback.message)
         await callback.answer("Skipped")
@@ -296,13 +407,9 @@ async def cb_handler(client: Client, callback: CallbackQuery):
         _reset_votes(chat_id)
         cancel_idle_timer(chat_id)
         await kill_stream(chat_id)
+        clear_clock(chat_id)
         remove_chat(chat_id)
-        try:
-            gc.stop_playout()
-            await gc.leave_current_group_call()
-        except Exception:
-            pass
-        call_manager.remove(chat_id)
+        await call_manager.leave(chat_id)
         await callback.answer("Stopped")
         try:
             await callback.message.delete()
@@ -5,6 +5,7 @@ Auralyx Music - Music Player
 import asyncio
 import logging
 import time
+from collections import OrderedDict
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
@@ -12,15 +13,31 @@ from config import MAX_DURATION, SUDO_USERS
 from core.permissions import is_admin
 from core.voice_cleanup import record_activity
 from database.mongo import get_dynamic_config, increment_stat, record_track_play
+from utils.audio_cache import audio_cache
 from utils.decorators import error_handler, rate_limit
+from utils.extractor import PRIORITY_INTERACTIVE, ExtractionBusy, extract_track, resolve_url
+from utils.file_ids import file_ids
+from utils.loudness import loudness
+from utils.media_cache import FIELD_TTLS, make_key, meta_cache
 from utils.music_settings import fetch_settings
-from utils.queue import add_to_queue, get_queue, has_duplicate, queue_size
+from utils.panel import panel_keyboard, panel_updater, render_panel
+from utils.playback import start_clock
+from utils.quality import quality_governor
+from utils.queue import add_to_queue, has_duplicate, queue_size
+from utils.search_cache import SearchResults, search_cache
+from utils.singleflight import extract_flight, resolve_flight
+from utils.stream import kill_stream, start_ffmpeg_stream
+from utils.track import Track
+from utils.transition import transition_engine
+from utils.url_refresh import playable_source, url_ttl
 
 logger = logging.getLogger(__name__)
 _play_dedupe: dict[tuple[int, int], float] = {}
-_search_cache: dict[tuple[int, int], tuple[float, list[dict]]] = {}
-_extract_cache: dict[tuple[str, bool], tuple[float, dict]] = {}
-_stream_resolve_cache: dict[tuple[str, bool], tuple[float, str]] = {}
+# (chat_id, user_id) -> (shared result set, selected_at); LRU-bounded
+_search_sessions: OrderedDict[tuple[int, int], tuple[SearchResults, float]] = OrderedDict()
+_SEARCH_PAGE = 5
+_SEARCH_SESSION_TTL = 180
+_MAX_SEARCH_SESSIONS = 1000
 
 
 def _is_duplicate_play(chat_id: int, message_id: int, ttl: int = 30) -> bool:
@@ -37,71 +54,53 @@ def _is_duplicate_play(chat_id: int, message_id: int, ttl: int = 30) -> bool:
     return False
 
 
+def _url_ttls(url: str) -> dict:
+    """The signed URL and the format it was resolved with expire together."""
+    ttl = url_ttl(url, FIELD_TTLS["url"])
+    return {"url": ttl, "format": ttl}
+
+
+def _info_from_cache(cached: dict, query: str, video: bool) -> dict:
+    webpage_url = cached.get("webpage_url") or query
+    url = cached.get("url")
+    if cached.get("format") != quality_governor.format(video):
+        # Resolved at another quality rung; don't let it bypass the ladder.
+        url = None
+    return {
+        "title": cached.get("title", "Unknown"),
+        # Expired or off-rung signed URLs fall back to the page URL, resolved at stream start.
+        "url": url or webpage_url,
+        "webpage_url": webpage_url,
+        "duration": cached.get("duration", 0),
+        "thumbnail": cached.get("thumbnail"),
+        "is_video": video,
+    }
+
+
+async def _extract_uncached(query: str, video: bool, cache_key: str) -> dict | None:
+    result = await extract_track(query, is_video=video)
+    if not result:
+        return None
+    ttls = _url_ttls(result.get("url", ""))
+    await meta_cache.put(cache_key, result, ttl_overrides=ttls)
+    if result.get("webpage_url") and result["webpage_url"] != query:
+        await meta_cache.put(make_key(result["webpage_url"], video), result, ttl_overrides=ttls)
+    return result
+
+
 async def _extract_info(query: str, video: bool = False) -> dict | None:
-    """Extract song/video info using yt-dlp."""
+    """Extract song/video info using yt-dlp, served from the metadata cache when fresh."""
     try:
-        cache_key = (query.strip().lower(), video)
-        now = time.monotonic()
-        cached = _extract_cache.get(cache_key)
-        if cached and (now - cached[0] < 120):
-            return dict(cached[1])
-
-        import yt_dlp
-
-        def run_extraction():
-            ydl_opts = {
-                "format": (
-                    "bestaudio[ext=m4a]/bestaudio[acodec^=mp4a]/bestaudio/best"
-                    if not video
-                    else "best[height<=360][vcodec!=none][acodec!=none]/best"
-                ),
-                "noplaylist": True,
-                "quiet": True,
-                "no_warnings": True,
-                "default_search": "ytsearch",
-                "cachedir": False,
-                "source_address": "0.0.0.0",  # force IPv4 on cloud hosts
-                "retries": 2,
-                "socket_timeout": 15,
-            }
-            search_inputs = [query] if query.startswith("http") else [
-                f"ytsearch1:{query}",
-                f"ytsearch5:{query}",
-                f"ytsearch:{query}",
-            ]
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                last_err = None
-                for search_query in search_inputs:
-                    try:
-                        info = ydl.extract_info(search_query, download=False)
-                        if not info:
-                            continue
-                        if "entries" in info:
-                            entries = info.get("entries") or []
-                            info = entries[0] if entries else None
-                        if not info:
-                            continue
-                        return {
-                            "title": info.get("title", "Unknown"),
-                            "url": info.get("url"),
-                            "webpage_url": info.get("webpage_url") or info.get("original_url") or query,
-                            "duration": info.get("duration", 0),
-                            "thumbnail": info.get("thumbnail"),
-                            "is_video": video,
-                        }
-                    except Exception as e:
-                        last_err = e
-                        continue
-                if last_err:
-                    raise last_err
-                return None
-
-        result = await asyncio.to_thread(run_extraction)
-        if not result:
-            return None
-        _extract_cache[cache_key] = (now, dict(result))
+        cache_key = make_key(query, video)
+        cached = await meta_cache.get(cache_key)
+        if cached:
+            return _info_from_cache(cached, query, video)
+
+        # Identical concurrent lookups share one extraction job.
+        result = await extract_flight.do(cache_key, lambda: _extract_uncached(query, video, cache_key))
         return result
+    except ExtractionBusy:
+        raise
     except Exception as e:
         logger.error("Extraction error: %s", e)
         return None
@@ -115,57 +114,69 @@ def _is_direct_stream_url(url: str) -> bool:
     )
 
 
-async def _resolve_stream_url(url: str, is_video: bool = False) -> str | None:
+async def _resolve_stream_url(url: str, is_video: bool = False, priority: int = PRIORITY_INTERACTIVE) -> str | None:
     """Resolve a watch URL to a direct media stream URL when needed."""
     if not url:
         return None
     if _is_direct_stream_url(url):
         return url
 
-    cache_key = (url, is_video)
-    now = time.monotonic()
-    cached = _stream_resolve_cache.get(cache_key)
-    if cached and (now - cached[0] < 120):
-        return cached[1]
+    cache_key = make_key(url, is_video)
+    fmt = quality_governor.format(is_video)
+    cached = await meta_cache.get(cache_key, required=("url", "format"))
+    if cached and cached["format"] == fmt:
+        return cached["url"]
+
+    async def _resolve() -> str | None:
+        direct = await resolve_url(url, is_video=is_video, priority=priority)
+        if direct:
+            await meta_cache.put(cache_key, {"url": direct, "format": fmt}, ttl_overrides=_url_ttls(direct))
+        return direct
 
     try:
-        import yt_dlp
-
-        def run_resolve():
-            opts = {
-                "format": (
-                    "bestaudio[ext=m4a]/bestaudio[acodec^=mp4a]/bestaudio/best"
-                    if not is_video
-                    else "best[height<=360][vcodec!=none][acodec!=none]/best"
-                ),
-                "noplaylist": True,
-                "quiet": True,
-                "no_warnings": True,
-            }
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                if "entries" in info:
-                    info = info["entries"][0]
-                return info.get("url")
-
-        direct = await asyncio.to_thread(run_resolve)
+        direct = await resolve_flight.do(cache_key, _resolve)
         if direct:
-            _stream_resolve_cache[cache_key] = (now, direct)
             return direct
     except Exception as e:
         logger.warning("Stream URL resolve failed for %s: %s", url, e)
     return url
 
 
-async def _start_stream(client: Client, chat_id: int, stream_url: str, is_video: bool = False) -> tuple[bool, str]:
-    """Start direct streaming using PyTgCalls helpers."""
-    from core.assistant import assistant
-    from core.call import call_manager
+async def _apply_volume(chat_id: int, gc, native: bool):
+    """Native playout takes default_volume as participant volume; decoder gain already includes it."""
+    volume = 100
+    if native:
+        try:
+            volume = (await fetch_settings(chat_id)).get("default_volume", 100)
+        except Exception:
+            pass
+    await gc.set_volume(volume)
+
+
+async def _start_stream(
+    client: Client,
+    chat_id: int,
+    stream_url: str,
+    is_video: bool = False,
+    track: dict | None = None,
+    _migrated: bool = False,
+) -> tuple[bool, str]:
+    """Start direct streaming using PyTgCalls helpers, preferring a locally cached copy of track."""
+    from core.call import CALL_IDLE, CALL_JOINING, CALL_PLAYING, call_manager
 
     try:
         record_activity(chat_id)
 
-        # Ensure assistant is in group.
+        # The transition engine may already have switched to this track at the boundary.
+        if transition_engine.adopt(chat_id, track):
+            start_clock(chat_id, offset=transition_engine.position(chat_id))
+            loudness.note_started(track)
+            quality_governor.note_stream(chat_id, is_video)
+            logger.info("Continued into pre-buffered track in chat %s", chat_id)
+            return True, ""
+
+        # Ensure this chat's assistant is in group.
+        assistant = call_manager.assistant_for(chat_id)
         try:
             await assistant.get_chat_member(chat_id, "me")
         except Exception:
@@ -173,24 +184,72 @@ async def _start_stream(client: Client, chat_id: int, stream_url: str, is_video:
                 invite = await client.export_chat_invite_link(chat_id)
                 await assistant.join_chat(invite)
             except Exception as join_err:
+                if not _migrated and call_manager.report_error(chat_id, join_err):
+                    return await _start_stream(client, chat_id, stream_url, is_video, track, _migrated=True)
                 logger.error("Could not get assistant into chat %s: %s", chat_id, join_err)
                 return False, "Assistant cannot access this group. Add assistant account to group and retry."
 
-        play_url = await _resolve_stream_url(stream_url, is_video=is_video)
+        local_path = audio_cache.lookup(track) if track else None
+        play_url = local_path or await _resolve_stream_url(stream_url, is_video=is_video)
         if not play_url:
             return False, "Unable to resolve playable stream URL."
 
-        gc = call_manager.get(chat_id)
-
+        gc = await call_manager.acquire(chat_id)
         if not call_manager.is_connected(chat_id):
-            await gc.join_group_call(chat_id, play_url, is_video=is_video)
-            await asyncio.sleep(1)
+            call_manager.set_state(chat_id, CALL_JOINING)
+
+        if track is not None and transition_engine.handles(is_video):
+            gain = await loudness.playback_gain(chat_id, track)
+            if await transition_engine.play(chat_id, track, play_url, gc, gain_db=gain):
+                call_manager.set_state(chat_id, CALL_PLAYING)
+                await kill_stream(chat_id, release_hooks=False)  # stale seek decoder, if any
+                start_clock(chat_id)
+                loudness.note_started(track)
+                quality_governor.note_stream(chat_id, is_video)
+                await _apply_volume(chat_id, gc, native=False)
+                if not local_path:
+                    audio_cache.schedule_fill(track, play_url)
+                logger.info("Started gapless stream in chat %s (local=%s)", chat_id, bool(local_path))
+                return True, ""
+
+        if is_video:
+            # Video stays on the native player; drop any ring or mixer from the previous track.
+            await kill_stream(chat_id)
+            stream = play_url
         else:
-            await gc.change_stream(chat_id, play_url, is_video=is_video)
-
-        logger.info("Started stream in chat %s (is_video=%s)", chat_id, is_video)
+            # FFmpeg decode into the chat's fixed-size PCM ring.
+            gain = await loudness.playback_gain(chat_id, track)
+            stream = await start_ffmpeg_stream(chat_id, play_url, gain_db=gain)
+            if stream is None:
+                logger.warning("Decoder unavailable in chat %s; using native playout", chat_id)
+                stream = play_url
+        try:
+            if not call_manager.is_connected(chat_id):
+                await gc.join_group_call(chat_id, stream, is_video=is_video)
+            else:
+                await gc.change_stream(chat_id, stream, is_video=is_video)
+        except Exception:
+            if stream is not play_url:
+                await kill_stream(chat_id)
+            raise
+        call_manager.set_state(chat_id, CALL_PLAYING)
+        start_clock(chat_id)
+        if stream is not play_url:
+            loudness.note_started(track)
+        quality_governor.note_stream(chat_id, is_video)
+        await _apply_volume(chat_id, gc, native=stream is play_url)
+
+        if track and not local_path:
+            audio_cache.schedule_fill(track, play_url)
+
+        logger.info("Started stream in chat %s (is_video=%s, local=%s)", chat_id, is_video, bool(local_path))
         return True, ""
     except Exception as e:
+        if call_manager.state(chat_id) == CALL_JOINING and not call_manager.is_connected(chat_id):
+            call_manager.set_state(chat_id, CALL_IDLE)  # evictable; the next play reuses it
+        if not _migrated and call_manager.report_error(chat_id, e):
+            logger.info("Retrying chat %s on another assistant", chat_id)
+            return await _start_stream(client, chat_id, stream_url, is_video, track, _migrated=True)
         err = str(e)
         low = err.lower()
         if "groupcall" in low and ("invalid" in low or "forbidden" in low or "not" in low):
@@ -240,7 +299,10 @@ async def play_command(client: Client, message: Message):
     query = " ".join(message.command[1:])
     status_msg = await message.reply_text("Searching...", quote=True)
 
-    info = await _extract_info(query, video=is_video)
+    try:
+        info = await _extract_info(query, video=is_video)
+    except ExtractionBusy:
+        return await status_msg.edit_text("Too many requests right now. Try again in a few seconds.")
     if not info:
         return await status_msg.edit_text("Media not found.")
 
@@ -254,58 +316,40 @@ async def play_command(client: Client, message: Message):
     if queue_size(message.chat.id) >= queue_cap and message.from_user.id not in SUDO_USERS:
         return await status_msg.edit_text(f"Queue is full (cap {queue_cap}).")
 
-    if has_duplicate(message.chat.id, info.get("url", ""), info.get("title", "")) and message.from_user.id not in SUDO_USERS:
+    source = info.get("webpage_url") or info.get("url", "")
+    if has_duplicate(message.chat.id, source, info.get("title", "")) and message.from_user.id not in SUDO_USERS:
         return await status_msg.edit_text("This track is already in queue.")
 
     title = _safe(info["title"])
-    track = {
-        "title": info["title"],
-        "url": info["url"],
-        "duration": info["duration"],
-        "requested_by": message.from_user.id,
-        "is_video": is_video,
-    }
+    track = Track.from_info(info, requested_by=message.from_user.id, is_video=is_video)
 
     position = add_to_queue(message.chat.id, track, force=is_force)
 
     if position == 0:
-        duration_str = f"{track['duration'] // 60:02d}:{track['duration'] % 60:02d}" if track["duration"] else "Live"
-        ui_text = (
-            f"**AURALYX PLAYER • {'VIDEO' if is_video else 'AUDIO'}**\n"
-            f"`---------------------------`\n"
-            f"Track: `{title[:38]}`\n"
-            f"Duration: `{duration_str}`\n"
-            f"Mode: `{'Force' if is_force else 'Queue'}`\n"
-            f"`---------------------------`"
-        )
+        ui_text = render_panel(message.chat.id)
+        markup = panel_keyboard(message.chat.id)
 
-        buttons = [[
-            InlineKeyboardButton("Pause", callback_data="pause"),
-            InlineKeyboardButton("Next", callback_data="next"),
-            InlineKeyboardButton("Stop", callback_data="stop"),
-            InlineKeyboardButton("Queue", callback_data="queue"),
-        ]]
-
-        sent_main = False
+        panel_msg = None
         if info.get("thumbnail"):
             try:
-                await message.reply_photo(
-                    photo=info["thumbnail"],
+                panel_msg = await file_ids.reply_photo(
+                    message,
+                    info["thumbnail"],
                     caption=ui_text,
-                    reply_markup=InlineKeyboardMarkup(buttons),
+                    reply_markup=markup,
                     quote=True,
                 )
                 await status_msg.delete()
-                sent_main = True
             except Exception as e:
                 logger.warning("Thumbnail send failed: %s", e)
 
-        if not sent_main:
-            await status_msg.edit_text(ui_text, reply_markup=InlineKeyboardMarkup(buttons))
+        if panel_msg is None:
+            panel_msg = await status_msg.edit_text(ui_text, reply_markup=markup)
 
-        ok, err = await _start_stream(client, message.chat.id, info["url"], is_video=is_video)
+        ok, err = await _start_stream(client, message.chat.id, info["url"], is_video=is_video, track=track)
         if not ok:
             return await message.reply_text(f"Stream failed: `{_safe(err) or 'unknown error'}`", quote=True)
+        panel_updater.register(message.chat.id, panel_msg, ui_text)
 
         await increment_stat("total_plays")
         await record_track_play(message.chat.id, track)
@@ -319,6 +363,47 @@ async def play_command(client: Client, message: Message):
         )
 
 
+def _remember_search(chat_id: int, user_id: int, results: SearchResults):
+    key = (chat_id, user_id)
+    _search_sessions[key] = (results, time.monotonic())
+    _search_sessions.move_to_end(key)
+    while len(_search_sessions) > _MAX_SEARCH_SESSIONS:
+        _search_sessions.popitem(last=False)
+
+
+def _search_session(chat_id: int, user_id: int) -> SearchResults | None:
+    key = (chat_id, user_id)
+    session = _search_sessions.get(key)
+    if not session:
+        return None
+    results, selected_at = session
+    if time.monotonic() - selected_at > _SEARCH_SESSION_TTL:
+        _search_sessions.pop(key, None)
+        return None
+    return results
+
+
+def _render_search_page(results: SearchResults, page: int) -> tuple[str, InlineKeyboardMarkup]:
+    pages = results.pages(_SEARCH_PAGE)
+    page = max(0, min(page, pages - 1))
+    lines = [f"Search Results ({page + 1}/{pages}):"]
+    buttons = []
+    for i, row in enumerate(results.page(page, _SEARCH_PAGE), start=page * _SEARCH_PAGE + 1):
+        dur = row.get("duration", 0)
+        dur_s = f"{dur // 60:02d}:{dur % 60:02d}" if dur else "Live"
+        lines.append(f"{i}. `{row.get('title', 'Unknown')[:42]}` ({dur_s})")
+        buttons.append([InlineKeyboardButton(f"Add #{i}", callback_data=f"search_add:{i}")])
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀ Prev", callback_data=f"search_page:{page - 1}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶", callback_data=f"search_page:{page + 1}"))
+    if nav:
+        buttons.append(nav)
+    return "\n".join(lines), InlineKeyboardMarkup(buttons)
+
+
 @Client.on_message(filters.command(["search", "vsearch"]) & filters.group)
 @error_handler
 @rate_limit(5)
@@ -331,46 +416,29 @@ async def search_command(client: Client, message: Message):
     status = await message.reply_text("Searching top results...", quote=True)
 
     try:
-        import yt_dlp
-
-        def run_search() -> list[dict]:
-            opts = {
-                "format": "best[height<=360][vcodec!=none][acodec!=none]/best" if is_video else "bestaudio/best",
-                "quiet": True,
-                "no_warnings": True,
-                "noplaylist": True,
-            }
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(f"ytsearch5:{query}", download=False)
-                rows = []
-                for entry in (info.get("entries") or [])[:5]:
-                    rows.append(
-                        {
-                            "title": entry.get("title", "Unknown"),
-                            "url": entry.get("url"),
-                            "duration": int(entry.get("duration", 0) or 0),
-                            "is_video": is_video,
-                        }
-                    )
-                return rows
-
-        results = await asyncio.to_thread(run_search)
+        results = await search_cache.search(query, is_video=is_video)
         if not results:
             return await status.edit_text("No results found.")
 
-        _search_cache[(message.chat.id, message.from_user.id)] = (time.monotonic(), results)
+        _remember_search(message.chat.id, message.from_user.id, results)
+        text, markup = _render_search_page(results, 0)
+        await status.edit_text(text, reply_markup=markup)
+    except Exception as e:
+        await status.edit_text(f"Search failed: `{e}`")
+
 
-        lines = ["Search Results:"]
-        buttons = []
-        for i, row in enumerate(results, start=1):
-            dur = row.get("duration", 0)
-            dur_s = f"{dur // 60:02d}:{dur % 60:02d}" if dur else "Live"
-            lines.append(f"{i}. `{row.get('title', 'Unknown')[:42]}` ({dur_s})")
-            buttons.append([InlineKeyboardButton(f"Add #{i}", callback_data=f"search_add:{i}")])
+@Client.on_callback_query(filters.regex(r"^search_page:(\d+)$"))
+async def search_page_callback(client: Client, callback: CallbackQuery):
+    results = _search_session(callback.message.chat.id, callback.from_user.id)
+    if results is None:
+        return await callback.answer("Search expired. Run /search again.", show_alert=True)
 
-        await status.edit_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(buttons))
+    text, markup = _render_search_page(results, int(callback.data.split(":", 1)[1]))
+    try:
+        await callback.message.edit_text(text, reply_markup=markup)
     except Exception as e:
-        await status.edit_text(f"Search failed: `{e}`")
+        logger.debug("Search page edit failed: %s", e)
+    await callback.answer()
 
 
 @Client.on_callback_query(filters.regex(r"^search_add:(\d+)$"))
@@ -378,14 +446,8 @@ async def search_add_callback(client: Client, callback: CallbackQuery):
     chat_id = callback.message.chat.id
     user_id = callback.from_user.id
 
-    key = (chat_id, user_id)
-    payload = _search_cache.get(key)
-    if not payload:
-        return await callback.answer("Search expired. Run /search again.", show_alert=True)
-
-    ts, results = payload
-    if time.monotonic() - ts > 180:
-        _search_cache.pop(key, None)
+    results = _search_session(chat_id, user_id)
+    if results is None:
         return await callback.answer("Search expired. Run /search again.", show_alert=True)
 
     try:
@@ -393,23 +455,28 @@ async def search_add_callback(client: Client, callback: CallbackQuery):
     except Exception:
         return await callback.answer("Invalid result.", show_alert=True)
 
-    if idx < 0 or idx >= len(results):
+    if idx < 0 or idx >= len(results.rows):
         return await callback.answer("Invalid result index.", show_alert=True)
 
-    track = dict(results[idx])
-    track["requested_by"] = user_id
+    track = Track.from_info(results.rows[idx], requested_by=user_id)
 
     settings = await fetch_settings(chat_id)
     queue_cap = int(settings.get("queue_cap", 50))
     if queue_size(chat_id) >= queue_cap and user_id not in SUDO_USERS:
         return await callback.answer(f"Queue full (cap {queue_cap}).", show_alert=True)
 
-    if has_duplicate(chat_id, track.get("url", ""), track.get("title", "")) and user_id not in SUDO_USERS:
+    if has_duplicate(chat_id, track.source, track.title) and user_id not in SUDO_USERS:
         return await callback.answer("Track already in queue.", show_alert=True)
 
     pos = add_to_queue(chat_id, track)
     if pos == 0:
-        ok, err = await _start_stream(client, chat_id, track["url"], is_video=bool(track.get("is_video", False)))
+        ok, err = await _start_stream(
+            client,
+            chat_id,
+            playable_source(track),
+            is_video=track.is_video,
+            track=track,
+        )
         if not ok:
             return await callback.answer(f"Failed: {(_safe(err) or 'unknown')[:60]}", show_alert=True)
         await increment_stat("total_plays")
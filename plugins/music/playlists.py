@@ -1,8 +1,12 @@
 ﻿"""Playlist commands for music module."""
 
+import asyncio
+import logging
+
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
+from config import MAX_DURATION, PLAYLIST_IMPORT_MAX, PLAYLIST_PAGE_SIZE, SUDO_USERS
 from core.permissions import admin_only
 from database.mongo import (
     delete_chat_playlist,
@@ -11,7 +15,122 @@ from database.mongo import (
     save_chat_playlist,
 )
 from utils.decorators import error_handler, rate_limit
-from utils.queue import add_to_queue, current_track, get_queue
+from utils.extractor import PRIORITY_PREFETCH, playlist_page
+from utils.music_settings import fetch_settings
+from utils.queue import current_track, extend_queue, queue_size, queue_view
+from utils.track import Track
+from utils.url_refresh import playable_source
+
+logger = logging.getLogger(__name__)
+
+_imports: dict[int, asyncio.Task] = {}
+
+
+async def _enqueue(chat_id: int, rows: list[dict], requested_by: int) -> tuple[int, int, bool]:
+    """
+    Queue playlist rows under the chat's max_duration and queue_cap (sudo
+    users skip the cap). Returns (queued, too long, queue full).
+    """
+    settings = await fetch_settings(chat_id)
+    max_duration = int(settings.get("max_duration", MAX_DURATION))
+    tracks = [Track.from_playlist(row, requested_by=requested_by) for row in rows]
+    fitting = [track for track in tracks if track.duration <= max_duration]
+    too_long = len(tracks) - len(fitting)
+    full = False
+    if requested_by not in SUDO_USERS:
+        room = max(0, int(settings.get("queue_cap", 50)) - queue_size(chat_id))
+        full = len(fitting) > room
+        fitting = fitting[:room]
+    return extend_queue(chat_id, fitting), too_long, full
+
+
+def _limits_note(too_long: int, full: bool) -> str:
+    notes = []
+    if too_long:
+        notes.append(f"{too_long} skipped as too long")
+    if full:
+        notes.append("queue cap reached")
+    return f" ({', '.join(notes)})" if notes else ""
+
+
+async def _start_if_idle(client: Client, chat_id: int, was_empty: bool) -> str:
+    """Start the head of the queue when it was empty before loading. Returns an error or ""."""
+    if not was_empty:
+        return ""
+    from .player import _start_stream
+
+    first = current_track(chat_id)
+    if not first or not first.url:
+        return ""
+    ok, err = await _start_stream(
+        client,
+        chat_id,
+        playable_source(first),
+        is_video=first.is_video,
+        track=first,
+    )
+    return "" if ok else (err or "unknown")
+
+
+async def _import_rest(
+    chat_id: int, url: str, start: int, queued: int, too_long: int, requested_by: int, status: Message
+):
+    """Stream the remaining playlist pages into the queue at prefetch priority."""
+    try:
+        done = full = False
+        while not done and not full and queued < PLAYLIST_IMPORT_MAX:
+            if not queue_size(chat_id):
+                return  # queue was stopped/cleared mid-import
+            count = min(PLAYLIST_PAGE_SIZE, PLAYLIST_IMPORT_MAX - queued)
+            page = await playlist_page(url, start, count, priority=PRIORITY_PREFETCH)
+            added, skipped, full = await _enqueue(chat_id, page["entries"], requested_by)
+            queued += added
+            too_long += skipped
+            start += count
+            done = page["done"] or not page["entries"]
+        await status.edit_text(f"Imported {queued} tracks from playlist{_limits_note(too_long, full)}.")
+    except asyncio.CancelledError:
+        return
+    except Exception as e:
+        logger.warning("Playlist import stopped in %s after %d tracks: %s", chat_id, queued, e)
+    finally:
+        if _imports.get(chat_id) is asyncio.current_task():
+            _imports.pop(chat_id, None)
+
+
+async def _import_playlist(client: Client, message: Message, url: str):
+    chat_id = message.chat.id
+    status = await message.reply_text("Reading playlist...", quote=True)
+
+    previous = _imports.pop(chat_id, None)
+    if previous and not previous.done():
+        previous.cancel()
+
+    try:
+        first_page = await playlist_page(url, 1, min(PLAYLIST_PAGE_SIZE, PLAYLIST_IMPORT_MAX))
+    except Exception as e:
+        return await status.edit_text(f"Could not read playlist: `{str(e)[:120]}`")
+    if not first_page["entries"]:
+        return await status.edit_text("Playlist is empty or private.")
+
+    was_empty = current_track(chat_id) is None
+    queued, too_long, full = await _enqueue(chat_id, first_page["entries"], message.from_user.id)
+    if not queued:
+        return await status.edit_text(f"Nothing queued{_limits_note(too_long, full)}.")
+
+    err = await _start_if_idle(client, chat_id, was_empty)
+    if err:
+        return await status.edit_text(f"Added playlist but failed to start stream: `{err}`")
+
+    title = (first_page["title"] or "playlist")[:40]
+    if first_page["done"] or full or queued >= PLAYLIST_IMPORT_MAX:
+        return await status.edit_text(f"Imported `{title}` ({queued} tracks){_limits_note(too_long, full)}.")
+
+    await status.edit_text(f"Importing `{title}`: {queued} tracks queued, loading the rest...")
+    read = len(first_page["entries"])
+    _imports[chat_id] = asyncio.create_task(
+        _import_rest(chat_id, url, read + 1, queued, too_long, message.from_user.id, status)
+    )
 
 
 @Client.on_message(filters.command("playlist") & filters.group)
@@ -24,7 +143,8 @@ async def playlist_command(client: Client, message: Message):
             "`/playlist save <name>`\n"
             "`/playlist play <name>`\n"
             "`/playlist list`\n"
-            "`/playlist delete <name>`",
+            "`/playlist delete <name>`\n"
+            "`/playlist import <youtube playlist url>`",
             quote=True,
         )
 
@@ -38,20 +158,11 @@ async def playlist_command(client: Client, message: Message):
             return await message.reply_text("Usage: `/playlist save <name>`", quote=True)
 
         name = " ".join(message.command[2:]).strip().lower()[:32]
-        q = get_queue(chat_id)
+        q = queue_view(chat_id)
         if not q:
             return await message.reply_text("Queue is empty.", quote=True)
 
-        tracks = []
-        for row in q[:100]:
-            tracks.append(
-                {
-                    "title": row.get("title", "Unknown")[:128],
-                    "url": row.get("url", ""),
-                    "duration": int(row.get("duration", 0) or 0),
-                    "is_video": bool(row.get("is_video", False)),
-                }
-            )
+        tracks = [track.to_playlist() for track in q[:100]]
 
         await save_chat_playlist(chat_id, name, tracks, message.from_user.id)
         return await message.reply_text(f"Saved playlist `{name}` with {len(tracks)} tracks.", quote=True)
@@ -92,30 +203,23 @@ async def playlist_command(client: Client, message: Message):
             return await message.reply_text("Playlist is empty.", quote=True)
 
         was_empty = current_track(chat_id) is None
-        for row in tracks:
-            add_to_queue(
-                chat_id,
-                {
-                    "title": row.get("title", "Unknown"),
-                    "url": row.get("url", ""),
-                    "duration": int(row.get("duration", 0) or 0),
-                    "requested_by": message.from_user.id,
-                    "is_video": bool(row.get("is_video", False)),
-                },
-            )
-
-        if was_empty:
-            from .player import _start_stream
-
-            first = current_track(chat_id)
-            if first and first.get("url"):
-                ok, err = await _start_stream(client, chat_id, first["url"], is_video=bool(first.get("is_video", False)))
-                if not ok:
-                    return await message.reply_text(
-                        f"Added playlist but failed to start stream: `{err or 'unknown'}`",
-                        quote=True,
-                    )
-
-        return await message.reply_text(f"Loaded playlist `{name}` ({len(tracks)} tracks).", quote=True)
-
-    await message.reply_text("Unknown action. Use save/play/list/delete.", quote=True)
+        queued, too_long, full = await _enqueue(chat_id, tracks, message.from_user.id)
+        if not queued:
+            return await message.reply_text(f"Nothing queued{_limits_note(too_long, full)}.", quote=True)
+
+        err = await _start_if_idle(client, chat_id, was_empty)
+        if err:
+            return await message.reply_text(f"Added playlist but failed to start stream: `{err}`", quote=True)
+
+        return await message.reply_text(
+            f"Loaded playlist `{name}` ({queued} tracks){_limits_note(too_long, full)}.", quote=True
+        )
+
+    if action == "import":
+        if not await admin_only(client, message):
+            return
+        if len(message.command) < 3 or not message.command[2].startswith("http"):
+            return await message.reply_text("Usage: `/playlist import <youtube playlist url>`", quote=True)
+        return await _import_playlist(client, message, message.command[2])
+
+    await message.reply_text("Unknown action. Use save/play/list/delete/import.", quote=True)
@@ -42,7 +42,50 @@ async def owner_stats(client: Client, message: Message):
     
     # VC Stats
     from core.voice_cleanup import _activity
+    from utils.stream import get_stream_stats
     active_vcs = len(_activity)
+    st = get_stream_stats()
+
+    # Cache Stats
+    from utils.media_cache import meta_cache
+    from utils.extractor import extraction_pool
+    from utils.audio_cache import audio_cache
+    from utils.prefetch import prefetcher
+    from utils.singleflight import get_flight_stats
+    from plugins.music.controls import get_advance_stats
+    from utils.queue_journal import get_journal_stats
+    from utils.transition import transition_engine
+    from core.call import call_manager, get_join_stats
+    from utils.recommender import recommender
+    from utils.search_cache import search_cache
+    from utils.http import http_client
+    from utils.lyrics import lyrics_cache
+    from utils.file_ids import file_ids
+    from utils.panel import panel_updater
+    from utils.loudness import loudness
+    from utils.quality import quality_governor
+    mc = meta_cache.stats()
+    ex = extraction_pool.stats()
+    sf = get_flight_stats()
+    pf = prefetcher.stats()
+    ac = audio_cache.stats()
+    av = get_advance_stats()
+    qj = get_journal_stats()
+    tr = transition_engine.stats()
+    js = get_join_stats()
+    lc = call_manager.lifecycle_stats()
+    rc = recommender.stats()
+    sc = search_cache.stats()
+    hc = http_client.stats()
+    ly = lyrics_cache.stats()
+    fi = file_ids.stats()
+    pn = panel_updater.stats()
+    ld = loudness.stats()
+    qg = quality_governor.stats()
+    sf_lines = "\n".join(
+        f"{'└' if i == len(sf) - 1 else '├'} {name}: `{st['coalesced']}+{st['negative_hits']}` saved of `{st['calls']}` (`{st['coalesce_ratio']:.0%}`)"
+        for i, (name, st) in enumerate(sf.items())
+    )
     
     text = (
         f"👑 **OWNER DASHBOARD**\n"
@@ -56,7 +99,72 @@ async def owner_stats(client: Client, message: Message):
         f"├ Groups: `{groups:,}`\n"
         f"└ DB Size: `{db_size:.2f} MB`\n\n"
         f"🎵 **Active Streams**\n"
-        f"└ Sessions: `{active_vcs}`\n"
+        f"├ Sessions: `{active_vcs}`\n"
+        f"├ PCM Rings: `{st['active']}` (`{st['ring_bytes'] / 1024 ** 2:.1f} MB`)\n"
+        f"├ Underruns/Overruns: `{st['underruns']}/{st['overruns']}`\n"
+        f"├ Decoders: `{st['decoders']}/{st['decoder_cap']}` @ `{st['avg_speed']:.2f}x`\n"
+        f"└ Restarts/Stalls/Crashes: `{st['restarts']}/{st['stalls']}/{st['crashes']}`\n\n"
+        f"📞 **Voice Calls**\n"
+        f"├ Live: `{lc['live']}/{lc['cap']}` (`{lc['waiting']}` waiting)\n"
+        f"├ Idle/Joining/Playing/Paused: `{lc['idle']}/{lc['joining']}/{lc['playing']}/{lc['paused']}`\n"
+        f"├ Evicted/Queued/Rejected: `{lc['evicted']}/{lc['admitted_after_wait']}/{lc['rejected']}`\n"
+        f"├ Joins/Retries: `{js['joins']}/{js['retries']}`\n"
+        f"├ Ready timeouts/Failures: `{js['timeouts']}/{js['failures']}`\n"
+        f"└ Join latency p50/p95: `{js['p50_ms']:.0f}/{js['p95_ms']:.0f} ms`\n\n"
+        f"⏩ **Auto-Advance**\n"
+        f"├ End events: `{av['events']}` (`{av['debounced']}` debounced, `{av['stale']}` stale)\n"
+        f"├ Advanced/Failed: `{av['advanced']}/{av['failed']}`\n"
+        f"└ End→next p50/p95: `{av['p50_ms']:.0f}/{av['p95_ms']:.0f} ms`\n\n"
+        f"🎲 **Autoplay Recommender**\n"
+        f"├ Tracks/Links: `{rc['tracks']}/{rc['edges']}` over `{rc['chats']}` chats\n"
+        f"├ Picks/Search fallbacks: `{rc['picks']}/{rc['fallbacks']}` (`{rc['hit_rate']:.0%}`)\n"
+        f"└ Avg pick: `{rc['avg_pick_us']:.0f} µs`\n\n"
+        f"🔀 **Transitions** (`{'on' if tr['enabled'] else 'off'}`, fade `{tr['crossfade']:.0f}s`)\n"
+        f"├ Mixers/Standby: `{tr['active']}/{tr['standby']}`\n"
+        f"├ Gapless/Crossfade/Cut: `{tr['gapless']}/{tr['crossfades']}/{tr['hard_cuts']}`\n"
+        f"└ Switch gap p50/p95: `{tr['p50_gap_ms']:.0f}/{tr['p95_gap_ms']:.0f} ms`\n\n"
+        f"📝 **Queue Journal**\n"
+        f"├ Dirty/Written: `{qj['dirty']}/{qj['chats_written']}` (`{qj['errors']}` errors)\n"
+        f"└ Restored/Resumed: `{qj['restored']}/{qj['resumed']}`\n\n"
+        f"🗂 **Metadata Cache**\n"
+        f"├ Entries: `{mc['entries']}` (`{mc['bytes'] / 1024:.0f} KB`)\n"
+        f"├ Hits/Misses: `{mc['hits']}/{mc['misses']}` (`{mc['hit_rate']:.0%}`)\n"
+        f"└ Evictions: `{mc['evictions']}`\n\n"
+        f"🔎 **Search Cache**\n"
+        f"├ Result sets: `{sc['entries']}` (`{sc['evictions']}` evicted)\n"
+        f"└ Hits/Misses: `{sc['hits']}/{sc['misses']}` (`{sc['hit_rate']:.0%}`)\n\n"
+        f"🌐 **HTTP / Lyrics**\n"
+        f"├ Requests: `{hc['requests']}` (`{hc['errors']}` errors, avg `{hc['avg_ms']:.0f} ms`)\n"
+        f"├ Lyrics cached: `{ly['memory']}` (`{ly['prefetched']}` prefetched)\n"
+        f"└ Lyrics hits: `{ly['hits'] + ly['disk_hits']}/{ly['hits'] + ly['disk_hits'] + ly['misses']}` (`{ly['hit_rate']:.0%}`)\n\n"
+        f"🖼 **Media Refs**\n"
+        f"├ Cached file ids: `{fi['entries']}` (`{fi['stale']}` stale)\n"
+        f"└ Reused/Uploaded: `{fi['hits']}/{fi['uploads']}` (`{fi['hit_rate']:.0%}`)\n\n"
+        f"🎛 **Now Playing Panels**\n"
+        f"├ Live/Scheduled: `{pn['panels']}/{pn['scheduled']}`\n"
+        f"├ Edits/Unchanged: `{pn['edits']}/{pn['unchanged']}`\n"
+        f"└ FloodWaits/Dropped: `{pn['floods']}/{pn['dropped']}`\n\n"
+        f"🔊 **Loudness**\n"
+        f"├ Measured/Pending: `{ld['measured']}/{ld['pending']}` (`{'on' if ld['enabled'] else 'off'}`)\n"
+        f"├ Analysed/Failed: `{ld['analyzed']}/{ld['failed']}`\n"
+        f"└ CPU skips: `{ld['skipped_cpu']}` • Gains applied: `{ld['applied']}`\n\n"
+        f"📶 **Quality Governor**\n"
+        f"├ Rung: `{qg['rung']}` (`{'on' if qg['enabled'] else 'off'}`)\n"
+        f"├ Load: `{qg.get('reason', '-')}` `{qg.get('pressure', 0.0):.2f}` • Cost: `{qg.get('cost', 0.0)}`\n"
+        f"└ Down/Up: `{qg['downgrades']}/{qg['upgrades']}`\n\n"
+        f"⛏ **Extraction Pool**\n"
+        f"├ Queue/Running: `{ex['queue_depth']}/{ex['running']}`\n"
+        f"├ Latency p50/p95: `{ex['p50_ms']:.0f}/{ex['p95_ms']:.0f} ms`\n"
+        f"└ Failed/Timeouts/Rejected: `{ex['failed']}/{ex['timeouts']}/{ex['rejected']}`\n\n"
+        f"🔗 **Coalesced Lookups**\n"
+        f"{sf_lines}\n\n"
+        f"⏭ **Prefetch**\n"
+        f"├ Chats/Ready: `{pf['active_chats']}/{pf['ready']}`\n"
+        f"└ Skip hits: `{pf['hits']}/{pf['hits'] + pf['misses']}` (`{pf['hit_rate']:.0%}`)\n\n"
+        f"💾 **Audio Cache** (`{'on' if ac['enabled'] else 'off'}`)\n"
+        f"├ Files: `{ac['entries']}` (`{ac['bytes'] / 1024 ** 3:.2f}/{ac['budget_bytes'] / 1024 ** 3:.1f} GB`)\n"
+        f"├ Hits/Misses: `{ac['hits']}/{ac['misses']}` (`{ac['hit_rate']:.0%}`)\n"
+        f"└ Pinned/Filling/Evicted: `{ac['pinned']}/{ac['filling']}/{ac['evictions']}`\n"
         f"━━━━━━━━━━━━━━━━━━━━"
     )
     await message.reply_text(text, quote=True)
@@ -81,14 +189,8 @@ async def owner_force_leave(client: Client, message: Message):
     
     # Disconnect all active voice calls
     for cid in list(call_manager._calls):
-        try:
-            gc = call_manager._calls[cid]
-            gc.stop_playout()
-            await gc.leave_current_group_call()
-        except Exception:
-            pass
+        await call_manager.leave(cid)
         clear_queue(cid)
-        call_manager.remove(cid)
     
     await cleanup_all()
     _activity.clear()
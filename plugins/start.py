@@ -12,6 +12,7 @@ from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMa
 
 from config import OWNER_ID
 from database.mongo import add_group, add_user, get_stat, get_total_groups, get_total_users
+from utils.file_ids import file_ids
 
 logger = logging.getLogger(__name__)
 
@@ -84,11 +85,12 @@ def _music_text() -> str:
         "`/loop off|track|queue` : Set loop mode\n"
         "`/shuffle` : Shuffle queue\n"
         "`/remove <position>` : Remove one queued item\n"
+        "`/move <from> <to>` : Reorder a queued item\n"
         "`/clear` : Clear queued items\n\n"
         "**Discovery**\n"
         "`/search <query>` : Show top song results\n"
         "`/vsearch <query>` : Show top video results\n"
-        "`/playlist save|play|list|delete` : Manage playlists\n"
+        "`/playlist save|play|list|delete|import` : Manage playlists\n"
         "`/history` : Last played tracks\n"
         "`/toptracks` : Most played tracks\n"
         "`/autoplay on|off` : Auto-pick next track\n"
@@ -195,7 +197,7 @@ async def start_command(client: Client, message: Message):
     photo_path = "Start_Panel.png"
 
     if os.path.exists(photo_path):
-        await message.reply_photo(photo=photo_path, caption=text, reply_markup=markup, quote=True)
+        await file_ids.reply_photo(message, photo_path, caption=text, reply_markup=markup, quote=True)
     else:
         await message.reply_text(text, reply_markup=markup, quote=True)
 
@@ -215,7 +217,7 @@ async def bot_added_to_group(client: Client, message: Message):
         markup = _home_keyboard(message.from_user.id if message.from_user else 0)
         photo_path = "Start_Panel.png"
         if os.path.exists(photo_path):
-            await message.reply_photo(photo=photo_path, caption=text, reply_markup=markup)
+            await file_ids.reply_photo(message, photo_path, caption=text, reply_markup=markup)
         else:
             await message.reply_text(text, reply_markup=markup)
 
@@ -1081,24 +1081,9 @@ async def warroom_callback(client: Client, callback: CallbackQuery):
             return await callback.answer("No restart permission.", show_alert=True)
 
         await callback.answer("Restarting...", show_alert=True)
-        from core.call import call_manager
-        from core.assistant import assistant
-        from core.voice_cleanup import stop_cleanup
-        from utils.stream import cleanup_all
+        from core.shutdown import shutdown_services
 
-        stop_cleanup()
-        for cid in list(call_manager._calls):
-            try:
-                gc = call_manager._calls[cid]
-                gc.stop_playout()
-                await gc.leave_current_group_call()
-            except Exception:
-                pass
-        await cleanup_all()
-        try:
-            await assistant.stop()
-        except Exception:
-            pass
+        await shutdown_services()
         try:
             await client.stop()
         except Exception:
@@ -23,29 +23,12 @@ async def restart_command(client: Client, message: Message):
     msg = await message.reply_text("🔄 **Restarting Auralyx Music...**\n_Please wait a moment._")
     
     # ── Shutdown Logic ──
-    from core.call import call_manager
-    from core.assistant import assistant
-    from core.voice_cleanup import stop_cleanup
-    from utils.stream import cleanup_all
-    
+    from core.shutdown import shutdown_services
+
     logger.info("Sudo restart requested by %s", message.from_user.id)
-    
-    # Stop background tasks
-    stop_cleanup()
-    
-    # Disconnect all active VCs
-    for cid in list(call_manager._calls):
-        try:
-            gc = call_manager._calls[cid]
-            gc.stop_playout()
-            await gc.leave_current_group_call()
-        except Exception:
-            pass
-    
-    await cleanup_all()
-        
+    await shutdown_services()
+
     # Stop clients
-    await assistant.stop()
     await client.stop()
     
     # Give OS a chance to clean up sockets
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import core.call as call
+from core.call import CALL_IDLE, CALL_PLAYING, CallManager
+
+
+class _FakeGroupCall:
+    def __init__(self):
+        self.is_connected = False
+        self.left = False
+
+    async def leave_current_group_call(self):
+        self.left = True
+
+    def stop_playout(self):
+        pass
+
+
+class _FakeFactory:
+    def get_group_call(self):
+        return _FakeGroupCall()
+
+
+class _FakeClient:
+    is_connected = True
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(call, "MAX_GROUP_CALLS", 2)
+    monkeypatch.setattr(call, "CALL_ADMISSION_TIMEOUT", 0.2)
+    monkeypatch.setattr(CallManager, "_factory_for", lambda self, index: _FakeFactory())
+    return CallManager(clients=[_FakeClient()])
+
+
+def test_full_manager_evicts_least_recently_used_idle_call(manager):
+    async def run():
+        await manager.acquire(1)
+        await manager.acquire(2)
+        manager.touch(1)
+        await manager.acquire(3)
+
+    asyncio.run(run())
+    assert manager.get(2) is None
+    assert manager.get(1) is not None and manager.get(3) is not None
+    assert manager.evicted == 1
+
+
+def test_playing_calls_are_never_evicted_and_waiters_time_out(manager):
+    async def run():
+        for chat_id in (1, 2):
+            await manager.acquire(chat_id)
+            manager.set_state(chat_id, CALL_PLAYING)
+        with pytest.raises(RuntimeError):
+            await manager.acquire(3)
+
+    asyncio.run(run())
+    assert manager.rejected == 1
+    assert manager.evicted == 0
+    assert manager.state(1) == CALL_PLAYING and manager.state(2) == CALL_PLAYING
+
+
+def test_waiter_is_admitted_when_a_slot_frees(manager):
+    async def run():
+        for chat_id in (1, 2):
+            await manager.acquire(chat_id)
+            manager.set_state(chat_id, CALL_PLAYING)
+        waiter = asyncio.ensure_future(manager.acquire(3))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        await manager.leave(1)
+        return await waiter
+
+    gc = asyncio.run(run())
+    assert gc is manager.get(3)
+    assert manager.state(3) == CALL_IDLE
+    assert manager.admitted_after_wait == 1
+    assert manager.lifecycle_stats()["live"] == 2
+
+
+def test_idle_eviction_respects_max_age(manager):
+    async def run():
+        await manager.acquire(1)
+        manager._touched[1] -= 120
+        await manager.acquire(2)
+        return manager._evict_idle(max_age=60)
+
+    assert asyncio.run(run()) == 1
+    assert manager.get(1) is None and manager.get(2) is not None
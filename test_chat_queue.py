@@ -0,0 +1,61 @@
+from collections import Counter
+
+from utils.queue import ChatQueue, _norm_title
+from utils.track import Track
+
+
+def _track(n: int, url: str = "") -> Track:
+    return Track(title=f"Song {n}", url=url)
+
+
+def _expected(queue: ChatQueue) -> tuple[Counter, Counter]:
+    sources = Counter(keys[0] for keys in queue._keys if keys[0])
+    titles = Counter(_norm_title(track.title) for track in queue)
+    return sources, titles
+
+
+def _assert_consistent(queue: ChatQueue):
+    sources, titles = _expected(queue)
+    assert queue._sources == sources
+    assert queue._titles == titles
+    assert len(queue._keys) == len(queue)
+
+
+def test_move_and_remove_keep_index_in_step():
+    queue = ChatQueue(Track(title=f"Song {n}", webpage_url=f"https://youtu.be/s{n}") for n in range(6))
+
+    queue.move(4, 1)
+    assert [t.title for t in queue] == ["Song 0", "Song 4", "Song 1", "Song 2", "Song 3", "Song 5"]
+    removed = queue.remove_at(2)
+    assert removed.title == "Song 1"
+    queue.remove_at(-1)
+    queue.truncate(2)
+    queue.popleft()
+
+    _assert_consistent(queue)
+    assert [t.title for t in queue] == ["Song 4"]
+    assert queue.has_duplicate("https://youtu.be/s4")
+    assert not queue.has_duplicate("https://youtu.be/s1", "song 1")
+
+
+def test_shuffle_keeps_keys_with_their_tracks():
+    queue = ChatQueue(Track(title=f"Song {n}", webpage_url=f"https://youtu.be/s{n}") for n in range(20))
+
+    queue.shuffle()
+
+    assert [keys[0] for keys in queue._keys] == [track.source for track in queue]
+    _assert_consistent(queue)
+
+
+def test_url_refresh_does_not_desync_index():
+    """A track without a page URL is indexed on its url, which refresh rewrites."""
+    track = _track(1, "https://cdn.example/old.m4a")
+    queue = ChatQueue([_track(0, "https://cdn.example/zero.m4a"), track])
+
+    track.url = "https://cdn.example/new.m4a"
+    queue.move(1, 0)
+    queue.remove_at(0)
+
+    assert "https://cdn.example/old.m4a" not in queue._sources
+    assert not queue.has_duplicate("https://cdn.example/new.m4a")
+    _assert_consistent(queue)
@@ -0,0 +1,98 @@
+import asyncio
+
+import utils.media_cache as media_cache
+from utils.media_cache import MetadataCache
+
+INFO = {
+    "title": "Song",
+    "duration": 200,
+    "webpage_url": "https://youtu.be/song",
+    "thumbnail": "https://i.ytimg.com/song.jpg",
+    "url": "https://cdn.example/song.m4a",
+}
+
+
+def _fake_disk(monkeypatch) -> dict:
+    disk: dict = {}
+
+    async def get_entry(key):
+        return dict(disk[key]) if key in disk else None
+
+    async def put_entry(key, fields):
+        disk[key] = dict(fields)
+
+    monkeypatch.setattr(media_cache, "get_entry", get_entry)
+    monkeypatch.setattr(media_cache, "put_entry", put_entry)
+    return disk
+
+
+def _clock(monkeypatch, start: float = 1_000_000.0) -> list:
+    now = [start]
+    monkeypatch.setattr(media_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_url_expires_before_metadata(monkeypatch):
+    _fake_disk(monkeypatch)
+    now = _clock(monkeypatch)
+    cache = MetadataCache()
+
+    async def run():
+        await cache.put("a:song", INFO, ttl_overrides={"url": 60})
+        now[0] += 120
+        meta = await cache.get("a:song")
+        url_only = await cache.get("a:song", required=("url",))
+        return meta, url_only
+
+    meta, url_only = asyncio.run(run())
+    assert meta["title"] == "Song" and "url" not in meta
+    assert url_only is None
+
+
+def test_evicted_key_is_served_from_disk(monkeypatch):
+    _fake_disk(monkeypatch)
+    _clock(monkeypatch)
+    cache = MetadataCache(max_entries=1)
+
+    async def run():
+        await cache.put("a:one", INFO)
+        await cache.put("a:two", {**INFO, "title": "Two"})
+        return await cache.get("a:one")
+
+    hit = asyncio.run(run())
+    assert hit["title"] == "Song"
+    assert cache.evictions >= 1 and cache.disk_hits == 1
+
+
+def test_put_after_eviction_merges_with_disk_row(monkeypatch):
+    disk = _fake_disk(monkeypatch)
+    _clock(monkeypatch)
+    cache = MetadataCache(max_entries=1)
+
+    async def run():
+        await cache.put("a:one", INFO)
+        await cache.put("a:two", INFO)  # evicts a:one from memory
+        await cache.put("a:one", {"url": "https://cdn.example/fresh.m4a"})
+        return await cache.get("a:one")
+
+    hit = asyncio.run(run())
+    assert hit["title"] == "Song"
+    assert hit["url"] == "https://cdn.example/fresh.m4a"
+    assert disk["a:one"]["title"][0] == "Song"
+
+
+def test_expired_disk_fields_are_not_merged(monkeypatch):
+    _fake_disk(monkeypatch)
+    now = _clock(monkeypatch)
+    cache = MetadataCache(max_entries=1)
+
+    async def run():
+        await cache.put("a:one", INFO, ttl_overrides={"title": 10})
+        await cache.put("a:two", INFO)
+        now[0] += 60
+        await cache.put("a:one", {"url": "https://cdn.example/fresh.m4a"})
+        return await cache.get("a:one", required=("url",))
+
+    hit = asyncio.run(run())
+    assert "title" not in hit
+    assert hit["duration"] == 200
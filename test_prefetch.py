@@ -0,0 +1,39 @@
+import time
+
+from utils.prefetch import prefetcher
+from utils.queue import append_track, clear_queue, pop_from_queue
+from utils.track import Track
+
+CHAT = -100424242
+
+
+def _track(n: int) -> Track:
+    return Track(title=f"Song {n}", webpage_url=f"https://youtu.be/song{n}")
+
+
+def test_pop_keeps_prefetched_next_track():
+    """The next track's URL survives the pop that makes it current."""
+    clear_queue(CHAT)
+    prefetcher.drop(CHAT)
+    first, second = _track(1), _track(2)
+    append_track(CHAT, first)
+    append_track(CHAT, second)
+    prefetcher._ready[CHAT] = {second.webpage_url: ("https://cdn.example/song2.m4a", time.monotonic())}
+
+    pop_from_queue(CHAT)
+
+    assert prefetcher.take(CHAT, second) == "https://cdn.example/song2.m4a"
+    clear_queue(CHAT)
+
+
+def test_edit_drops_tracks_no_longer_queued():
+    clear_queue(CHAT)
+    prefetcher.drop(CHAT)
+    first, second = _track(1), _track(2)
+    append_track(CHAT, first)
+    append_track(CHAT, second)
+    prefetcher._ready[CHAT] = {second.webpage_url: ("https://cdn.example/song2.m4a", time.monotonic())}
+
+    clear_queue(CHAT)
+
+    assert prefetcher.take(CHAT, second) is None
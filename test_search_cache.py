@@ -0,0 +1,87 @@
+import asyncio
+
+import utils.search_cache as search_cache_module
+from utils.search_cache import SearchCache, SearchResults
+
+
+def _rows(n: int) -> list[dict]:
+    return [{"title": f"Result {i}", "webpage_url": f"https://youtu.be/r{i}"} for i in range(n)]
+
+
+def _fake_search(monkeypatch, n: int = 12) -> list:
+    calls = []
+
+    async def search_tracks(query, is_video=False, limit=10):
+        calls.append(query)
+        await asyncio.sleep(0)
+        return _rows(n)
+
+    monkeypatch.setattr(search_cache_module, "search_tracks", search_tracks)
+    return calls
+
+
+def test_normalized_queries_share_one_search(monkeypatch):
+    calls = _fake_search(monkeypatch)
+    cache = SearchCache(ttl=600)
+
+    async def run():
+        first = await cache.search("Lo-Fi  Beats share")
+        second = await cache.search("lo-fi beats SHARE")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert len(calls) == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_audio_and_video_are_cached_separately(monkeypatch):
+    calls = _fake_search(monkeypatch)
+    cache = SearchCache(ttl=600)
+
+    async def run():
+        return await cache.search("kind split"), await cache.search("kind split", is_video=True)
+
+    audio, video = asyncio.run(run())
+    assert audio is not video
+    assert len(calls) == 2
+
+
+def test_expired_entries_are_refetched(monkeypatch):
+    calls = _fake_search(monkeypatch)
+    cache = SearchCache(ttl=60)
+
+    async def run():
+        first = await cache.search("ttl query")
+        first.created -= 120
+        assert not cache.fresh(first)
+        return first, await cache.search("ttl query")
+
+    first, second = asyncio.run(run())
+    assert first is not second
+    assert len(calls) == 2
+
+
+def test_lru_drops_least_recently_used(monkeypatch):
+    _fake_search(monkeypatch)
+    cache = SearchCache(ttl=600, max_entries=2)
+
+    async def run():
+        await cache.search("lru one")
+        await cache.search("lru two")
+        cache.get("lru one")
+        await cache.search("lru three")
+
+    asyncio.run(run())
+    assert cache.get("lru two") is None
+    assert cache.get("lru one") is not None and cache.get("lru three") is not None
+    assert cache.evictions == 1
+
+
+def test_pagination():
+    results = SearchResults("a:paging", _rows(12))
+
+    assert results.pages(5) == 3
+    assert [r["title"] for r in results.page(2, 5)] == ["Result 10", "Result 11"]
+    assert results.page(3, 5) == ()
+    assert SearchResults("a:empty", []).pages(5) == 1
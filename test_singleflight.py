@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from utils.extractor import ExtractionBusy
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.leaders == 1 and flight.coalesced == 4
+
+
+def test_not_found_is_cached_for_the_negative_ttl():
+    flight = SingleFlight("test", negative_ttl=60.0)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return None
+
+    async def run():
+        first = await flight.do("key", fetch)
+        second = await flight.do("key", fetch)
+        flight.forget("key")
+        third = await flight.do("key", fetch)
+        return first, second, third
+
+    assert asyncio.run(run()) == (None, None, None)
+    assert len(calls) == 2
+    assert flight.negative_hits == 1
+
+
+def test_errors_are_replayed_but_transient_ones_are_retried():
+    flight = SingleFlight("test", negative_ttl=60.0, transient=(ExtractionBusy,))
+    calls = []
+
+    async def broken():
+        calls.append("broken")
+        raise ValueError("unavailable")
+
+    async def busy():
+        calls.append("busy")
+        raise ExtractionBusy()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await flight.do("bad", broken)
+            with pytest.raises(ExtractionBusy):
+                await flight.do("busy", busy)
+
+    asyncio.run(run())
+    assert calls.count("broken") == 1
+    assert calls.count("busy") == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
@@ -0,0 +1,226 @@
+"""
+Auralyx Music - Local Audio Cache
+Optional content-addressed store of transcoded Opus files under
+.cache/audio. Each track is downloaded once, keyed by a hash of its
+source ID, and evicted LRU-first once the disk budget is exceeded.
+Tracks still sitting in any queue are pinned and never evicted.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from config import AUDIO_CACHE_ENABLED, AUDIO_CACHE_GB, AUDIO_CACHE_WORKERS
+from utils.prefetch import track_source
+from utils.queue import add_queue_listener, queue_view
+
+logger = logging.getLogger(__name__)
+
+_EXT = ".opus"
+
+
+def _cache_dir() -> str:
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "audio")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def content_key(source: str) -> str:
+    """Content address for a source ID."""
+    return hashlib.sha256((source or "").encode("utf-8")).hexdigest()[:32]
+
+
+class AudioCache:
+    """Disk-budgeted LRU of Opus files with pinning for queued tracks."""
+
+    def __init__(self, enabled: bool = False, budget_bytes: int = 2 * 1024 ** 3, workers: int = 2):
+        self.enabled = enabled
+        self.budget_bytes = budget_bytes
+        self._index: OrderedDict[str, int] = OrderedDict()  # key -> size, oldest first
+        self._bytes = 0
+        self._pins: dict[int, set[str]] = {}
+        self._filling: dict[str, asyncio.Task] = {}
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._workers = max(1, workers)
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+        self.fill_errors = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(_cache_dir(), key + _EXT)
+
+    def _load_index(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        entries = []
+        for name in os.listdir(_cache_dir()):
+            path = os.path.join(_cache_dir(), name)
+            if name.endswith(".part"):
+                # Leftover from an interrupted transcode.
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(_EXT):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[: -len(_EXT)], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def _pinned(self) -> set[str]:
+        pinned: set[str] = set()
+        for keys in self._pins.values():
+            pinned |= keys
+        return pinned
+
+    def on_queue_change(self, chat_id: int):
+        """Queue listener: pin every track still queued in this chat."""
+        if not self.enabled:
+            return
+        keys = {content_key(track_source(t)) for t in queue_view(chat_id) if track_source(t)}
+        if keys:
+            self._pins[chat_id] = keys
+        else:
+            self._pins.pop(chat_id, None)
+
+    def lookup(self, track: dict) -> Optional[str]:
+        """Return the local file for a track, if cached."""
+        if not self.enabled or track.get("is_video"):
+            return None
+        self._load_index()
+        source = track_source(track)
+        key = content_key(source) if source else ""
+        if key in self._index:
+            path = self._path(key)
+            if os.path.exists(path):
+                self._index.move_to_end(key)
+                try:
+                    os.utime(path)  # persist LRU order across restarts
+                except OSError:
+                    pass
+                self.hits += 1
+                return path
+            self._bytes -= self._index.pop(key)
+        self.misses += 1
+        return None
+
+    def schedule_fill(self, track: dict, media_url: str):
+        """Download and transcode a track in the background if not cached yet."""
+        if not self.enabled or track.get("is_video") or not media_url:
+            return
+        source = track_source(track)
+        if not source:
+            return
+        self._load_index()
+        key = content_key(source)
+        if key in self._index or key in self._filling:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._filling[key] = loop.create_task(self._fill(key, media_url))
+
+    async def _fill(self, key: str, media_url: str):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._workers)
+        final = self._path(key)
+        part = final + ".part"
+        proc = None
+        try:
+            async with self._sem:
+                proc = await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-nostdin", "-loglevel", "error", "-i", media_url,
+                    "-vn", "-ac", "2", "-ar", "48000", "-c:a", "libopus", "-b:a", "128k",
+                    "-f", "opus", "-y", part,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                rc = await proc.wait()
+            if rc != 0 or not os.path.exists(part):
+                raise RuntimeError(f"ffmpeg exited with {rc}")
+            os.replace(part, final)
+            size = os.path.getsize(final)
+            self._index[key] = size
+            self._bytes += size
+            self.fills += 1
+            self._evict()
+        except asyncio.CancelledError:
+            # Reap the encoder first, or it keeps writing the .part file removed below.
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        except Exception as e:
+            self.fill_errors += 1
+            logger.debug("Audio cache fill failed for %s: %s", key, e)
+        finally:
+            self._filling.pop(key, None)
+            if os.path.exists(part):
+                try:
+                    os.remove(part)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        if self._bytes <= self.budget_bytes:
+            return
+        pinned = self._pinned()
+        for key in list(self._index):
+            if self._bytes <= self.budget_bytes:
+                break
+            if key in pinned:
+                continue
+            size = self._index.pop(key)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    async def shutdown(self):
+        """Cancel in-flight fills and wait for their encoders to exit."""
+        tasks = list(self._filling.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._filling.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "budget_bytes": self.budget_bytes,
+            "filling": len(self._filling),
+            "pinned": len(self._pinned()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fills": self.fills,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# Global singleton
+audio_cache = AudioCache(
+    enabled=AUDIO_CACHE_ENABLED,
+    budget_bytes=int(AUDIO_CACHE_GB * 1024 ** 3),
+    workers=AUDIO_CACHE_WORKERS,
+)
+add_queue_listener(audio_cache.on_queue_change)
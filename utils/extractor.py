@@ -0,0 +1,355 @@
+"""
+Auralyx Music - Extraction Service
+Bounded pool of long-lived yt-dlp workers behind a priority queue.
+Interactive /play and /search jobs run ahead of autoplay and prefetch,
+the queue applies backpressure when full, and every job has a deadline.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from config import EXTRACT_MAX_PENDING, EXTRACT_TIMEOUT, EXTRACT_USE_PROCESSES, EXTRACT_WORKERS
+from utils.quality import quality_governor
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AUTOPLAY = 1
+PRIORITY_PREFETCH = 2
+
+
+class ExtractionBusy(Exception):
+    """Raised when the extraction queue is full."""
+
+
+# ── Worker side (runs inside pool processes) ──
+# One YoutubeDL per option set, reused for every job the worker handles.
+# YoutubeDL is not thread-safe, so in thread mode each worker thread keeps
+# its own set; a pool process has a single worker thread either way.
+_ydl_local = threading.local()
+
+
+def _get_ydl(fmt: str, search: bool = False):
+    instances = getattr(_ydl_local, "instances", None)
+    if instances is None:
+        instances = _ydl_local.instances = {}
+    key = (fmt, search)
+    ydl = instances.get(key)
+    if ydl is None:
+        import yt_dlp
+
+        opts = {
+            "format": fmt,
+            "noplaylist": True,
+            "quiet": True,
+            "no_warnings": True,
+            "cachedir": False,
+            "source_address": "0.0.0.0",  # force IPv4 on cloud hosts
+            "retries": 2,
+            "socket_timeout": 15,
+        }
+        if search:
+            opts["default_search"] = "ytsearch"
+        ydl = yt_dlp.YoutubeDL(opts)
+        instances[key] = ydl
+    return ydl
+
+
+def _job_track(query: str, fmt: str, is_video: bool) -> Optional[dict]:
+    """Extract the first matching track for a query or URL."""
+    ydl = _get_ydl(fmt, search=True)
+    search_inputs = [query] if query.startswith("http") else [
+        f"ytsearch1:{query}",
+        f"ytsearch5:{query}",
+        f"ytsearch:{query}",
+    ]
+
+    last_err = None
+    for search_query in search_inputs:
+        try:
+            info = ydl.extract_info(search_query, download=False)
+            if not info:
+                continue
+            if "entries" in info:
+                entries = info.get("entries") or []
+                info = entries[0] if entries else None
+            if not info:
+                continue
+            return {
+                "title": info.get("title", "Unknown"),
+                "url": info.get("url"),
+                "webpage_url": info.get("webpage_url") or info.get("original_url") or query,
+                "duration": info.get("duration", 0),
+                "thumbnail": info.get("thumbnail"),
+                "is_video": is_video,
+                "format": fmt,
+            }
+        except Exception as e:
+            last_err = e
+            continue
+    if last_err:
+        raise last_err
+    return None
+
+
+def _job_search(query: str, fmt: str, is_video: bool, limit: int) -> list[dict]:
+    """Return up to `limit` search results."""
+    ydl = _get_ydl(fmt)
+    info = ydl.extract_info(f"ytsearch{limit}:{query}", download=False)
+    rows = []
+    for entry in (info.get("entries") or [])[:limit]:
+        rows.append(
+            {
+                "title": entry.get("title", "Unknown"),
+                "url": entry.get("url"),
+                "webpage_url": entry.get("webpage_url") or entry.get("original_url"),
+                "duration": int(entry.get("duration", 0) or 0),
+                "is_video": is_video,
+            }
+        )
+    return rows
+
+
+def _job_resolve(url: str, fmt: str) -> Optional[str]:
+    """Resolve a watch URL to a direct media URL."""
+    ydl = _get_ydl(fmt)
+    info = ydl.extract_info(url, download=False)
+    if "entries" in info:
+        info = info["entries"][0]
+    return info.get("url")
+
+
+def _job_related(seed_title: str, fmt: str, is_video: bool) -> Optional[dict]:
+    """Fetch one related track for autoplay."""
+    ydl = _get_ydl(fmt, search=True)
+    info = ydl.extract_info(f"ytsearch1:{seed_title} related", download=False)
+    if "entries" in info and info["entries"]:
+        info = info["entries"][0]
+    return {
+        "title": info.get("title", "Autoplay"),
+        "url": info.get("url"),
+        "webpage_url": info.get("webpage_url") or info.get("original_url"),
+        "duration": int(info.get("duration", 0) or 0),
+        "requested_by": 0,
+        "is_video": is_video,
+    }
+
+
+def _job_playlist_page(url: str, start: int, count: int) -> dict:
+    """Flat-extract entries start..start+count-1 (1-based) of a playlist, without resolving media."""
+    import yt_dlp
+
+    opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "cachedir": False,
+        "source_address": "0.0.0.0",
+        "socket_timeout": 15,
+        "extract_flat": "in_playlist",
+        "playlist_items": f"{start}-{start + count - 1}",
+    }
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False) or {}
+    raw = list(info.get("entries") or [])
+    entries = []
+    for entry in raw:
+        if not entry:
+            continue
+        page = entry.get("url") or ""
+        if not page.startswith("http"):
+            page = f"https://www.youtube.com/watch?v={entry['id']}" if entry.get("id") else ""
+        if page:
+            entries.append(
+                {
+                    "title": entry.get("title") or "Unknown",
+                    "webpage_url": page,
+                    "duration": int(entry.get("duration") or 0),
+                }
+            )
+    return {"title": info.get("title") or "", "entries": entries, "done": len(raw) < count}
+
+
+# ── Event-loop side ──
+class ExtractionPool:
+    """Priority-ordered dispatcher in front of a bounded worker executor."""
+
+    def __init__(self, workers: int = 3, max_pending: int = 64, timeout: float = 45.0, use_processes: bool = True):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.timeout = timeout
+        self.use_processes = use_processes
+        self._executor = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._dispatchers: list[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._latencies: deque[float] = deque(maxlen=256)
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _new_executor(self):
+        if self.use_processes:
+            try:
+                return ProcessPoolExecutor(max_workers=self.workers)
+            except Exception as e:
+                logger.warning("Process pool unavailable, using threads for extraction: %s", e)
+                self.use_processes = False
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract")
+
+    def start(self):
+        """Start dispatchers. Safe to call repeatedly."""
+        if self._dispatchers:
+            return
+        self._executor = self._new_executor()
+        self._queue = asyncio.PriorityQueue()
+        self._dispatchers = [asyncio.create_task(self._dispatch_loop()) for _ in range(self.workers)]
+        logger.info(
+            "Extraction pool started (%s workers, %s, max pending %s)",
+            self.workers,
+            "processes" if self.use_processes else "threads",
+            self.max_pending,
+        )
+
+    async def stop(self):
+        """Cancel dispatchers and shut the worker executor down."""
+        for task in self._dispatchers:
+            task.cancel()
+        self._dispatchers = []
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._queue = None
+
+    async def _dispatch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                _, _, fn, args, future, deadline, enqueued = await self._queue.get()
+                if future.done():
+                    continue
+                if time.monotonic() >= deadline:
+                    self.timeouts += 1
+                    future.set_exception(asyncio.TimeoutError())
+                    continue
+
+                self._running += 1
+                executor = self._executor
+                try:
+                    result = await loop.run_in_executor(executor, fn, *args)
+                    if not future.done():
+                        future.set_result(result)
+                    self.completed += 1
+                except BrokenProcessPool as e:
+                    self.failed += 1
+                    if self._executor is executor:
+                        # Other dispatchers see the same break; only the first replaces the pool.
+                        logger.error("Extraction worker died, restarting pool: %s", e)
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self._executor = self._new_executor()
+                    if not future.done():
+                        future.set_exception(e)
+                except Exception as e:
+                    self.failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    self._running -= 1
+                    self._latencies.append(time.monotonic() - enqueued)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Extraction dispatcher error: %s", e)
+
+    async def submit(self, fn, *args, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None):
+        """Queue a worker job and await its result."""
+        self.start()
+        # Background work gets half the queue so it can never crowd out /play.
+        limit = self.max_pending if priority == PRIORITY_INTERACTIVE else self.max_pending // 2
+        if self._queue.qsize() >= limit:
+            self.rejected += 1
+            raise ExtractionBusy("Extraction queue is full")
+
+        timeout = timeout or self.timeout
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        self._queue.put_nowait((priority, next(self._seq), fn, args, future, now + timeout, now))
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def stats(self) -> dict:
+        lat = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            return lat[min(len(lat) - 1, int(len(lat) * p))] if lat else 0.0
+
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "running": self._running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "p50_ms": pct(0.50) * 1000,
+            "p95_ms": pct(0.95) * 1000,
+        }
+
+
+# Global singleton
+extraction_pool = ExtractionPool(
+    workers=EXTRACT_WORKERS,
+    max_pending=EXTRACT_MAX_PENDING,
+    timeout=EXTRACT_TIMEOUT,
+    use_processes=EXTRACT_USE_PROCESSES,
+)
+
+
+def _format(is_video: bool) -> str:
+    # Ladder rung for the current host load; see utils/quality.py.
+    return quality_governor.format(is_video)
+
+
+async def extract_track(query: str, is_video: bool = False, priority: int = PRIORITY_INTERACTIVE) -> Optional[dict]:
+    """Extract track metadata and a direct media URL."""
+    return await extraction_pool.submit(_job_track, query, _format(is_video), is_video, priority=priority)
+
+
+async def search_tracks(
+    query: str,
+    is_video: bool = False,
+    limit: int = 5,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> list[dict]:
+    """Search for up to `limit` tracks."""
+    fmt = _format(True) if is_video else "bestaudio/best"
+    return await extraction_pool.submit(_job_search, query, fmt, is_video, limit, priority=priority)
+
+
+async def resolve_url(url: str, is_video: bool = False, priority: int = PRIORITY_INTERACTIVE) -> Optional[str]:
+    """Resolve a watch URL to a direct media URL."""
+    return await extraction_pool.submit(_job_resolve, url, _format(is_video), priority=priority)
+
+
+async def playlist_page(url: str, start: int, count: int, priority: int = PRIORITY_INTERACTIVE) -> dict:
+    """One page of flat playlist entries: {"title", "entries", "done"}."""
+    return await extraction_pool.submit(_job_playlist_page, url, start, count, priority=priority)
+
+
+async def related_track(seed_title: str, is_video: bool = False) -> Optional[dict]:
+    """Fetch one related track for autoplay."""
+    fmt = _format(is_video)
+    return await extraction_pool.submit(_job_related, seed_title, fmt, is_video, priority=PRIORITY_AUTOPLAY)
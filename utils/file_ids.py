@@ -0,0 +1,143 @@
+"""
+Auralyx Music - Telegram Media Reference Cache
+Remembers the file_id Telegram returns for the first upload of a photo,
+keyed by its source URL or, for local files, a content hash. Later sends
+reuse the file_id, so Telegram neither refetches nor re-receives the bytes.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from database.file_id_sqlite import delete_file_id, load_file_ids, put_file_id
+
+logger = logging.getLogger(__name__)
+
+_MAX_ENTRIES = 20000
+_MAX_HASHES = 256  # local files hashed; only a few panel images in practice
+
+# Telegram errors meaning the stored file_id itself is unusable.
+_STALE_ERRORS = frozenset({
+    "FileIdInvalid",
+    "FileReferenceExpired",
+    "FileReferenceInvalid",
+    "FileReferenceEmpty",
+    "MediaEmpty",
+    "MediaInvalid",
+    "PhotoInvalid",
+})
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileIdCache:
+    """source/hash -> file_id, LRU in memory and persisted to SQLite."""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._ids: OrderedDict[str, str] = OrderedDict()
+        self._hashes: OrderedDict[tuple[str, float, int], str] = OrderedDict()  # (path, mtime, size) -> sha1
+        self.hits = 0
+        self.uploads = 0
+        self.stale = 0
+
+    async def load(self):
+        """Warm memory from disk. Call once at startup."""
+        try:
+            rows = await load_file_ids(self.max_entries)
+        except Exception as e:
+            logger.warning("File id cache load failed: %s", e)
+            return
+        for ref, file_id in reversed(list(rows.items())):
+            self._ids[ref] = file_id
+        logger.info("Loaded %d cached Telegram file ids", len(rows))
+
+    async def ref_for(self, source: str) -> Optional[str]:
+        """Cache key for a photo source: the URL, or a hash of a local file."""
+        if not source:
+            return None
+        if source.startswith("http"):
+            return f"url:{source}"
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        key = (os.path.abspath(source), stat.st_mtime, stat.st_size)
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = self._hashes[key] = await asyncio.to_thread(_hash_file, source)
+            while len(self._hashes) > _MAX_HASHES:
+                self._hashes.popitem(last=False)
+        else:
+            self._hashes.move_to_end(key)
+        return f"sha1:{digest}"
+
+    def get(self, ref: str) -> Optional[str]:
+        file_id = self._ids.get(ref)
+        if file_id is not None:
+            self._ids.move_to_end(ref)
+        return file_id
+
+    def put(self, ref: str, file_id: str):
+        self._ids[ref] = file_id
+        self._ids.move_to_end(ref)
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+        asyncio.get_running_loop().create_task(self._persist(ref, file_id))
+
+    async def _persist(self, ref: str, file_id: str):
+        try:
+            await put_file_id(ref, file_id)
+        except Exception as e:
+            logger.debug("File id persist failed for %s: %s", ref, e)
+
+    def forget(self, ref: str):
+        if self._ids.pop(ref, None) is not None:
+            self.stale += 1
+            asyncio.get_running_loop().create_task(delete_file_id(ref))
+
+    async def reply_photo(self, message, photo: str, **kwargs):
+        """message.reply_photo that sends a cached file_id when one exists."""
+        ref = await self.ref_for(photo)
+        file_id = self.get(ref) if ref else None
+        if file_id:
+            try:
+                sent = await message.reply_photo(photo=file_id, **kwargs)
+                self.hits += 1
+                return sent
+            except Exception as e:
+                if type(e).__name__ not in _STALE_ERRORS:
+                    raise  # flood wait, no rights, network: the file id is still good
+                # Bot token changed or the reference was invalidated; upload again.
+                logger.debug("Cached file id rejected for %s: %s", ref, e)
+                self.forget(ref)
+
+        sent = await message.reply_photo(photo=photo, **kwargs)
+        self.uploads += 1
+        photo_obj = getattr(sent, "photo", None)
+        if ref and photo_obj is not None and getattr(photo_obj, "file_id", None):
+            self.put(ref, photo_obj.file_id)
+        return sent
+
+    def stats(self) -> dict:
+        sends = self.hits + self.uploads
+        return {
+            "entries": len(self._ids),
+            "hits": self.hits,
+            "uploads": self.uploads,
+            "stale": self.stale,
+            "hit_rate": (self.hits / sends) if sends else 0.0,
+        }
+
+
+# Global singleton
+file_ids = FileIdCache()
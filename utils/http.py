@@ -0,0 +1,96 @@
+"""
+Auralyx Music - Shared HTTP Client
+One app-lifetime aiohttp session with a pooled connector, so API calls
+reuse connections instead of paying TCP/TLS setup per request. The
+connector caps total and per-host concurrency; every call has a timeout.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from config import HTTP_MAX_CONNECTIONS, HTTP_PER_HOST, HTTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Lazily started, explicitly closed pooled HTTP session."""
+
+    def __init__(self, limit: int = 100, per_host: int = 8, timeout: float = 10.0):
+        self.limit = limit
+        self.per_host = per_host
+        self.timeout = timeout
+        self._session = None
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._total_time = 0.0
+
+    async def start(self):
+        """Create the session. Safe to call more than once."""
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                return
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.per_host,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "AuralyxMusic/1.0"},
+            )
+            logger.info("HTTP client started (limit=%d, per_host=%d)", self.limit, self.per_host)
+
+    async def close(self):
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+            self._session = None
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[int, Any]:
+        """GET a JSON endpoint. Returns (status, parsed body or None)."""
+        if self._session is None or self._session.closed:
+            await self.start()
+        import aiohttp
+
+        started = time.monotonic()
+        self.requests += 1
+        try:
+            kwargs = {"params": params}
+            if timeout is not None:
+                kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+            async with self._session.get(url, **kwargs) as resp:
+                if resp.status != 200:
+                    return resp.status, None
+                return resp.status, await resp.json(content_type=None)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._total_time += time.monotonic() - started
+
+    def stats(self) -> dict:
+        connector = self._session.connector if self._session is not None else None
+        return {
+            "open": self._session is not None and not self._session.closed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": (self._total_time / self.requests * 1000) if self.requests else 0.0,
+            "pooled": len(getattr(connector, "_conns", {}) or {}) if connector else 0,
+        }
+
+
+# Global singleton
+http_client = HttpClient(limit=HTTP_MAX_CONNECTIONS, per_host=HTTP_PER_HOST, timeout=HTTP_TIMEOUT)
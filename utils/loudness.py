@@ -0,0 +1,222 @@
+"""
+Auralyx Music - Loudness Normalization
+Measures each track's integrated loudness (EBU R128) once, in a background
+FFmpeg pass, and caches it by source key. Playback turns the measurement and
+the chat's default_volume into one static gain for the decoder's volume
+filter, so no live two-pass loudnorm runs per stream.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import re
+from typing import Optional
+
+from config import (
+    LOUDNESS_ANALYZE_SECONDS,
+    LOUDNESS_ENABLED,
+    LOUDNESS_LOOKAHEAD,
+    LOUDNESS_MAX_CPU,
+    LOUDNESS_MAX_GAIN,
+    LOUDNESS_TARGET,
+)
+from database.loudness_sqlite import load_loudness, put_loudness
+from utils.audio_cache import audio_cache, content_key
+from utils.extractor import PRIORITY_PREFETCH
+from utils.music_settings import fetch_settings
+from utils.prefetch import track_source
+from utils.queue import add_queue_listener, queue_view
+from utils.resource_guard import get_resource_stats
+
+logger = logging.getLogger(__name__)
+
+_MAX_ENTRIES = 100000
+_PEAK_CEILING = -1.0      # dBTP left after gain, so boosts never clip
+_CPU_BACKOFF = 5.0        # seconds the worker rests after a skipped job
+_PLAYING_PRIORITY = 50    # the current track matters for replays, after queued ones
+_ANALYZE_TIMEOUT = 120.0
+
+_INTEGRATED = re.compile(r"I:\s+(-?[\d.]+) LUFS")
+_PEAK = re.compile(r"Peak:\s+(-?[\d.]+) dBFS")
+
+
+def volume_to_db(volume: int) -> float:
+    """default_volume percentage (1-200) as a gain in dB."""
+    return 20 * math.log10(max(1, min(int(volume or 100), 200)) / 100)
+
+
+class LoudnessAnalyzer:
+    """Priority-ordered background measurement with a persisted gain cache."""
+
+    def __init__(self, enabled: bool = True, target: float = -14.0, max_gain: float = 12.0):
+        self.enabled = enabled
+        self.target = target
+        self.max_gain = max_gain
+        self._levels: dict[str, tuple[float, float]] = {}  # key -> (integrated LUFS, true peak)
+        self._jobs: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._pending: dict[str, int] = {}  # key -> best queued priority
+        self._seq = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.analyzed = 0
+        self.failed = 0
+        self.skipped_cpu = 0
+        self.applied = 0
+
+    async def load(self):
+        try:
+            self._levels.update(await load_loudness(_MAX_ENTRIES))
+        except Exception as e:
+            logger.warning("Loudness cache load failed: %s", e)
+            return
+        logger.info("Loaded loudness for %d tracks", len(self._levels))
+
+    # ── Gain ──
+
+    def track_gain(self, track: dict) -> float:
+        """Normalization gain in dB for a track, 0.0 until it has been measured."""
+        source = track_source(track) if track else ""
+        level = self._levels.get(content_key(source)) if source else None
+        if level is None:
+            return 0.0
+        integrated, peak = level
+        gain = self.target - integrated
+        gain = min(gain, _PEAK_CEILING - peak)
+        return max(-self.max_gain, min(self.max_gain, gain))
+
+    async def playback_gain(self, chat_id: int, track: dict) -> float:
+        """Decoder gain: loudness normalization plus the chat's default_volume."""
+        try:
+            volume = (await fetch_settings(chat_id)).get("default_volume", 100)
+        except Exception:
+            volume = 100
+        gain = volume_to_db(volume)
+        if self.enabled and track and not track.get("is_video"):
+            gain += self.track_gain(track)
+        return gain
+
+    def note_started(self, track: dict):
+        """Count a decoder that actually started playing track with its normalization gain."""
+        if self.enabled and track and not track.get("is_video") and self.track_gain(track):
+            self.applied += 1
+
+    # ── Scheduling ──
+
+    def schedule(self, track: dict, priority: int):
+        """Queue a track for measurement; lower priority numbers run first."""
+        if not self.enabled or not track or track.get("is_video") or not track.get("duration"):
+            return
+        source = track_source(track)
+        if not source:
+            return
+        key = content_key(source)
+        if key in self._levels or self._pending.get(key, priority + 1) <= priority:
+            return
+        self._pending[key] = priority
+        self._jobs.put_nowait((priority, next(self._seq), key, track))
+
+    def on_queue_change(self, chat_id: int):
+        """Queue listener: measure the next few queued tracks ahead of playback."""
+        upcoming = queue_view(chat_id)[: LOUDNESS_LOOKAHEAD + 1]
+        for position, track in enumerate(upcoming):
+            self.schedule(track, position if position else _PLAYING_PRIORITY)
+
+    # ── Worker ──
+
+    async def _media_for(self, track: dict) -> Optional[str]:
+        from plugins.music.player import _resolve_stream_url
+        from utils.url_refresh import playable_source
+
+        return audio_cache.lookup(track) or await _resolve_stream_url(
+            playable_source(track), priority=PRIORITY_PREFETCH
+        )
+
+    async def _measure(self, media: str) -> Optional[tuple[float, float]]:
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-hide_banner", "-nostats", "-threads", "1",
+            "-t", str(LOUDNESS_ANALYZE_SECONDS), "-i", media, "-vn",
+            "-af", "ebur128=peak=true:framelog=verbose", "-f", "null", "-",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, err = await asyncio.wait_for(proc.communicate(), timeout=_ANALYZE_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            return None
+        # The summary comes last; earlier matches are per-frame noise if any.
+        text = err.decode("utf-8", "ignore")
+        integrated = _INTEGRATED.findall(text)
+        peak = _PEAK.findall(text)
+        if proc.returncode != 0 or not integrated:
+            return None
+        value = float(integrated[-1])
+        if value <= -70:
+            return None  # silence or a failed decode; leave the track untouched
+        return value, float(peak[-1]) if peak else 0.0
+
+    async def _run_job(self, key: str, track: dict):
+        media = await self._media_for(track)
+        level = await self._measure(media) if media else None
+        if level is None:
+            self.failed += 1
+            return
+        self._levels[key] = level
+        if len(self._levels) > _MAX_ENTRIES:
+            self._levels.pop(next(iter(self._levels)))
+        self.analyzed += 1
+        try:
+            await put_loudness(key, *level)
+        except Exception as e:
+            logger.debug("Loudness persist failed for %s: %s", key, e)
+
+    async def _worker(self):
+        while True:
+            priority, _, key, track = await self._jobs.get()
+            if self._pending.get(key) != priority:
+                continue  # superseded by a higher-priority entry
+            try:
+                if get_resource_stats()["cpu"] > LOUDNESS_MAX_CPU:
+                    # The next queue change schedules it again.
+                    self.skipped_cpu += 1
+                    await asyncio.sleep(_CPU_BACKOFF)
+                    continue
+                await self._run_job(key, track)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.debug("Loudness analysis failed for %s: %s", key, e)
+            finally:
+                self._pending.pop(key, None)
+
+    def start(self):
+        if not self.enabled:
+            return
+        add_queue_listener(self.on_queue_change)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "measured": len(self._levels),
+            "pending": len(self._pending),
+            "analyzed": self.analyzed,
+            "failed": self.failed,
+            "skipped_cpu": self.skipped_cpu,
+            "applied": self.applied,
+        }
+
+
+# Global singleton
+loudness = LoudnessAnalyzer(enabled=LOUDNESS_ENABLED, target=LOUDNESS_TARGET, max_gain=LOUDNESS_MAX_GAIN)
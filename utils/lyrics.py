@@ -0,0 +1,145 @@
+"""
+Auralyx Music - Lyrics Cache
+Lyrics lookups keyed by normalized title: memory LRU, then SQLite, then the
+lyrics API over the shared HTTP client. Tracks that start playing are looked
+up in the background so /lyrics during the song is answered from cache.
+"""
+
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from typing import Optional
+
+from config import LYRICS_API_URL, LYRICS_CACHE_TTL, LYRICS_NEGATIVE_TTL, LYRICS_PREFETCH
+from database.lyrics_sqlite import get_lyrics, put_lyrics
+from database.mongo import add_play_listener
+from utils.http import http_client
+from utils.singleflight import lyrics_flight
+
+logger = logging.getLogger(__name__)
+
+_MAX_MEMORY = 300
+_PREFETCH_CONCURRENCY = 2
+
+_BRACKETS = re.compile(r"[\(\[\{][^\)\]\}]*[\)\]\}]")
+_NOISE = re.compile(
+    r"\b(official|music|lyrics?|lyrical|video|audio|hd|4k|full song|visualizer|remastered)\b"
+)
+_FEAT = re.compile(r"\s+(ft\.?|feat\.?|featuring)\s+.*$")
+_NON_WORD = re.compile(r"[^\w\s-]+")
+
+
+def normalize_title(title: str) -> str:
+    """Reduce a video title to the part that identifies the song."""
+    text = (title or "").lower()
+    text = _BRACKETS.sub(" ", text)
+    text = _FEAT.sub("", text)
+    text = _NOISE.sub(" ", text)
+    text = _NON_WORD.sub(" ", text)
+    return " ".join(text.split())[:120]
+
+
+class LyricsCache:
+    """Two-tier lyrics cache with shared in-flight lookups and cached misses."""
+
+    def __init__(self, max_memory: int = 300):
+        self.max_memory = max_memory
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._prefetch_gate = asyncio.Semaphore(_PREFETCH_CONCURRENCY)
+        self._prefetching: set[str] = set()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def _remember(self, key: str, entry: dict):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    async def _fetch(self, key: str) -> Optional[dict]:
+        status, data = await http_client.get_json(LYRICS_API_URL, params={"title": key})
+        if status not in (200, 404):
+            # Rate limit or server error: not an answer about this song. Returning None leaves
+            # only lyrics_flight's short negative entry, so nothing is persisted.
+            logger.debug("Lyrics API returned %s for %r", status, key)
+            return None
+        data = data if status == 200 and isinstance(data, dict) else {}
+        entry = {
+            "title": data.get("title") or "",
+            "author": data.get("author") or "",
+            "lyrics": data.get("lyrics") or "",
+        }
+        ttl = LYRICS_CACHE_TTL if entry["lyrics"] else LYRICS_NEGATIVE_TTL
+        try:
+            await put_lyrics(key, entry, ttl)
+        except Exception as e:
+            logger.debug("Lyrics cache write failed for %r: %s", key, e)
+        return entry
+
+    async def get(self, title: str) -> Optional[dict]:
+        """{"title", "author", "lyrics"} for a song, or None when none were found."""
+        key = normalize_title(title)
+        if not key:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry if entry["lyrics"] else None
+
+        entry = await get_lyrics(key)
+        if entry is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            entry = await lyrics_flight.do(key, lambda: self._fetch(key))
+            if entry is None:
+                return None
+        self._remember(key, entry)
+        return entry if entry["lyrics"] else None
+
+    async def _prefetch(self, title: str, key: str):
+        try:
+            async with self._prefetch_gate:
+                await self.get(title)
+                self.prefetched += 1
+        except Exception as e:
+            logger.debug("Lyrics prefetch failed for %r: %s", key, e)
+        finally:
+            self._prefetching.discard(key)
+
+    def prefetch(self, title: str):
+        """Look a title up in the background unless it is already cached or pending."""
+        key = normalize_title(title)
+        if not LYRICS_PREFETCH or not key or key in self._memory or key in self._prefetching:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._prefetching.add(key)
+        loop.create_task(self._prefetch(title, key))
+
+    def on_play(self, chat_id: int, track_key: str, doc: dict):
+        """Play listener: warm lyrics for the track that just started."""
+        self.prefetch(doc.get("title", ""))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "memory": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "prefetched": self.prefetched,
+            "hit_rate": ((self.hits + self.disk_hits) / lookups) if lookups else 0.0,
+        }
+
+
+# Global singleton
+lyrics_cache = LyricsCache(max_memory=_MAX_MEMORY)
+add_play_listener(lyrics_cache.on_play)
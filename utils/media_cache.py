@@ -0,0 +1,152 @@
+"""
+Auralyx Music - Media Metadata Cache
+Two-tier cache for yt-dlp results: a bounded in-memory LRU in front of
+the SQLite store, with a separate TTL per field so long-lived metadata
+outlives short-lived signed stream URLs.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import META_CACHE_MAX_BYTES, META_CACHE_MAX_ENTRIES
+from database.media_cache_sqlite import get_entry, put_entry
+
+logger = logging.getLogger(__name__)
+
+# Seconds each field stays valid after extraction.
+FIELD_TTLS: dict[str, int] = {
+    "title": 7 * 86400,
+    "duration": 7 * 86400,
+    "webpage_url": 30 * 86400,
+    "thumbnail": 2 * 86400,
+    "url": 3 * 3600,  # signed media URL
+    "format": 3 * 3600,  # yt-dlp format (quality rung) the URL was resolved with
+}
+
+# Fields that must be fresh for an entry to count as a metadata hit.
+META_FIELDS = ("title", "duration", "webpage_url")
+
+_ENTRY_OVERHEAD = 96  # rough per-entry bookkeeping bytes
+
+
+def make_key(query: str, is_video: bool = False) -> str:
+    """Normalize a query or URL into a cache key (URLs keep their case)."""
+    q = (query or "").strip()
+    if not q.startswith("http"):
+        q = " ".join(q.lower().split())
+    return f"{'v' if is_video else 'a'}:{q}"
+
+
+def _entry_size(key: str, fields: dict) -> int:
+    size = _ENTRY_OVERHEAD + len(key)
+    for name, (value, _) in fields.items():
+        size += len(name) + len(str(value)) + 16
+    return size
+
+
+class MetadataCache:
+    """Bounded LRU (entries + bytes) backed by a persistent SQLite tier."""
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 8 * 1024 * 1024):
+        self._lru: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self._bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _fresh(self, fields: dict, now: float) -> dict:
+        return {k: v for k, (v, exp) in fields.items() if exp > now}
+
+    @staticmethod
+    def _fresh_fields(fields: dict, now: float) -> dict:
+        return {k: (v, exp) for k, (v, exp) in fields.items() if exp > now}
+
+    def _store(self, key: str, fields: dict):
+        old = self._lru.pop(key, None)
+        if old:
+            self._bytes -= old[1]
+        size = _entry_size(key, fields)
+        self._lru[key] = (fields, size)
+        self._bytes += size
+        while self._lru and (len(self._lru) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._lru.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    async def get(self, key: str, required: tuple[str, ...] = META_FIELDS) -> Optional[dict]:
+        """Return fresh fields for key if all required fields are still valid."""
+        now = time.time()
+        entry = self._lru.get(key)
+        if entry:
+            fresh = self._fresh(entry[0], now)
+            if all(f in fresh for f in required):
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return fresh
+
+        try:
+            stored = await get_entry(key)
+        except Exception as e:
+            logger.debug("Metadata cache disk read failed for %s: %s", key, e)
+            stored = None
+
+        if stored:
+            fresh = self._fresh(stored, now)
+            if all(f in fresh for f in required):
+                self._store(key, stored)
+                self.hits += 1
+                self.disk_hits += 1
+                return fresh
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, info: dict, ttl_overrides: Optional[dict] = None):
+        """Store known fields from info, each with its own expiry."""
+        now = time.time()
+        ttls = {**FIELD_TTLS, **(ttl_overrides or {})}
+        entry = self._lru.get(key)
+        if entry:
+            fields = dict(entry[0])
+        else:
+            # Evicted from memory but maybe still on disk: merge, or the write drops its other fields.
+            try:
+                stored = await get_entry(key)
+            except Exception as e:
+                logger.debug("Metadata cache disk read failed for %s: %s", key, e)
+                stored = None
+            fields = self._fresh_fields(stored, now) if stored else {}
+        for name, ttl in ttls.items():
+            value = info.get(name)
+            if value is None or value == "":
+                continue
+            fields[name] = (value, now + ttl)
+        if not fields:
+            return
+
+        self._store(key, fields)
+        try:
+            await put_entry(key, fields)
+        except Exception as e:
+            logger.debug("Metadata cache disk write failed for %s: %s", key, e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# Global singleton
+meta_cache = MetadataCache(max_entries=META_CACHE_MAX_ENTRIES, max_bytes=META_CACHE_MAX_BYTES)
@@ -0,0 +1,231 @@
+"""
+Auralyx Music - Now Playing Panel
+Keeps each chat's player message current (track, elapsed/total, queue length)
+from one background loop. Due edits wait in a heap; each chat is held to a
+minimum edit interval, unchanged renders are skipped, and a FloodWait pauses
+every edit until Telegram allows them again.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Optional
+
+from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import PANEL_EDITS_PER_SECOND, PANEL_MAX_AGE, PANEL_REFRESH_INTERVAL
+from utils.playback import format_time, get_position, is_paused
+from utils.queue import add_queue_listener, current_track, queue_size
+
+logger = logging.getLogger(__name__)
+
+_BAR_WIDTH = 12
+
+
+def _clean(text: str) -> str:
+    return text.replace("*", "").replace("_", "").replace("[", "").replace("]", "").replace("`", "")
+
+
+def _progress_bar(elapsed: float, duration: int) -> str:
+    if not duration:
+        return "─" * _BAR_WIDTH
+    filled = min(_BAR_WIDTH - 1, int(_BAR_WIDTH * elapsed / duration))
+    return "━" * filled + "●" + "─" * (_BAR_WIDTH - filled - 1)
+
+
+def render_panel(chat_id: int) -> Optional[str]:
+    """Player text for a chat's current track, or None when nothing is queued."""
+    track = current_track(chat_id)
+    if not track:
+        return None
+    duration = track.duration
+    elapsed = get_position(chat_id) or 0.0
+    if duration:
+        elapsed = min(elapsed, duration)
+    total = format_time(duration) if duration else "Live"
+    up_next = max(0, queue_size(chat_id) - 1)
+    return (
+        f"**AURALYX PLAYER • {'VIDEO' if track.is_video else 'AUDIO'}**\n"
+        f"`---------------------------`\n"
+        f"Track: `{_clean(track.title)[:38]}`\n"
+        f"`{format_time(elapsed)} {_progress_bar(elapsed, duration)} {total}`\n"
+        f"State: `{'Paused' if is_paused(chat_id) else 'Playing'}` • Up next: `{up_next}`\n"
+        f"`---------------------------`"
+    )
+
+
+def panel_keyboard(chat_id: int) -> InlineKeyboardMarkup:
+    toggle = ("Resume", "resume") if is_paused(chat_id) else ("Pause", "pause")
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton(toggle[0], callback_data=toggle[1]),
+        InlineKeyboardButton("Next", callback_data="next"),
+        InlineKeyboardButton("Stop", callback_data="stop"),
+        InlineKeyboardButton("Queue", callback_data="queue"),
+    ]])
+
+
+class _Panel:
+    __slots__ = ("message_id", "is_caption", "created", "text", "last_edit", "due")
+
+    def __init__(self, message_id: int, is_caption: bool, text: str):
+        self.message_id = message_id
+        self.is_caption = is_caption
+        self.created = time.monotonic()
+        self.text = text
+        self.last_edit = self.created
+        self.due: Optional[float] = None
+
+
+class PanelUpdater:
+    """One live panel per chat, refreshed from a single heap-driven loop."""
+
+    def __init__(self, interval: float = 15.0, edits_per_second: float = 20.0, max_age: float = 3 * 3600):
+        self.interval = max(3.0, interval)
+        self.spacing = 1.0 / max(0.1, edits_per_second)
+        self.max_age = max_age
+        self._panels: dict[int, _Panel] = {}
+        self._heap: list[tuple[float, int, int]] = []  # (due, seq, chat_id); stale entries skipped
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+        self._next_slot = 0.0
+        self._flood_until = 0.0
+        self.edits = 0
+        self.unchanged = 0
+        self.floods = 0
+        self.dropped = 0
+
+    # ── Registration ──
+
+    def register(self, chat_id: int, message, text: str):
+        """Make `message` (sent with `text`) the chat's live panel, replacing any older one."""
+        if message is None:
+            return
+        panel = _Panel(message.id, bool(getattr(message, "photo", None)), text)
+        self._panels[chat_id] = panel
+        self._schedule(chat_id, panel, panel.last_edit + self.interval)
+
+    def unregister(self, chat_id: int):
+        self._panels.pop(chat_id, None)
+
+    def poke(self, chat_id: int):
+        """Refresh a chat's panel as soon as its edit budget allows."""
+        panel = self._panels.get(chat_id)
+        if panel is not None:
+            self._schedule(chat_id, panel, max(time.monotonic(), panel.last_edit + self.interval))
+
+    def _schedule(self, chat_id: int, panel: _Panel, due: float):
+        if panel.due is not None and panel.due <= due:
+            return  # an earlier refresh already covers this one
+        panel.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), chat_id))
+        self._wake.set()
+
+    # ── Loop ──
+
+    async def _loop(self):
+        while True:
+            if not self._heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            due, _, chat_id = self._heap[0]
+            now = time.monotonic()
+            wait = max(due, self._flood_until, self._next_slot) - now
+            if wait > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            panel = self._panels.get(chat_id)
+            if panel is None or panel.due != due:
+                continue
+            panel.due = None
+            try:
+                await self._refresh(chat_id, panel)
+            except Exception as e:
+                logger.debug("Panel refresh failed in %s: %s", chat_id, e)
+                self.unregister(chat_id)
+
+    async def _refresh(self, chat_id: int, panel: _Panel):
+        now = time.monotonic()
+        text = render_panel(chat_id)
+        if text is None or now - panel.created > self.max_age:
+            self.unregister(chat_id)
+            return
+
+        if text == panel.text:
+            self.unchanged += 1
+        else:
+            self._next_slot = now + self.spacing
+            try:
+                if panel.is_caption:
+                    await self._client.edit_message_caption(
+                        chat_id, panel.message_id, text, reply_markup=panel_keyboard(chat_id)
+                    )
+                else:
+                    await self._client.edit_message_text(
+                        chat_id, panel.message_id, text, reply_markup=panel_keyboard(chat_id)
+                    )
+                self.edits += 1
+            except Exception as e:
+                name = type(e).__name__
+                if name == "FloodWait":
+                    wait = float(getattr(e, "value", 0) or 0)
+                    self._flood_until = time.monotonic() + wait
+                    self.floods += 1
+                    logger.warning("Panel edits paused for %.0fs after FloodWait in %s", wait, chat_id)
+                    self._schedule(chat_id, panel, self._flood_until)
+                    return
+                if name != "MessageNotModified":
+                    # Deleted, no rights, or otherwise gone: stop tracking it.
+                    logger.debug("Dropping panel in %s: %s", chat_id, e)
+                    self.dropped += 1
+                    self.unregister(chat_id)
+                    return
+            panel.text = text
+            panel.last_edit = now
+
+        # A paused clock renders the same text; resume pokes the panel.
+        if not is_paused(chat_id):
+            self._schedule(chat_id, panel, now + self.interval)
+
+    def start(self, client):
+        self._client = client
+        add_queue_listener(self.poke)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Now-playing panel updater started.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "panels": len(self._panels),
+            "scheduled": len(self._heap),
+            "edits": self.edits,
+            "unchanged": self.unchanged,
+            "floods": self.floods,
+            "dropped": self.dropped,
+        }
+
+
+# Global singleton
+panel_updater = PanelUpdater(
+    interval=PANEL_REFRESH_INTERVAL,
+    edits_per_second=PANEL_EDITS_PER_SECOND,
+    max_age=PANEL_MAX_AGE,
+)
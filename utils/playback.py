@@ -0,0 +1,65 @@
+"""
+Auralyx Music - Playback Clock
+Per-chat playback position tracking (start offset, pauses) so /seek,
+/nowplaying and the player UI know how far into a track each chat is.
+"""
+
+import time
+from typing import Optional
+
+# chat_id -> [offset_seconds, started_at_monotonic, paused_at_monotonic | None, set_at_monotonic]
+_clocks: dict[int, list] = {}
+
+
+def start_clock(chat_id: int, offset: float = 0.0):
+    """(Re)start the clock for a chat at `offset` seconds into the track."""
+    now = time.monotonic()
+    _clocks[chat_id] = [max(0.0, offset), now, None, now]
+
+
+def pause_clock(chat_id: int):
+    clock = _clocks.get(chat_id)
+    if clock and clock[2] is None:
+        clock[2] = time.monotonic()
+
+
+def resume_clock(chat_id: int):
+    clock = _clocks.get(chat_id)
+    if clock and clock[2] is not None:
+        # Shift the start forward by the time spent paused.
+        clock[1] += time.monotonic() - clock[2]
+        clock[2] = None
+
+
+def clear_clock(chat_id: int):
+    _clocks.pop(chat_id, None)
+
+
+def get_position(chat_id: int) -> Optional[float]:
+    """Seconds into the current track, or None if nothing is tracked."""
+    clock = _clocks.get(chat_id)
+    if not clock:
+        return None
+    offset, started, paused, _ = clock
+    now = paused if paused is not None else time.monotonic()
+    return offset + (now - started)
+
+
+def clock_age(chat_id: int) -> Optional[float]:
+    """Seconds since the clock was last (re)started by a stream start or seek."""
+    clock = _clocks.get(chat_id)
+    return time.monotonic() - clock[3] if clock else None
+
+
+def is_paused(chat_id: int) -> bool:
+    clock = _clocks.get(chat_id)
+    return bool(clock and clock[2] is not None)
+
+
+def format_time(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
@@ -0,0 +1,146 @@
+"""
+Auralyx Music - Look-Ahead Prefetcher
+Resolves the next few queued tracks in the background while the current
+one plays, so skip/advance can swap to an already-playable URL.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from config import PREFETCH_DEPTH, PREFETCH_TTL
+from utils.extractor import PRIORITY_PREFETCH
+from utils.queue import add_queue_listener, queue_view
+from utils.url_refresh import parse_expiry
+
+logger = logging.getLogger(__name__)
+
+_DEBOUNCE = 0.5  # let bursts of queue edits settle before resolving
+
+
+def track_source(track: dict) -> str:
+    """Stable identifier used to resolve a track (page URL preferred)."""
+    return track.get("webpage_url") or track.get("url", "")
+
+
+class Prefetcher:
+    """One background task per chat keeping the next N stream URLs warm."""
+
+    def __init__(self, depth: int = 2, ttl: float = 1800.0):
+        self.depth = max(1, depth)
+        self.ttl = ttl
+        self._tasks: dict[int, asyncio.Task] = {}
+        # chat_id -> {source: (direct_url, resolved_at)}
+        self._ready: dict[int, dict[str, tuple[str, float]]] = {}
+        self.resolved = 0
+        self.hits = 0
+        self.misses = 0
+
+    def on_queue_change(self, chat_id: int):
+        """Queue listener: restart look-ahead for this chat."""
+        task = self._tasks.pop(chat_id, None)
+        if task and not task.done():
+            task.cancel()
+
+        upcoming = queue_view(chat_id)
+        if not upcoming:
+            self._ready.pop(chat_id, None)
+            return
+        # Keep results for the track a pop just made current; take() consumes it next.
+        ready = self._ready.get(chat_id)
+        if ready:
+            wanted = {track_source(t) for t in upcoming[: 1 + self.depth]}
+            for source in list(ready):
+                if source not in wanted:
+                    ready.pop(source, None)
+        if len(upcoming) <= 1:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._tasks[chat_id] = loop.create_task(self._run(chat_id))
+
+    async def _run(self, chat_id: int):
+        from plugins.music.player import _is_direct_stream_url, _resolve_stream_url
+
+        try:
+            await asyncio.sleep(_DEBOUNCE)
+            while True:
+                view = queue_view(chat_id)
+                upcoming = view[1 : 1 + self.depth]
+                if not upcoming:
+                    return
+
+                ready = self._ready.setdefault(chat_id, {})
+                wanted = {track_source(t) for t in view[: 1 + self.depth]}
+                for source in list(ready):
+                    if source not in wanted:
+                        ready.pop(source, None)
+
+                now = time.monotonic()
+                for track in upcoming:
+                    source = track_source(track)
+                    if not source:
+                        continue
+                    entry = ready.get(source)
+                    if entry and now - entry[1] < self.ttl:
+                        continue
+                    direct = await _resolve_stream_url(
+                        source,
+                        is_video=bool(track.get("is_video", False)),
+                        priority=PRIORITY_PREFETCH,
+                    )
+                    # Only keep results that actually resolved to a media URL.
+                    if direct and _is_direct_stream_url(direct):
+                        ready[source] = (direct, time.monotonic())
+                        self.resolved += 1
+                        if getattr(track, "is_stub", False):
+                            # Fill playlist stubs in place so everything downstream sees a real URL.
+                            track.url = direct
+                            track.expires_at = parse_expiry(direct)
+
+                # Re-check before the oldest result goes stale.
+                await asyncio.sleep(max(30.0, self.ttl / 2))
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.debug("Prefetch failed in chat %s: %s", chat_id, e)
+        finally:
+            if self._tasks.get(chat_id) is asyncio.current_task():
+                self._tasks.pop(chat_id, None)
+
+    def take(self, chat_id: int, track: dict) -> Optional[str]:
+        """Return and consume a fresh prefetched URL for track, if any."""
+        ready = self._ready.get(chat_id) or {}
+        entry = ready.pop(track_source(track), None)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return None
+
+    def drop(self, chat_id: int):
+        """Cancel look-ahead and forget results for a chat."""
+        task = self._tasks.pop(chat_id, None)
+        if task and not task.done():
+            task.cancel()
+        self._ready.pop(chat_id, None)
+
+    def stats(self) -> dict:
+        takes = self.hits + self.misses
+        return {
+            "active_chats": len(self._tasks),
+            "ready": sum(len(v) for v in self._ready.values()),
+            "resolved": self.resolved,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / takes) if takes else 0.0,
+        }
+
+
+# Global singleton
+prefetcher = Prefetcher(depth=PREFETCH_DEPTH, ttl=PREFETCH_TTL)
+add_queue_listener(prefetcher.on_queue_change)
@@ -0,0 +1,191 @@
+"""
+Auralyx Music - Quality Governor
+Chooses the yt-dlp format for new streams from a quality ladder. Host CPU,
+RAM and the estimated cost of the streams already playing are compared to
+their limits; the governor steps down a rung as soon as any of them is full
+and steps back up after load has stayed low for QUALITY_HOLD seconds.
+"""
+
+import logging
+import time
+from collections import deque
+
+from config import (
+    QUALITY_CPU_HIGH,
+    QUALITY_GOVERNOR_ENABLED,
+    QUALITY_HOLD,
+    QUALITY_RAM_HIGH,
+    QUALITY_RECOVER,
+    QUALITY_STREAM_BUDGET,
+)
+from utils.queue import current_track
+from utils.resource_guard import get_resource_stats
+
+logger = logging.getLogger(__name__)
+
+# (rung name, yt-dlp format, cost units per stream); rung 0 is full quality.
+AUDIO_LADDER = (
+    ("high", "bestaudio[ext=m4a]/bestaudio[acodec^=mp4a]/bestaudio/best", 1.0),
+    ("medium", "bestaudio[abr<=96]/bestaudio[ext=m4a]/bestaudio/best", 0.8),
+    ("low", "bestaudio[abr<=64]/worstaudio/bestaudio/best", 0.7),
+)
+VIDEO_LADDER = (
+    ("360p", "best[height<=360][vcodec!=none][acodec!=none]/best", 6.0),
+    ("240p", "best[height<=240][vcodec!=none][acodec!=none]/best[height<=360][vcodec!=none][acodec!=none]/best", 4.0),
+    ("144p", "best[height<=144][vcodec!=none][acodec!=none]/best[height<=240][vcodec!=none][acodec!=none]/best", 2.5),
+)
+
+_EVAL_INTERVAL = 5.0  # seconds between load samples
+_SURGE = 1.3          # load ratio that drops two rungs at once
+
+
+def _rung(ladder: tuple, level: int) -> tuple:
+    return ladder[min(level, len(ladder) - 1)]
+
+
+class QualityGovernor:
+    """One shared ladder level for new audio and video streams."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        cpu_high: float = 80.0,
+        ram_high: float = 85.0,
+        stream_budget: float = 150.0,
+        recover: float = 0.7,
+        hold: float = 60.0,
+    ):
+        self.enabled = enabled
+        self.cpu_high = max(1.0, cpu_high)
+        self.ram_high = max(1.0, ram_high)
+        self.stream_budget = max(1.0, stream_budget)
+        self.recover = recover
+        self.hold = hold
+        self.max_level = max(len(AUDIO_LADDER), len(VIDEO_LADDER)) - 1
+        self.level = 0
+        self._checked = 0.0
+        self._low_since: float | None = None
+        self._last: dict = {}
+        self._streams: dict[int, tuple[bool, int]] = {}  # chat_id -> (is_video, level it started at)
+        self.decisions: deque = deque(maxlen=20)
+        self.downgrades = 0
+        self.upgrades = 0
+
+    def note_stream(self, chat_id: int, is_video: bool):
+        """Record the rung a chat's stream started at; it keeps that format until the next track."""
+        self._streams[chat_id] = (bool(is_video), self.level)
+
+    def _active_streams(self) -> tuple[int, int, float]:
+        """(audio streams, video streams, their summed cost at the rungs they play at)."""
+        from core.call import call_manager
+
+        active = call_manager.active_chats()
+        live = set(active)
+        for chat_id in [c for c in self._streams if c not in live]:
+            del self._streams[chat_id]
+        audio = video = 0
+        cost = 0.0
+        for chat_id in active:
+            recorded = self._streams.get(chat_id)
+            if recorded is None:
+                track = current_track(chat_id)
+                recorded = (track is not None and track.is_video, self.level)
+            is_video, level = recorded
+            if is_video:
+                video += 1
+            else:
+                audio += 1
+            cost += _rung(VIDEO_LADDER if is_video else AUDIO_LADDER, level)[2]
+        return audio, video, cost
+
+    def _evaluate(self):
+        now = time.monotonic()
+        if now - self._checked < _EVAL_INTERVAL:
+            return
+        self._checked = now
+
+        res = get_resource_stats()
+        audio, video, cost = self._active_streams()
+        level = self.level
+
+        # Running streams keep their rung, so the same cost applies whether or not we step.
+        current = {
+            "cpu": res["cpu"] / self.cpu_high,
+            "ram": res["ram_percent"] / self.ram_high,
+            "streams": cost / self.stream_budget,
+        }
+        reason, pressure = max(current.items(), key=lambda kv: kv[1])
+        if pressure >= 1.0 and level < self.max_level:
+            level = min(self.max_level, level + (2 if pressure >= _SURGE else 1))
+            self._low_since = None
+        elif level > 0 and pressure < self.recover:
+            if self._low_since is None:
+                self._low_since = now
+            elif now - self._low_since >= self.hold:
+                level -= 1
+                self._low_since = now
+        else:
+            self._low_since = None
+
+        self._last = {
+            "reason": reason,
+            "pressure": pressure,
+            "cpu": res["cpu"],
+            "ram": res["ram_percent"],
+            "audio": audio,
+            "video": video,
+            "cost": round(cost, 1),
+        }
+        detail = "%s load %.2f (cpu %.0f%%, ram %.0f%%, %d audio + %d video streams, cost %.1f/%.0f)" % (
+            reason,
+            pressure,
+            res["cpu"],
+            res["ram_percent"],
+            audio,
+            video,
+            cost,
+            self.stream_budget,
+        )
+        if level == self.level:
+            logger.debug("Quality hold at %s: %s", self.rung_names(level), detail)
+            return
+        if level > self.level:
+            self.downgrades += 1
+        else:
+            self.upgrades += 1
+        logger.info("Quality %s -> %s: %s", self.rung_names(self.level), self.rung_names(level), detail)
+        self.decisions.append((int(time.time()), self.level, level, reason, round(pressure, 2)))
+        self.level = level
+
+    def rung_names(self, level: int) -> str:
+        return f"{_rung(AUDIO_LADDER, level)[0]}/{_rung(VIDEO_LADDER, level)[0]}"
+
+    def format(self, is_video: bool) -> str:
+        """yt-dlp format string for a new stream at the current load."""
+        if self.enabled:
+            try:
+                self._evaluate()
+            except Exception as e:
+                logger.debug("Quality evaluation failed: %s", e)
+        return _rung(VIDEO_LADDER if is_video else AUDIO_LADDER, self.level)[1]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "level": self.level,
+            "rung": self.rung_names(self.level),
+            "downgrades": self.downgrades,
+            "upgrades": self.upgrades,
+            **self._last,
+        }
+
+
+# Global singleton
+quality_governor = QualityGovernor(
+    enabled=QUALITY_GOVERNOR_ENABLED,
+    cpu_high=QUALITY_CPU_HIGH,
+    ram_high=QUALITY_RAM_HIGH,
+    stream_budget=QUALITY_STREAM_BUDGET,
+    recover=QUALITY_RECOVER,
+    hold=QUALITY_HOLD,
+)
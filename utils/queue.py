@@ -1,60 +1,213 @@
 ﻿"""
 Auralyx Music - Queue Manager
 In-memory queue management for per-chat playback.
-Uses collections.deque for O(1) popleft instead of O(n) list.pop(0).
+Each chat holds a ChatQueue: a deque of Track records plus counted
+source / title indexes, so duplicate checks are O(1) and positional
+edits happen in place instead of rebuilding the queue.
 """
 
 import logging
 import random
-from collections import deque
-from typing import Optional
+from collections import Counter, deque
+from itertools import islice
+from typing import Iterator, Optional, Sequence
+
+from utils.track import Track
 
 logger = logging.getLogger(__name__)
 
-# In-memory queues: { chat_id: deque([track_dict, ...]) }
-_queues: dict[int, deque] = {}
+
+def _norm_title(title: str) -> str:
+    return (title or "").strip().lower()
+
+
+class ChatQueue:
+    """Per-chat queue of Track records with a counted source / title index."""
+
+    __slots__ = ("_items", "_keys", "_sources", "_titles")
+
+    def __init__(self, tracks=()):
+        self._items: deque[Track] = deque()
+        # (source, title) index keys captured at insert, in lockstep with _items:
+        # url refresh rewrites track.url, which track.source falls back to.
+        self._keys: deque[tuple[str, str]] = deque()
+        self._sources: Counter = Counter()
+        self._titles: Counter = Counter()
+        for track in tracks:
+            self.append(track)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Copies only the requested window.
+            start, stop, step = index.indices(len(self._items))
+            return list(islice(self._items, start, stop, step))
+        return self._items[index]
+
+    def head(self, n: int) -> list[Track]:
+        """First n tracks without copying the rest."""
+        return list(islice(self._items, n))
+
+    def _index(self, track: Track) -> tuple[str, str]:
+        keys = (track.source, _norm_title(track.title))
+        for counter, key in zip((self._sources, self._titles), keys):
+            if key:
+                counter[key] += 1
+        return keys
+
+    def _unindex(self, keys: tuple[str, str]):
+        for counter, key in zip((self._sources, self._titles), keys):
+            if not key:
+                continue
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    def append(self, track):
+        track = Track.coerce(track)
+        self._items.append(track)
+        self._keys.append(self._index(track))
+
+    def appendleft(self, track):
+        track = Track.coerce(track)
+        self._items.appendleft(track)
+        self._keys.appendleft(self._index(track))
+
+    def popleft(self) -> Track:
+        self._unindex(self._keys.popleft())
+        return self._items.popleft()
+
+    def remove_at(self, index: int) -> Track:
+        """Remove by 0-based index in place."""
+        track = self._items[index]
+        del self._items[index]
+        self._unindex(self._keys[index])
+        del self._keys[index]
+        return track
+
+    def move(self, src: int, dst: int):
+        """Move the entry at src to dst (0-based) in place."""
+        for seq in (self._items, self._keys):
+            entry = seq[src]
+            del seq[src]
+            seq.insert(dst, entry)
+
+    def truncate(self, keep: int) -> int:
+        """Drop everything after the first `keep` entries. Returns count removed."""
+        removed = 0
+        while len(self._items) > keep:
+            self._items.pop()
+            self._unindex(self._keys.pop())
+            removed += 1
+        return removed
+
+    def shuffle(self, start: int = 1) -> int:
+        """Shuffle entries from `start` onwards; the index is unaffected."""
+        tail = [(self._items.pop(), self._keys.pop()) for _ in range(len(self._items) - start)]
+        random.shuffle(tail)
+        for track, keys in tail:
+            self._items.append(track)
+            self._keys.append(keys)
+        return len(tail)
+
+    def has_duplicate(self, source: str, title: str = "") -> bool:
+        if source and source in self._sources:
+            return True
+        key = _norm_title(title)
+        return bool(key) and key in self._titles
+
+
+# In-memory queues: { chat_id: ChatQueue }
+_queues: dict[int, ChatQueue] = {}
+
+# Callbacks fired with chat_id after every queue mutation.
+_listeners: list = []
+
+
+def add_queue_listener(callback) -> None:
+    """Register a callback(chat_id) invoked whenever a chat queue changes."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def _notify(chat_id: int) -> None:
+    for callback in _listeners:
+        try:
+            callback(chat_id)
+        except Exception as e:
+            logger.debug("Queue listener failed for chat %s: %s", chat_id, e)
 
 
-def get_queue(chat_id: int) -> list[dict]:
+def get_queue(chat_id: int) -> list[Track]:
     """Get the current queue for a chat. Returns a list copy."""
     q = _queues.get(chat_id)
     return list(q) if q else []
 
 
-def add_to_queue(chat_id: int, track: dict, force: bool = False) -> int:
+def queue_view(chat_id: int) -> Sequence[Track]:
+    """Read-only view of a chat queue without copying it. Do not mutate."""
+    return _queues.get(chat_id) or ()
+
+
+def add_to_queue(chat_id: int, track: Track | dict, force: bool = False) -> int:
     """
     Add a track to the chat queue.
 
     Returns 0-based queue position.
     """
     if chat_id not in _queues or force:
-        _queues[chat_id] = deque()
+        _queues[chat_id] = ChatQueue()
 
     _queues[chat_id].append(track)
     position = len(_queues[chat_id]) - 1
 
     action = "Forced" if force else "Added"
     logger.info("%s '%s' to queue for chat %s (position %s)", action, track.get("title"), chat_id, position)
+    _notify(chat_id)
     return position
 
 
-def append_track(chat_id: int, track: dict) -> int:
+def append_track(chat_id: int, track: Track | dict) -> int:
     """Append a track and return its position."""
     if chat_id not in _queues:
-        _queues[chat_id] = deque()
+        _queues[chat_id] = ChatQueue()
     _queues[chat_id].append(track)
+    _notify(chat_id)
     return len(_queues[chat_id]) - 1
 
 
-def prepend_track(chat_id: int, track: dict) -> int:
+def extend_queue(chat_id: int, tracks: list[Track | dict]) -> int:
+    """Append many tracks with a single listener notification. Returns how many were added."""
+    if not tracks:
+        return 0
+    if chat_id not in _queues:
+        _queues[chat_id] = ChatQueue()
+    queue = _queues[chat_id]
+    for track in tracks:
+        queue.append(track)
+    logger.info("Added %d tracks to queue for chat %s", len(tracks), chat_id)
+    _notify(chat_id)
+    return len(tracks)
+
+
+def prepend_track(chat_id: int, track: Track | dict) -> int:
     """Prepend a track and return position 0."""
     if chat_id not in _queues:
-        _queues[chat_id] = deque()
+        _queues[chat_id] = ChatQueue()
     _queues[chat_id].appendleft(track)
+    _notify(chat_id)
     return 0
 
 
-def pop_from_queue(chat_id: int) -> Optional[dict]:
+def pop_from_queue(chat_id: int) -> Optional[Track]:
     """Remove and return the first track from queue."""
     queue = _queues.get(chat_id)
     if not queue:
@@ -63,6 +216,7 @@ def pop_from_queue(chat_id: int) -> Optional[dict]:
     logger.info("Popped '%s' from queue for chat %s", track.get("title"), chat_id)
     if not queue:
         del _queues[chat_id]
+    _notify(chat_id)
     return track
 
 
@@ -71,9 +225,30 @@ def clear_queue(chat_id: int):
     if chat_id in _queues:
         del _queues[chat_id]
         logger.info("Queue cleared for chat %s", chat_id)
+        _notify(chat_id)
 
 
-def current_track(chat_id: int) -> Optional[dict]:
+def clear_pending(chat_id: int) -> int:
+    """Drop every queued track except the current one. Returns count removed."""
+    q = _queues.get(chat_id)
+    if not q or len(q) <= 1:
+        return 0
+    removed = q.truncate(1)
+    _notify(chat_id)
+    return removed
+
+
+def restore_queue(chat_id: int, tracks: list[Track | dict]) -> int:
+    """Replace a chat queue wholesale (used when restoring from the journal)."""
+    if tracks:
+        _queues[chat_id] = ChatQueue(tracks)
+    else:
+        _queues.pop(chat_id, None)
+    _notify(chat_id)
+    return len(tracks)
+
+
+def current_track(chat_id: int) -> Optional[Track]:
     """Get currently playing track without removing it."""
     queue = _queues.get(chat_id)
     return queue[0] if queue else None
@@ -91,18 +266,9 @@ def queue_length(chat_id: int) -> int:
 
 
 def has_duplicate(chat_id: int, url: str, title: str = "") -> bool:
-    """Return True if exact URL or exact normalized title exists in queue."""
+    """Return True if the source URL or exact normalized title exists in queue."""
     q = _queues.get(chat_id)
-    if not q:
-        return False
-
-    normalized_title = (title or "").strip().lower()
-    for track in q:
-        if url and track.get("url") == url:
-            return True
-        if normalized_title and track.get("title", "").strip().lower() == normalized_title:
-            return True
-    return False
+    return bool(q) and q.has_duplicate(url, title)
 
 
 def shuffle_queue(chat_id: int) -> int:
@@ -114,15 +280,12 @@ def shuffle_queue(chat_id: int) -> int:
     if not q or len(q) < 3:
         return 0
 
-    items = list(q)
-    current = items[0]
-    rest = items[1:]
-    random.shuffle(rest)
-    _queues[chat_id] = deque([current] + rest)
-    return len(rest)
+    shuffled = q.shuffle(start=1)
+    _notify(chat_id)
+    return shuffled
 
 
-def remove_position(chat_id: int, position: int) -> Optional[dict]:
+def remove_position(chat_id: int, position: int) -> Optional[Track]:
     """
     Remove a 1-based queue position and return removed track.
     Position 1 (current track) is not removable through this helper.
@@ -133,12 +296,29 @@ def remove_position(chat_id: int, position: int) -> Optional[dict]:
     if position <= 1 or position > len(q):
         return None
 
-    items = list(q)
-    removed = items.pop(position - 1)
-    _queues[chat_id] = deque(items)
+    removed = q.remove_at(position - 1)
+    _notify(chat_id)
     return removed
 
 
+def move_position(chat_id: int, src: int, dst: int) -> Optional[Track]:
+    """
+    Move the track at 1-based position src to position dst.
+    The current track (position 1) cannot be moved or displaced.
+    """
+    q = _queues.get(chat_id)
+    if not q:
+        return None
+    if not (1 < src <= len(q)) or not (1 < dst <= len(q)):
+        return None
+
+    track = q[src - 1]
+    if src != dst:
+        q.move(src - 1, dst - 1)
+        _notify(chat_id)
+    return track
+
+
 def is_queue_empty(chat_id: int) -> bool:
     """Check if queue is empty."""
     return chat_id not in _queues or len(_queues[chat_id]) == 0
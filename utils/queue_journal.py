@@ -0,0 +1,154 @@
+"""
+Auralyx Music - Queue Journal
+Write-behind persistence for per-chat queues. Mutations only mark a chat
+dirty; a background task snapshots dirty chats to SQLite in batches, so a
+restart, deploy or crash can restore every queue and resume playback.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from config import (
+    QUEUE_JOURNAL_ENABLED,
+    QUEUE_JOURNAL_INTERVAL,
+    QUEUE_JOURNAL_MAX_TRACKS,
+    QUEUE_RESTORE_MAX_AGE,
+)
+from database.queue_sqlite import load_snapshots, write_snapshots
+from utils.queue import add_queue_listener, current_track, queue_size, queue_view, restore_queue
+
+logger = logging.getLogger(__name__)
+
+_MAX_CHATS_PER_FLUSH = 200
+_RESUME_GAP = 1.0  # seconds between resumed chats, to avoid a join burst
+
+_dirty: set[int] = set()
+_journal_task: Optional[asyncio.Task] = None
+_resume_task: Optional[asyncio.Task] = None
+_stats = {"flushes": 0, "chats_written": 0, "errors": 0, "restored": 0, "resumed": 0}
+
+
+def _mark_dirty(chat_id: int):
+    """Queue listener: O(1), never touches storage on the hot path."""
+    if QUEUE_JOURNAL_ENABLED:
+        _dirty.add(chat_id)
+
+
+def _snapshot(chat_id: int) -> list[dict]:
+    return [track.to_dict() for track in queue_view(chat_id)[:QUEUE_JOURNAL_MAX_TRACKS]]
+
+
+async def flush() -> int:
+    """Write one bounded batch of dirty chats. Returns chats written."""
+    if not _dirty:
+        return 0
+    batch = [_dirty.pop() for _ in range(min(len(_dirty), _MAX_CHATS_PER_FLUSH))]
+    snapshots = {chat_id: _snapshot(chat_id) for chat_id in batch}
+    try:
+        await write_snapshots(snapshots)
+    except Exception as e:
+        # Keep them dirty so the next pass retries.
+        _dirty.update(batch)
+        _stats["errors"] += 1
+        logger.error("Queue journal flush failed: %s", e)
+        return 0
+    _stats["flushes"] += 1
+    _stats["chats_written"] += len(batch)
+    return len(batch)
+
+
+async def _journal_loop():
+    while True:
+        try:
+            await asyncio.sleep(QUEUE_JOURNAL_INTERVAL)
+            await flush()
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error("Queue journal loop error: %s", e)
+            await asyncio.sleep(10)
+
+
+async def restore_queues() -> list[int]:
+    """Load recent snapshots into memory. Returns the chats that were restored."""
+    if not QUEUE_JOURNAL_ENABLED:
+        return []
+    try:
+        snapshots = await load_snapshots(QUEUE_RESTORE_MAX_AGE)
+    except Exception as e:
+        logger.error("Queue restore failed: %s", e)
+        return []
+
+    restored = []
+    for chat_id, tracks in snapshots.items():
+        tracks = [t for t in tracks if isinstance(t, dict) and (t.get("url") or t.get("webpage_url"))]
+        if tracks and not queue_size(chat_id):
+            restore_queue(chat_id, tracks)
+            restored.append(chat_id)
+    # Restoring marks them dirty; the rows already match.
+    _dirty.difference_update(restored)
+    _stats["restored"] += len(restored)
+    if restored:
+        logger.info("Restored %d queues from journal", len(restored))
+    return restored
+
+
+async def _resume_playback(client, chat_ids: list[int]):
+    from core.voice_cleanup import record_activity
+    from plugins.music.player import _start_stream
+    from utils.url_refresh import playable_source
+
+    for chat_id in chat_ids:
+        track = current_track(chat_id)
+        if not track:
+            continue
+        try:
+            ok, err = await _start_stream(
+                client,
+                chat_id,
+                playable_source(track),
+                is_video=track.is_video,
+                track=track,
+            )
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            ok, err = False, str(e)
+        if ok:
+            _stats["resumed"] += 1
+            record_activity(chat_id)
+        else:
+            logger.warning("Could not resume playback in %s: %s", chat_id, err)
+        await asyncio.sleep(_RESUME_GAP)
+
+
+def start_queue_journal(client, resume_chats: Optional[list[int]] = None):
+    """Start the write-behind task and resume restored chats. Call once at startup."""
+    global _journal_task, _resume_task
+    if not QUEUE_JOURNAL_ENABLED:
+        return
+    if not _journal_task or _journal_task.done():
+        _journal_task = asyncio.create_task(_journal_loop())
+        logger.info("Queue journal started (flush every %ss)", QUEUE_JOURNAL_INTERVAL)
+    if resume_chats:
+        _resume_task = asyncio.create_task(_resume_playback(client, resume_chats))
+
+
+async def stop_queue_journal():
+    """Stop background tasks and flush everything still pending."""
+    global _journal_task, _resume_task
+    for task in (_resume_task, _journal_task):
+        if task and not task.done():
+            task.cancel()
+    _journal_task = _resume_task = None
+    while _dirty:
+        if not await flush():
+            break
+
+
+def get_journal_stats() -> dict:
+    return {**_stats, "dirty": len(_dirty)}
+
+
+add_queue_listener(_mark_dirty)
@@ -0,0 +1,183 @@
+"""
+Auralyx Music - Autoplay Recommender
+In-memory co-play index built from music_history: which tracks chats play
+back to back, plus each chat's most played tracks. Updated on every recorded
+play, so autoplay picks the next track without a yt-dlp search.
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from config import RECOMMENDER_MAX_TRACKS, RECOMMENDER_NO_REPEAT, RECOMMENDER_WARM_PLAYS
+from database.mongo import add_play_listener, get_recent_history
+
+logger = logging.getLogger(__name__)
+
+_MAX_EDGES = 32          # co-play neighbours kept per track
+_MAX_CHAT_TOP = 100      # per-chat play counters kept
+_SESSION_GAP = 3 * 3600  # plays further apart than this are not "consecutive"
+_PICK_FROM = 5           # weighted pick among the best N candidates
+_COPLAY_WEIGHT = 3       # score per co-play, vs. per play in the chat's top tracks
+_CHAT_WEIGHT = 1
+
+
+class _Entry:
+    __slots__ = ("title", "source", "duration", "is_video")
+
+    def __init__(self, title: str, source: str, duration: int, is_video: bool):
+        self.title = title
+        self.source = source
+        self.duration = duration
+        self.is_video = is_video
+
+
+def _bump(counts: dict, key: str, limit: int):
+    counts[key] = counts.get(key, 0) + 1
+    if len(counts) > limit:
+        del counts[min(counts, key=counts.get)]
+
+
+class Recommender:
+    """Co-play adjacency + per-chat top tracks, bounded by LRU over tracks."""
+
+    def __init__(self, max_tracks: int = 50000, no_repeat: int = 20):
+        self.max_tracks = max(100, max_tracks)
+        self.no_repeat = max(1, no_repeat)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()  # track_key -> entry, LRU first
+        self._edges: dict[str, dict[str, int]] = {}  # track_key -> {neighbour_key: co-plays}
+        self._chat_top: dict[int, dict[str, int]] = {}
+        self._last: dict[int, tuple[str, int]] = {}  # chat_id -> (track_key, played_at)
+        self._recent: dict[int, deque] = {}
+        self._warm_task: Optional[asyncio.Task] = None
+        self.observed = 0
+        self.picks = 0
+        self.fallbacks = 0
+        self._pick_time = 0.0
+
+    # ── Index updates ──
+
+    def observe(self, chat_id: int, key: str, doc: dict, remember: bool = True):
+        """Play listener: O(1) amortised index update for one recorded play."""
+        if not key:
+            return
+        played_at = int(doc.get("played_at") or time.time())
+        last = self._last.get(chat_id)
+        if not remember and last and played_at <= last[1]:
+            # Warm-up replay older than a live play already observed for this chat.
+            return
+        key = sys.intern(key)
+        entry = self._entries.get(key)
+        source = doc.get("webpage_url") or ""
+        if entry is None:
+            entry = _Entry(doc.get("title") or "Unknown", source, int(doc.get("duration") or 0), bool(doc.get("is_video")))
+            self._entries[key] = entry
+            if len(self._entries) > self.max_tracks:
+                self._forget(next(iter(self._entries)))
+        else:
+            self._entries.move_to_end(key)
+            if source:
+                entry.source = source
+
+        if last and last[0] != key and played_at - last[1] <= _SESSION_GAP and last[0] in self._entries:
+            _bump(self._edges.setdefault(last[0], {}), key, _MAX_EDGES)
+            _bump(self._edges.setdefault(key, {}), last[0], _MAX_EDGES)
+        self._last[chat_id] = (key, played_at)
+
+        _bump(self._chat_top.setdefault(chat_id, {}), key, _MAX_CHAT_TOP)
+        self.observed += 1
+        if not remember:
+            return
+        recent = self._recent.get(chat_id)
+        if recent is None:
+            recent = self._recent[chat_id] = deque(maxlen=self.no_repeat)
+        recent.append(key)
+
+    def _forget(self, key: str):
+        self._entries.pop(key, None)
+        self._edges.pop(key, None)
+        # Inbound edges and chat counters are dropped lazily when next read.
+
+    # ── Picks ──
+
+    def recommend(self, chat_id: int, is_video: bool = False, exclude: tuple = ()) -> Optional[_Entry]:
+        """Next track for a chat after its last play, or None when history has nothing fresh."""
+        started = time.perf_counter()
+        blocked = set(self._recent.get(chat_id, ()))
+        blocked.update(exclude)
+        scores: dict[str, int] = {}
+
+        last = self._last.get(chat_id)
+        if last:
+            neighbours = self._edges.get(last[0], {})
+            for key in [k for k in neighbours if k not in self._entries]:
+                del neighbours[key]
+            for key, count in neighbours.items():
+                if key not in blocked:
+                    scores[key] = scores.get(key, 0) + count * _COPLAY_WEIGHT
+
+        top = self._chat_top.get(chat_id, {})
+        for key in [k for k in top if k not in self._entries]:
+            del top[key]
+        for key, count in top.items():
+            if key not in blocked:
+                scores[key] = scores.get(key, 0) + count * _CHAT_WEIGHT
+
+        candidates = [
+            (key, score)
+            for key, score in scores.items()
+            if self._entries[key].source and self._entries[key].is_video == is_video
+        ]
+        pick = None
+        if candidates:
+            candidates.sort(key=lambda c: c[1], reverse=True)
+            best = candidates[:_PICK_FROM]
+            key = random.choices([c[0] for c in best], weights=[c[1] for c in best])[0]
+            pick = self._entries[key]
+            self.picks += 1
+        else:
+            self.fallbacks += 1
+        self._pick_time += time.perf_counter() - started
+        return pick
+
+    # ── Warm-up ──
+
+    async def warm(self, limit: int = 50000):
+        """Replay recent history into the index, oldest first."""
+        try:
+            docs = await get_recent_history(limit)
+        except Exception as e:
+            logger.warning("Recommender warm-up failed: %s", e)
+            return
+        for i, doc in enumerate(docs):
+            # Old plays shape the index but not autoplay's no-repeat window.
+            self.observe(int(doc.get("chat_id", 0)), doc.get("track_key", ""), doc, remember=False)
+            if i % 5000 == 4999:
+                await asyncio.sleep(0)  # keep the loop responsive
+        logger.info("Recommender warmed with %d plays (%d tracks)", len(docs), len(self._entries))
+
+    def start(self):
+        if RECOMMENDER_WARM_PLAYS > 0 and (self._warm_task is None or self._warm_task.done()):
+            self._warm_task = asyncio.create_task(self.warm(RECOMMENDER_WARM_PLAYS))
+
+    def stats(self) -> dict:
+        total = self.picks + self.fallbacks
+        return {
+            "tracks": len(self._entries),
+            "edges": sum(len(v) for v in self._edges.values()),
+            "chats": len(self._chat_top),
+            "observed": self.observed,
+            "picks": self.picks,
+            "fallbacks": self.fallbacks,
+            "hit_rate": (self.picks / total) if total else 0.0,
+            "avg_pick_us": (self._pick_time / total * 1e6) if total else 0.0,
+        }
+
+
+# Global singleton
+recommender = Recommender(max_tracks=RECOMMENDER_MAX_TRACKS, no_repeat=RECOMMENDER_NO_REPEAT)
+add_play_listener(recommender.observe)
@@ -0,0 +1,106 @@
+"""
+Auralyx Music - Search Result Cache
+Process-wide cache of /search and /vsearch results keyed by normalized query
+and media type. One extraction fetches several pages; every chat and user
+that searches the same thing shares it until the TTL runs out.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, SEARCH_FETCH_LIMIT
+from utils.extractor import search_tracks
+from utils.media_cache import make_key
+from utils.singleflight import search_flight
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResults:
+    """An immutable result set. Selection state holds a reference, never a copy."""
+
+    __slots__ = ("key", "rows", "created")
+
+    def __init__(self, key: str, rows: list[dict]):
+        self.key = key
+        self.rows = tuple(rows)
+        self.created = time.monotonic()
+
+    def page(self, number: int, size: int) -> tuple[dict, ...]:
+        start = number * size
+        return self.rows[start:start + size]
+
+    def pages(self, size: int) -> int:
+        return max(1, -(-len(self.rows) // size))
+
+
+class SearchCache:
+    """TTL + LRU bounded map of make_key(query, is_video) -> SearchResults."""
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 500):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, SearchResults] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str, is_video: bool = False) -> Optional[SearchResults]:
+        key = make_key(query, is_video)
+        results = self._entries.get(key)
+        if results is None:
+            return None
+        if time.monotonic() - results.created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return results
+
+    def fresh(self, results: SearchResults) -> bool:
+        return time.monotonic() - results.created <= self.ttl
+
+    def _put(self, results: SearchResults):
+        self._entries[results.key] = results
+        self._entries.move_to_end(results.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def search(self, query: str, is_video: bool = False) -> Optional[SearchResults]:
+        """Cached result set for a query, running one larger search on a miss."""
+        cached = self.get(query, is_video)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        key = make_key(query, is_video)
+        rows = await search_flight.do(
+            key,
+            lambda: search_tracks(query, is_video=is_video, limit=SEARCH_FETCH_LIMIT),
+        )
+        if not rows:
+            return None
+        # Concurrent callers share the flight; only store the first result set.
+        cached = self.get(query, is_video)
+        if cached is not None:
+            return cached
+        results = SearchResults(key, rows)
+        self._put(results)
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# Global singleton
+search_cache = SearchCache(ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_SIZE)
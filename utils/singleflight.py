@@ -0,0 +1,105 @@
+"""
+Auralyx Music - Single-Flight Coalescing
+Concurrent callers asking for the same key share one in-flight task,
+and recent failures are replayed for a short window instead of retried.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Hashable
+
+from utils.extractor import ExtractionBusy
+
+logger = logging.getLogger(__name__)
+
+_MAX_NEGATIVE_ENTRIES = 1024
+
+
+class SingleFlight:
+    """Per-key request coalescer with a short negative cache."""
+
+    def __init__(self, name: str, negative_ttl: float = 10.0, transient: tuple[type, ...] = ()):
+        self.name = name
+        self.negative_ttl = negative_ttl
+        self.transient = transient
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._failures: dict[Hashable, tuple[float, BaseException | None]] = {}
+        self.calls = 0
+        self.leaders = 0
+        self.coalesced = 0
+        self.negative_hits = 0
+
+    def _remember_failure(self, key: Hashable, exc: BaseException | None):
+        if len(self._failures) >= _MAX_NEGATIVE_ENTRIES:
+            now = time.monotonic()
+            self._failures = {k: v for k, v in self._failures.items() if v[0] > now}
+            if len(self._failures) >= _MAX_NEGATIVE_ENTRIES:
+                self._failures.clear()
+        self._failures[key] = (time.monotonic() + self.negative_ttl, exc)
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or self.negative_ttl <= 0:
+            return
+        exc = task.exception()
+        if exc is not None:
+            if not isinstance(exc, self.transient):
+                self._remember_failure(key, exc)
+        elif task.result() is None:
+            # "Not found" is shared the same way as an error.
+            self._remember_failure(key, None)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """Run factory() once per key; concurrent callers await the same result."""
+        self.calls += 1
+        failed = self._failures.get(key)
+        if failed:
+            expires, exc = failed
+            if time.monotonic() < expires:
+                self.negative_hits += 1
+                if exc is not None:
+                    raise exc
+                return None
+            self._failures.pop(key, None)
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+        else:
+            self.coalesced += 1
+
+        # Shield so one caller's cancellation does not cancel the shared work.
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable):
+        """Drop a negative-cache entry so the next call retries immediately."""
+        self._failures.pop(key, None)
+
+    def stats(self) -> dict:
+        saved = self.coalesced + self.negative_hits
+        return {
+            "calls": self.calls,
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "negative_hits": self.negative_hits,
+            "inflight": len(self._inflight),
+            "coalesce_ratio": (saved / self.calls) if self.calls else 0.0,
+        }
+
+
+# Backpressure and deadlines are not shared as failures.
+_TRANSIENT = (ExtractionBusy, asyncio.TimeoutError)
+
+extract_flight = SingleFlight("extract", transient=_TRANSIENT)
+resolve_flight = SingleFlight("resolve", transient=_TRANSIENT)
+search_flight = SingleFlight("search", transient=_TRANSIENT)
+lyrics_flight = SingleFlight("lyrics", negative_ttl=60.0, transient=_TRANSIENT)
+
+
+def get_flight_stats() -> dict[str, dict]:
+    """Return stats for every coalescing layer."""
+    return {f.name: f.stats() for f in (extract_flight, resolve_flight, search_flight, lyrics_flight)}
@@ -1,78 +1,475 @@
 """
 Auralyx Music — Stream Pipeline
-FFmpeg process tracker and cleanup for audio streaming.
+Supervised FFmpeg decode pipeline feeding a fixed-size PCM ring buffer
+per chat. Each ring is a preallocated memory-mapped file, so disk and
+memory use stay constant however long the track runs.
 """
 
 import asyncio
 import logging
+import mmap
 import os
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+import psutil
+
+from config import (
+    FFMPEG_MAX_DECODERS,
+    FFMPEG_MAX_RESTARTS,
+    FFMPEG_NICE,
+    FFMPEG_STALL_TIMEOUT,
+    FFMPEG_THREADS,
+    STREAM_HEAD_START_MS,
+    STREAM_RING_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
-# Track active FFmpeg processes for cleanup on skip/stop
-_active_ffmpeg: dict[int, asyncio.subprocess.Process] = {}
+# s16le mono 48 kHz (Telegram standard)
+BYTES_PER_SECOND = 48000 * 2
+_CHUNK = 4096
+_HEAD_START_TIMEOUT = 5.0
+
+# Supervised FFmpeg decoders per chat, for cleanup on skip/stop
+_active_ffmpeg: dict[int, "DecoderSession"] = {}
+_rings: dict[int, "RingBuffer"] = {}
+
+# Called with chat_id once a decode finishes naturally and its ring has drained
+_end_handler: Optional[Callable[[int], None]] = None
+# Extra per-chat teardown (e.g. transition mixers) run by kill_stream
+_release_hooks: list = []
+
+
+class RingBuffer:
+    """Single-producer / single-consumer PCM ring over a memory-mapped file."""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        with open(path, "wb") as f:
+            f.truncate(capacity)
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), capacity)
+        # The consumer may be a native PyTgCalls thread.
+        self._lock = threading.Lock()
+        self.written = 0
+        self.consumed = 0
+        self.underruns = 0
+        self.overruns = 0
+        self.eof = False
+        self.closed = False
+
+    def available(self) -> int:
+        return self.written - self.consumed
+
+    def free(self) -> int:
+        return self.capacity - self.available()
+
+    def write(self, data) -> int:
+        """Copy as much of data as fits; returns bytes written."""
+        with self._lock:
+            n = min(len(data), self.free())
+            if n <= 0:
+                return 0
+            pos = self.written % self.capacity
+            first = min(n, self.capacity - pos)
+            self._mm[pos : pos + first] = data[:first]
+            if n > first:
+                self._mm[0 : n - first] = data[first:n]
+            self.written += n
+            return n
 
+    def read(self, length: int) -> bytes:
+        """Return exactly `length` bytes, padding with silence on underrun."""
+        with self._lock:
+            if self.closed:
+                return b"\x00" * length
+            n = min(length, self.available())
+            pos = self.consumed % self.capacity
+            first = min(n, self.capacity - pos)
+            out = self._mm[pos : pos + first]
+            if n > first:
+                out += self._mm[0 : n - first]
+            self.consumed += n
+            if n < length and not self.eof:
+                self.underruns += 1
+        return out + b"\x00" * (length - n)
 
-def _get_cache_path(chat_id: int) -> str:
-    """Return the absolute path to the local raw stream file."""
+    def close(self):
+        with self._lock:
+            self.closed = True
+            try:
+                self._mm.close()
+                self._file.close()
+            except Exception:
+                pass
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _get_cache_path(chat_id: int, tag: str = "") -> str:
+    """Return the absolute path to the chat's ring buffer file."""
     cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache")
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir, exist_ok=True)
-    return os.path.join(cache_dir, f"stream_{chat_id}.raw")
+    return os.path.join(cache_dir, f"stream_{chat_id}{tag}.ring")
 
 
-async def start_ffmpeg_stream(chat_id: int, url: str):
-    """Start an FFmpeg process to stream decodes to a local buffered file."""
-    await kill_stream(chat_id)
-    target = _get_cache_path(chat_id)
-    
-    # FFmpeg command to decode to raw s16le PCM (Telegram Standard)
-    # We use a file-based buffer to bypass Windows pipe issues with legacy PyTgCalls.
-    cmd = [
-        "ffmpeg", "-re", "-i", url,
-        "-f", "s16le", "-ac", "1", "-ar", "48000", "-acodec", "pcm_s16le",
-        "-y", target
-    ]
-    
+async def _pump(proc: asyncio.subprocess.Process, ring: RingBuffer):
+    """Move decoded PCM from FFmpeg stdout into the ring, waiting when it is full."""
+    try:
+        while True:
+            chunk = await proc.stdout.read(_CHUNK)
+            if not chunk:
+                break
+            view = memoryview(chunk)
+            stalled = False
+            while view:
+                n = ring.write(view)
+                view = view[n:]
+                if view:
+                    if not stalled:
+                        ring.overruns += 1
+                        stalled = True
+                    await asyncio.sleep(0.02)
+    except asyncio.CancelledError:
+        pass
+
+
+def _apply_limits(proc: asyncio.subprocess.Process):
+    """Lower decoder scheduling priority so playback never starves the bot."""
+    if not FFMPEG_NICE or os.name != "posix":
+        return
     try:
+        psutil.Process(proc.pid).nice(FFMPEG_NICE)
+    except Exception as e:
+        logger.debug("Could not renice FFmpeg %s: %s", proc.pid, e)
+
+
+class DecoderSession:
+    """
+    One supervised FFmpeg decode for a chat.
+    Parses `-progress` telemetry, restarts from the last position with
+    backoff on crash or stall, and holds a global decoder slot while alive.
+    """
+
+    def __init__(
+        self,
+        chat_id: int,
+        url: str,
+        ring: RingBuffer,
+        offset: float = 0.0,
+        announce_end: bool = True,
+        gain_db: float = 0.0,
+    ):
+        self.chat_id = chat_id
+        self.url = url
+        self.ring = ring
+        self.offset = offset
+        self.gain_db = gain_db
+        self.announce_end = announce_end
+        self.out_time = 0.0
+        self.speed = 0.0
+        self.bitrate = ""
+        self.restarts = 0
+        self.stalls = 0
+        self.crashes = 0
+        self.rejected = False
+        self.finished = False
+        self.completed = False
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.task: Optional[asyncio.Task] = None
+        self._last_advance = time.monotonic()
+
+    @property
+    def position(self) -> float:
+        """Seconds into the source that have been decoded so far."""
+        return self.offset + self.out_time
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        cmd = [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-nostats", "-progress", "pipe:2", "-threads", str(FFMPEG_THREADS),
+        ]
+        if self.offset > 0:
+            cmd += ["-ss", f"{self.offset:.3f}"]  # input-side seek
+        # No -re: the ring's backpressure paces FFmpeg, so it can run ahead and ride out network stalls.
+        cmd += ["-i", self.url]
+        if abs(self.gain_db) >= 0.1:
+            # Precomputed loudness/volume gain: one multiply per sample.
+            cmd += ["-af", f"volume={self.gain_db:.2f}dB"]
+        # Decode to raw s16le PCM (Telegram Standard) on stdout.
+        cmd += [
+            "-f", "s16le", "-ac", "1", "-ar", "48000", "-acodec", "pcm_s16le",
+            "pipe:1",
+        ]
         proc = await asyncio.create_subprocess_exec(
             *cmd,
-            stdout=asyncio.subprocess.DEVNULL,
-            stderr=asyncio.subprocess.DEVNULL
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
-        _active_ffmpeg[chat_id] = proc
-        # Give FFmpeg a head start to fill some buffer
-        await asyncio.sleep(1.5)
-        return target
-    except Exception as e:
-        logger.error("Failed to start FFmpeg stream for %s: %s", chat_id, e)
-        return None
+        _apply_limits(proc)
+        return proc
 
+    async def _read_progress(self, proc: asyncio.subprocess.Process):
+        while True:
+            line = await proc.stderr.readline()
+            if not line:
+                break
+            key, _, value = line.decode("utf-8", "ignore").strip().partition("=")
+            try:
+                if key in ("out_time_us", "out_time_ms"):  # both are microseconds
+                    out_time = int(value) / 1_000_000
+                    if out_time > self.out_time:
+                        self.out_time = out_time
+                        self._last_advance = time.monotonic()
+                elif key == "speed":
+                    self.speed = float(value.rstrip("x") or 0)
+                elif key == "bitrate":
+                    self.bitrate = value
+                elif key == "progress" and value == "end":
+                    self.finished = True
+            except ValueError:
+                continue
 
-async def kill_stream(chat_id: int):
-    """Stop FFmpeg and delete the local buffer file."""
-    proc = _active_ffmpeg.pop(chat_id, None)
-    if proc:
+    async def _kill(self, proc: asyncio.subprocess.Process):
+        if proc.returncode is not None:
+            return
         try:
-            if proc.returncode is None:
-                proc.terminate()
-                await asyncio.wait_for(proc.wait(), timeout=2)
+            proc.terminate()
+            await asyncio.wait_for(proc.wait(), timeout=2)
         except Exception:
             try:
                 proc.kill()
             except Exception:
                 pass
 
-    target = _get_cache_path(chat_id)
-    if os.path.exists(target):
+    async def _run(self):
+        slots = _decoder_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=_HEAD_START_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.rejected = True
+            self.ring.eof = True
+            logger.warning("Decoder cap (%s) reached; rejecting stream in %s", FFMPEG_MAX_DECODERS, self.chat_id)
+            return
+
+        backoff = 1.0
+        proc = None
+        try:
+            while True:
+                proc = self.proc = await self._spawn()
+                self._last_advance = time.monotonic()
+                workers = [
+                    asyncio.create_task(_pump(proc, self.ring)),
+                    asyncio.create_task(self._read_progress(proc)),
+                ]
+
+                stalled = False
+                waiter = asyncio.ensure_future(proc.wait())
+                while not waiter.done():
+                    await asyncio.wait({waiter}, timeout=1.0)
+                    # A full ring is backpressure, not a stall.
+                    idle = time.monotonic() - self._last_advance
+                    if not waiter.done() and idle > FFMPEG_STALL_TIMEOUT and self.ring.free() >= _CHUNK:
+                        stalled = True
+                        self.stalls += 1
+                        await self._kill(proc)
+                await asyncio.gather(*workers, return_exceptions=True)
+
+                if self.finished or (proc.returncode == 0 and not stalled):
+                    self.completed = True
+                    return
+                if not stalled:
+                    self.crashes += 1
+                if self.restarts >= FFMPEG_MAX_RESTARTS:
+                    logger.error("FFmpeg for %s failed %s times; giving up", self.chat_id, self.restarts)
+                    return
+
+                self.restarts += 1
+                logger.warning(
+                    "FFmpeg %s in %s (rc=%s); restarting at %.1fs in %.0fs",
+                    "stalled" if stalled else "crashed",
+                    self.chat_id,
+                    proc.returncode,
+                    self.position,
+                    backoff,
+                )
+                # Resume from where decoding got to.
+                self.offset, self.out_time = self.position, 0.0
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Decoder supervisor error in %s: %s", self.chat_id, e)
+        finally:
+            if proc:
+                await self._kill(proc)
+            self.ring.eof = True
+            slots.release()
+            if self.completed and self.announce_end:
+                await self._announce_end()
+
+    async def _announce_end(self):
+        # Playout ends when the consumer has drained what was decoded.
+        while self.ring.available() > 0 and not self.ring.closed:
+            await asyncio.sleep(0.1)
+        if _end_handler and not self.ring.closed:
+            try:
+                _end_handler(self.chat_id)
+            except Exception as e:
+                logger.debug("Stream end handler failed for %s: %s", self.chat_id, e)
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await asyncio.wait_for(self.task, timeout=3)
+            except (asyncio.CancelledError, asyncio.TimeoutError, Exception):
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "position": self.position,
+            "speed": self.speed,
+            "bitrate": self.bitrate,
+            "restarts": self.restarts,
+            "stalls": self.stalls,
+            "crashes": self.crashes,
+        }
+
+
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _decoder_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(FFMPEG_MAX_DECODERS)
+    return _slots
+
+
+async def open_decoder(
+    chat_id: int,
+    url: str,
+    offset: float = 0.0,
+    tag: str = "",
+    announce_end: bool = True,
+    gain_db: float = 0.0,
+) -> Optional[DecoderSession]:
+    """Start a supervised decode into a fresh ring; returns once the head start is buffered."""
+    try:
+        ring = RingBuffer(_get_cache_path(chat_id, tag), int(STREAM_RING_SECONDS * BYTES_PER_SECOND))
+    except Exception as e:
+        logger.error("Failed to allocate ring buffer for %s: %s", chat_id, e)
+        return None
+
+    session = DecoderSession(chat_id, url, ring, offset=offset, announce_end=announce_end, gain_db=gain_db)
+    session.start()
+
+    # Wait for an explicit amount of audio instead of a fixed sleep.
+    head_start = int(STREAM_HEAD_START_MS / 1000 * BYTES_PER_SECOND)
+    deadline = time.monotonic() + _HEAD_START_TIMEOUT * 2
+    while ring.available() < head_start and not ring.eof and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+
+    if session.rejected or (ring.eof and not ring.available()):
+        await session.stop()
+        ring.close()
+        return None
+    return session
+
+
+async def start_ffmpeg_stream(
+    chat_id: int, url: str, offset: float = 0.0, gain_db: float = 0.0
+) -> Optional[RingBuffer]:
+    """Start a supervised decode into the chat's ring buffer; returns once the head start is buffered."""
+    await kill_stream(chat_id)
+    session = await open_decoder(chat_id, url, offset=offset, gain_db=gain_db)
+    if session is None:
+        return None
+    _active_ffmpeg[chat_id] = session
+    _rings[chat_id] = session.ring
+    return session.ring
+
+
+def add_release_hook(hook: Callable[[int], Awaitable[None]]):
+    """Register `async hook(chat_id)` run whenever a chat's stream is killed."""
+    if hook not in _release_hooks:
+        _release_hooks.append(hook)
+
+
+def set_stream_end_handler(handler: Optional[Callable[[int], None]]):
+    """Register the callback fired when a ring-fed stream plays out to the end."""
+    global _end_handler
+    _end_handler = handler
+
+
+def read_pcm(chat_id: int, length: int) -> bytes:
+    """Raw-audio consumer hook: next `length` bytes for a chat (silence if idle)."""
+    ring = _rings.get(chat_id)
+    if ring is None:
+        return b"\x00" * length
+    return ring.read(length)
+
+
+async def kill_stream(chat_id: int, release_hooks: bool = True):
+    """Stop the chat's decoder and release its ring buffer (and, by default, hooked state)."""
+    session = _active_ffmpeg.pop(chat_id, None)
+    if session:
+        await session.stop()
+
+    ring = _rings.pop(chat_id, None)
+    if ring:
+        ring.close()
+    else:
+        target = _get_cache_path(chat_id)
+        if os.path.exists(target):
+            try:
+                os.remove(target)
+            except Exception as e:
+                logger.warning("Could not delete ring file %s: %s", target, e)
+
+    for hook in _release_hooks if release_hooks else ():
         try:
-            os.remove(target)
+            await hook(chat_id)
         except Exception as e:
-            logger.warning("Could not delete cache file %s: %s", target, e)
+            logger.debug("Stream release hook failed for %s: %s", chat_id, e)
+
+
+def get_decoder_stats() -> dict[int, dict]:
+    """Per-chat decoder telemetry (position, speed, bitrate, restarts)."""
+    return {chat_id: session.stats() for chat_id, session in _active_ffmpeg.items()}
+
+
+def get_stream_stats() -> dict:
+    """Aggregate buffer and decoder health across active streams."""
+    rings = list(_rings.values())
+    sessions = list(_active_ffmpeg.values())
+    return {
+        "active": len(rings),
+        "buffered_bytes": sum(r.available() for r in rings),
+        "ring_bytes": sum(r.capacity for r in rings),
+        "underruns": sum(r.underruns for r in rings),
+        "overruns": sum(r.overruns for r in rings),
+        "decoders": len(sessions),
+        "decoder_cap": FFMPEG_MAX_DECODERS,
+        "restarts": sum(x.restarts for x in sessions),
+        "stalls": sum(x.stalls for x in sessions),
+        "crashes": sum(x.crashes for x in sessions),
+        "avg_speed": (sum(x.speed for x in sessions) / len(sessions)) if sessions else 0.0,
+    }
 
 
 async def cleanup_all():
     """Kill all active FFmpeg processes and clear cache."""
     for chat_id in list(_active_ffmpeg.keys()):
         await kill_stream(chat_id)
-
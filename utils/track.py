@@ -0,0 +1,131 @@
+"""
+Auralyx Music - Track Record
+Compact slotted record for a queued track. Source IDs are interned so the
+same song queued in many chats shares one string, and the record keeps a
+dict-style get/[] interface for code that still treats tracks as dicts.
+"""
+
+import sys
+from typing import Any, Optional
+
+_FIELDS = ("title", "url", "webpage_url", "duration", "requested_by", "is_video", "expires_at")
+_FIELD_SET = frozenset(_FIELDS)
+
+
+def _intern(value: Optional[str]) -> str:
+    return sys.intern(value) if value else ""
+
+
+class Track:
+    """One playable item. Mutable only where refresh needs it (url, expires_at)."""
+
+    __slots__ = _FIELDS
+
+    def __init__(
+        self,
+        title: str = "Unknown",
+        url: str = "",
+        webpage_url: str = "",
+        duration: int = 0,
+        requested_by: int = 0,
+        is_video: bool = False,
+        expires_at: Optional[float] = None,
+    ):
+        self.title = title or "Unknown"
+        self.url = url or ""
+        self.webpage_url = _intern(webpage_url)
+        self.duration = int(duration or 0)
+        self.requested_by = int(requested_by or 0)
+        self.is_video = bool(is_video)
+        self.expires_at = expires_at
+
+    @property
+    def source(self) -> str:
+        """Stable identifier used to resolve the track (page URL preferred)."""
+        return self.webpage_url or self.url
+
+    @property
+    def is_stub(self) -> bool:
+        """True until a direct media URL has been resolved for the source."""
+        return not self.url or self.url == self.webpage_url
+
+    # ── Construction ──
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Track":
+        return cls(**{k: data[k] for k in _FIELDS if data.get(k) is not None})
+
+    @classmethod
+    def from_info(cls, info: dict, requested_by: int = 0, is_video: Optional[bool] = None) -> "Track":
+        """Build from an extractor/search result, stamping the signed-URL expiry."""
+        from utils.url_refresh import parse_expiry
+
+        url = info.get("url") or ""
+        return cls(
+            title=info.get("title", "Unknown"),
+            url=url,
+            webpage_url=info.get("webpage_url") or "",
+            duration=info.get("duration", 0),
+            requested_by=requested_by or info.get("requested_by", 0),
+            is_video=info.get("is_video", False) if is_video is None else is_video,
+            expires_at=parse_expiry(url),
+        )
+
+    @classmethod
+    def from_playlist(cls, row: dict, requested_by: int = 0) -> "Track":
+        """
+        Unresolved stub from a stored playlist or import entry. Any stored
+        direct URL has long expired, so only the source is kept; the
+        prefetcher (or stream start) resolves it just in time.
+        """
+        source = row.get("webpage_url") or row.get("url", "")
+        return cls(
+            title=row.get("title", "Unknown"),
+            url=source,
+            webpage_url=source,
+            duration=row.get("duration", 0),
+            requested_by=requested_by,
+            is_video=row.get("is_video", False),
+        )
+
+    @classmethod
+    def coerce(cls, value) -> "Track":
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    # ── Serialization ──
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in _FIELDS if getattr(self, k) is not None}
+
+    def to_playlist(self) -> dict:
+        """Entry in the Mongo playlist format: stable source only, never a signed URL."""
+        return {
+            "title": self.title[:128],
+            "webpage_url": self.source,
+            "duration": self.duration,
+            "is_video": self.is_video,
+        }
+
+    # ── Dict-style access ──
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in _FIELD_SET:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_SET and getattr(self, key) is not None
+
+    def __repr__(self) -> str:
+        return f"Track({self.title!r}, {self.source!r})"
@@ -0,0 +1,374 @@
+"""
+Auralyx Music - Transition Engine
+Gapless and crossfaded track changes for audio streams. While a track
+plays, the next queued one is pre-decoded into a standby ring. A mixer
+installed as the call's PCM reader switches (or fades) between the two
+at the boundary, on the PyTgCalls playout thread, not the event loop.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from config import CROSSFADE_SECONDS, GAPLESS_ENABLED, TRANSITION_PRELOAD_SECONDS
+from utils.extractor import PRIORITY_PREFETCH
+from utils.queue import queue_view
+from utils.stream import BYTES_PER_SECOND, DecoderSession, add_release_hook, open_decoder
+
+logger = logging.getLogger(__name__)
+
+_MONITOR_INTERVAL = 0.25  # seconds
+_tags = itertools.count()
+
+
+def _mix(a: bytes, b: bytes, start: float, end: float) -> bytes:
+    """Linear crossfade of two equal-length s16le chunks: a fades out, b fades in."""
+    sa = np.frombuffer(a, dtype="<i2")
+    sb = np.frombuffer(b, dtype="<i2")
+    n = len(sa)
+    if not n:
+        return a
+    # Vectorised: this runs on the playout thread for every crossfading chat.
+    gain = np.linspace(start, end, n, endpoint=False, dtype=np.float32)
+    out = sa * (1.0 - gain) + sb * gain
+    return np.clip(out, -32768, 32767).astype("<i2").tobytes()
+
+
+class PlayoutMixer:
+    """A chat's PCM reader. Owns the current decode and an optional standby."""
+
+    def __init__(self, chat_id: int, session: DecoderSession, track, fade_seconds: float = 0.0):
+        self.chat_id = chat_id
+        self.current = session
+        self.track = track
+        self.standby: Optional[DecoderSession] = None
+        self.standby_track = None
+        self.prepare_failed = None
+        self.fade_bytes = int(fade_seconds * BYTES_PER_SECOND) & ~1
+        self.closed = False
+        self.end_reported = False
+        self.adoptable = None  # track switched in at a boundary, awaiting the queue advance
+        self._fade_pos = 0
+        self._drained_at: Optional[float] = None
+        # Filled on the playout thread, drained by the engine on the loop.
+        self._retired: list[DecoderSession] = []
+        self._events: list[tuple[float, bool, bool]] = []  # (gap_ms, crossfade, at_boundary)
+        self._lock = threading.Lock()
+
+    @property
+    def position(self) -> float:
+        return self.current.offset + self.current.ring.consumed / BYTES_PER_SECOND
+
+    def remaining(self) -> Optional[float]:
+        duration = self.track.duration if self.track is not None else 0
+        return duration - self.position if duration else None
+
+    @staticmethod
+    def _drained(session: DecoderSession) -> bool:
+        return session.ring.eof and session.ring.available() == 0
+
+    def _gap_ms(self) -> float:
+        return (time.monotonic() - self._drained_at) * 1000 if self._drained_at else 0.0
+
+    def _promote(self, crossfade: bool, at_boundary: bool = True):
+        self._events.append((self._gap_ms(), crossfade, at_boundary))
+        self._retired.append(self.current)
+        self.current, self.track = self.standby, self.standby_track
+        self.standby = self.standby_track = None
+        self.adoptable = self.track if at_boundary else None
+        self._fade_pos = 0
+        self._drained_at = None
+        self.end_reported = False
+
+    def read(self, length: int) -> bytes:
+        with self._lock:
+            if self.closed:
+                return b"\x00" * length
+            cur, nxt = self.current, self.standby
+            if nxt is not None:
+                remaining = self.remaining()
+                fading = self.fade_bytes and (
+                    self._fade_pos or (remaining is not None and remaining * BYTES_PER_SECOND <= self.fade_bytes)
+                )
+                if fading:
+                    start = self._fade_pos / self.fade_bytes
+                    self._fade_pos += length
+                    end = min(1.0, self._fade_pos / self.fade_bytes)
+                    out = _mix(cur.ring.read(length), nxt.ring.read(length), start, end)
+                    if end >= 1.0 or self._drained(cur):
+                        self._promote(crossfade=True)
+                    return out
+                if self._drained(cur):
+                    self._promote(crossfade=False)
+                    return self.current.ring.read(length)
+            if self._drained(cur):
+                if self._drained_at is None:
+                    self._drained_at = time.monotonic()
+                return b"\x00" * length
+            return cur.ring.read(length)
+
+    def ended(self) -> bool:
+        """Current track played out with nothing pre-buffered behind it."""
+        return self._drained_at is not None
+
+    def promote_now(self):
+        """Hard switch to the standby (user skip onto a pre-buffered track)."""
+        with self._lock:
+            if self.standby is not None:
+                self._promote(crossfade=False, at_boundary=False)
+
+    def replace(self, session: DecoderSession, track):
+        """Hard switch to a freshly opened decode."""
+        with self._lock:
+            if self._drained_at is not None:
+                self._events.append((self._gap_ms(), False, False))
+            self._retired.append(self.current)
+            if self.standby is not None:
+                self._retired.append(self.standby)
+            self.current, self.track = session, track
+            self.standby = self.standby_track = None
+            self.adoptable = None
+            self._fade_pos = 0
+            self._drained_at = None
+            self.end_reported = False
+
+    def set_standby(self, session: DecoderSession, track):
+        with self._lock:
+            if self.standby is not None:
+                self._retired.append(self.standby)
+            self.standby, self.standby_track = session, track
+
+    def drop_standby(self):
+        with self._lock:
+            if self.standby is not None and not self._fade_pos:
+                self._retired.append(self.standby)
+                self.standby = self.standby_track = None
+
+    def take(self) -> tuple[list[DecoderSession], list[tuple[float, bool, bool]]]:
+        with self._lock:
+            retired, events = self._retired, self._events
+            self._retired, self._events = [], []
+        return retired, events
+
+    def close(self) -> list[DecoderSession]:
+        with self._lock:
+            self.closed = True
+            sessions = self._retired + [s for s in (self.current, self.standby) if s is not None]
+            self._retired = []
+        return sessions
+
+
+async def _stop_sessions(sessions: list[DecoderSession]):
+    for session in sessions:
+        await session.stop()
+        session.ring.close()
+
+
+class TransitionEngine:
+    """Per-chat mixers plus one monitor task that pre-buffers upcoming tracks."""
+
+    def __init__(self, enabled: bool = False, fade_seconds: float = 0.0, preload_seconds: float = 10.0):
+        self.enabled = enabled
+        self.fade_seconds = max(0.0, fade_seconds)
+        self.preload_seconds = max(1.0, preload_seconds)
+        self._mixers: dict[int, PlayoutMixer] = {}
+        self._preparing: dict[int, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._gaps: dict[int, deque] = {}
+        self._all_gaps: deque[float] = deque(maxlen=256)
+        self.switches = 0
+        self.gapless = 0
+        self.crossfades = 0
+        self.hard_cuts = 0
+
+    def handles(self, is_video: bool) -> bool:
+        return self.enabled and not is_video
+
+    def active(self, chat_id: int) -> bool:
+        return chat_id in self._mixers
+
+    def position(self, chat_id: int) -> float:
+        mixer = self._mixers.get(chat_id)
+        return mixer.position if mixer else 0.0
+
+    def adopt(self, chat_id: int, track) -> bool:
+        """True if track was already switched in at the boundary, or is pre-buffered and now is."""
+        mixer = self._mixers.get(chat_id)
+        if mixer is None or track is None:
+            return False
+        if mixer.adoptable is not None and mixer.adoptable is track:
+            mixer.adoptable = None
+            return True
+        if mixer.standby is not None and mixer.standby_track is track:
+            mixer.promote_now()
+            return True
+        return False
+
+    async def play(self, chat_id: int, track, media_url: str, gc, offset: float = 0.0, gain_db: float = 0.0) -> bool:
+        """Start track through the chat's mixer, installing one on the call if needed."""
+        session = await open_decoder(
+            chat_id, media_url, offset=offset, tag=f".t{next(_tags)}", announce_end=False, gain_db=gain_db
+        )
+        if session is None:
+            return False
+
+        mixer = self._mixers.get(chat_id)
+        if mixer is not None:
+            mixer.replace(session, track)
+            await self._drain(chat_id, mixer)
+            return True
+
+        mixer = PlayoutMixer(chat_id, session, track, self.fade_seconds)
+        try:
+            if gc.is_connected:
+                await gc.change_stream(chat_id, mixer)
+            else:
+                await gc.join_group_call(chat_id, mixer)
+        except Exception:
+            await _stop_sessions(mixer.close())
+            raise
+
+        self._mixers[chat_id] = mixer
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._monitor())
+        return True
+
+    async def release(self, chat_id: int):
+        """Stream release hook: tear down the chat's mixer and any pending preload."""
+        task = self._preparing.pop(chat_id, None)
+        if task and not task.done():
+            task.cancel()
+        mixer = self._mixers.pop(chat_id, None)
+        self._gaps.pop(chat_id, None)
+        if mixer is not None:
+            await _stop_sessions(mixer.close())
+
+    async def _drain(self, chat_id: int, mixer: PlayoutMixer) -> bool:
+        """Stop retired decoders and record switches. True if a boundary switch happened."""
+        retired, events = mixer.take()
+        await _stop_sessions(retired)
+        boundary = False
+        for gap_ms, crossfade, at_boundary in events:
+            self.switches += 1
+            if crossfade:
+                self.crossfades += 1
+            elif gap_ms < 1.0:
+                self.gapless += 1
+            else:
+                self.hard_cuts += 1
+            self._gaps.setdefault(chat_id, deque(maxlen=20)).append(gap_ms)
+            self._all_gaps.append(gap_ms)
+            boundary = boundary or at_boundary
+        return boundary
+
+    async def _monitor(self):
+        from core.call import call_manager
+
+        while self._mixers:
+            try:
+                await asyncio.sleep(_MONITOR_INTERVAL)
+                for chat_id, mixer in list(self._mixers.items()):
+                    if await self._drain(chat_id, mixer):
+                        # Already playing the next track; let the queue catch up.
+                        call_manager.notify_stream_end(chat_id)
+                    elif mixer.ended() and not mixer.end_reported:
+                        mixer.end_reported = True
+                        call_manager.notify_stream_end(chat_id)
+                    else:
+                        self._maybe_prepare(chat_id, mixer)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Transition monitor error: %s", e)
+
+    def _maybe_prepare(self, chat_id: int, mixer: PlayoutMixer):
+        if chat_id in self._preparing:
+            return
+        remaining = mixer.remaining()
+        if remaining is None or remaining > self.preload_seconds + self.fade_seconds:
+            return
+        upcoming = queue_view(chat_id)[:2]
+        if not upcoming or upcoming[0] is not mixer.track:
+            return  # queue is mid-advance
+        want = upcoming[1] if len(upcoming) > 1 else None
+        if mixer.standby_track is not None and mixer.standby_track is not want:
+            mixer.drop_standby()  # queue was edited after pre-buffering
+        if want is None or want.is_video or mixer.standby_track is want or mixer.prepare_failed is want:
+            return
+        self._preparing[chat_id] = asyncio.create_task(self._prepare(chat_id, mixer, want))
+
+    async def _prepare(self, chat_id: int, mixer: PlayoutMixer, track):
+        from plugins.music.player import _resolve_stream_url
+        from utils.audio_cache import audio_cache
+        from utils.loudness import loudness
+        from utils.prefetch import prefetcher
+        from utils.url_refresh import playable_source
+
+        try:
+            media_url = (
+                audio_cache.lookup(track)
+                or prefetcher.take(chat_id, track)
+                or await _resolve_stream_url(playable_source(track), priority=PRIORITY_PREFETCH)
+            )
+            session = None
+            if media_url:
+                gain = await loudness.playback_gain(chat_id, track)
+                session = await open_decoder(
+                    chat_id, media_url, tag=f".t{next(_tags)}", announce_end=False, gain_db=gain
+                )
+            if session is None:
+                mixer.prepare_failed = track
+                return
+            if mixer.closed or self._mixers.get(chat_id) is not mixer:
+                await _stop_sessions([session])
+                return
+            mixer.set_standby(session, track)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            mixer.prepare_failed = track
+            logger.debug("Pre-buffering next track failed in %s: %s", chat_id, e)
+        finally:
+            if self._preparing.get(chat_id) is asyncio.current_task():
+                self._preparing.pop(chat_id, None)
+
+    async def shutdown(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        for chat_id in list(self._mixers):
+            await self.release(chat_id)
+
+    def stats(self) -> dict:
+        gaps = sorted(self._all_gaps)
+
+        def pct(p: float) -> float:
+            return gaps[min(len(gaps) - 1, int(len(gaps) * p))] if gaps else 0.0
+
+        return {
+            "enabled": self.enabled,
+            "crossfade": self.fade_seconds,
+            "active": len(self._mixers),
+            "standby": sum(1 for m in self._mixers.values() if m.standby is not None),
+            "switches": self.switches,
+            "gapless": self.gapless,
+            "crossfades": self.crossfades,
+            "hard_cuts": self.hard_cuts,
+            "p50_gap_ms": pct(0.50),
+            "p95_gap_ms": pct(0.95),
+            "last_gap_ms": {chat_id: g[-1] for chat_id, g in self._gaps.items() if g},
+        }
+
+
+# Global singleton
+transition_engine = TransitionEngine(
+    enabled=GAPLESS_ENABLED,
+    fade_seconds=CROSSFADE_SECONDS,
+    preload_seconds=TRANSITION_PRELOAD_SECONDS,
+)
+add_release_hook(transition_engine.release)
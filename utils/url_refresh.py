@@ -0,0 +1,131 @@
+"""
+Auralyx Music - Signed URL Refresh
+Tracks the expiry of signed media URLs (googlevideo `expire=`) stored in
+queue entries and re-resolves them from the origin page URL shortly
+before they expire or right before playback.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+
+from config import URL_REFRESH_BATCH, URL_REFRESH_MARGIN, URL_REFRESH_WINDOW
+from utils.extractor import PRIORITY_PREFETCH
+
+logger = logging.getLogger(__name__)
+
+_EXPIRE_RE = re.compile(r"[?&/]expire[=/](\d{9,11})")
+
+CHECK_INTERVAL = 60  # seconds
+
+_refresh_task: Optional[asyncio.Task] = None
+_stats = {"refreshed": 0, "failed": 0, "passes": 0}
+
+
+def parse_expiry(url: str) -> Optional[float]:
+    """Return the unix expiry embedded in a signed media URL, if any."""
+    m = _EXPIRE_RE.search(url or "")
+    return float(m.group(1)) if m else None
+
+
+def is_expiring(track: dict, margin: float = URL_REFRESH_MARGIN) -> bool:
+    """True if the track's stored media URL expires within `margin` seconds."""
+    expires_at = track.get("expires_at")
+    return bool(expires_at) and expires_at - time.time() < margin
+
+
+def playable_source(track: dict) -> str:
+    """URL to hand to stream start: the stored media URL, or the page URL once it has expired."""
+    if is_expiring(track, margin=30) and track.get("webpage_url"):
+        return track["webpage_url"]
+    return track.get("url", "")
+
+
+def url_ttl(url: str, default: int) -> int:
+    """Cache lifetime for a signed URL, leaving the refresh margin as headroom."""
+    expires_at = parse_expiry(url)
+    if not expires_at:
+        return default
+    return int(max(60, expires_at - time.time() - URL_REFRESH_MARGIN))
+
+
+async def _refresh_track(track: dict) -> bool:
+    from plugins.music.player import _is_direct_stream_url, _resolve_stream_url
+
+    source = track.get("webpage_url")
+    if not source:
+        return False
+    direct = await _resolve_stream_url(
+        source,
+        is_video=bool(track.get("is_video", False)),
+        priority=PRIORITY_PREFETCH,
+    )
+    if not direct or not _is_direct_stream_url(direct):
+        return False
+    track["url"] = direct
+    track["expires_at"] = parse_expiry(direct)
+    return True
+
+
+async def refresh_due() -> int:
+    """One pass: re-resolve expiring entries near the head of every queue, in batches."""
+    from utils.queue import _queues
+
+    due: list[dict] = []
+    seen: set[str] = set()
+    for q in list(_queues.values()):
+        for track in q.head(URL_REFRESH_WINDOW):
+            source = track.get("webpage_url")
+            if source and source not in seen and is_expiring(track):
+                seen.add(source)
+                due.append(track)
+
+    refreshed = 0
+    for i in range(0, len(due), URL_REFRESH_BATCH):
+        batch = due[i : i + URL_REFRESH_BATCH]
+        results = await asyncio.gather(*(_refresh_track(t) for t in batch), return_exceptions=True)
+        for ok in results:
+            if ok is True:
+                refreshed += 1
+            else:
+                _stats["failed"] += 1
+    _stats["refreshed"] += refreshed
+    _stats["passes"] += 1
+    return refreshed
+
+
+async def _refresh_loop():
+    while True:
+        try:
+            await asyncio.sleep(CHECK_INTERVAL)
+            count = await refresh_due()
+            if count:
+                logger.debug("Refreshed %d expiring stream URLs", count)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error("URL refresh loop error: %s", e)
+            await asyncio.sleep(10)
+
+
+def start_url_refresh():
+    """Start the background refresh task. Call once at startup."""
+    global _refresh_task
+    if _refresh_task and not _refresh_task.done():
+        return
+    _refresh_task = asyncio.create_task(_refresh_loop())
+    logger.info("Stream URL refresher started (window %s, margin %ss)", URL_REFRESH_WINDOW, URL_REFRESH_MARGIN)
+
+
+def stop_url_refresh():
+    """Stop the background refresh task."""
+    global _refresh_task
+    if _refresh_task and not _refresh_task.done():
+        _refresh_task.cancel()
+    _refresh_task = None
+
+
+def get_refresh_stats() -> dict:
+    return dict(_stats)